@@ -4,6 +4,8 @@ const mlService = require('../services/mlService');
 
 /**
  * Запустити тест ML моделі
+ * Відповідь - 202 з job_id (стан: GET /api/ml-test/jobs/:jobId)
+ * або 200 з результатом з кешу ML сервісу
  */
 exports.runModelTest = async (req, res) => {
   try {
@@ -13,9 +15,9 @@ exports.runModelTest = async (req, res) => {
     console.log(`   Дані за ${days} днів, test size: ${testSize}%`);
 
     // Викликаємо ML сервіс для тестування
-    const testResult = await mlService.testModel(districtId, days, testSize);
+    const { status, data } = await mlService.testModel(districtId, days, testSize);
 
-    res.json(testResult);
+    res.status(status).json(data);
 
   } catch (error) {
     console.error('❌ Error running model test:', error);
@@ -27,6 +29,25 @@ exports.runModelTest = async (req, res) => {
   }
 };
 
+/**
+ * Стан тесту моделі: прогрес, результат після завершення
+ */
+exports.getTestJob = async (req, res) => {
+  try {
+    const job = await mlService.getJob(req.params.jobId);
+
+    res.json({ success: true, job });
+
+  } catch (error) {
+    console.error('❌ Error getting model test job:', error.message);
+    res.status(error.response?.status || 500).json({
+      success: false,
+      error: 'Failed to get model test job',
+      message: error.response?.data?.error || error.message
+    });
+  }
+};
+
 /**
  * Отримати інформацію про доступні дані для тестування
  */
@@ -0,0 +1,197 @@
+-- 004_create_air_quality_daily_stats.sql
+-- Щоденні агрегати по районах для endpoint-ів статистики
+-- (get_data_stats, /api/model/<id>/info, /test-data-info/<id>)
+-- Оновлюються тригерами при кожній вставці/зміні реальних вимірювань
+
+-- Кількість годин доби, позначених у 24-бітній масці
+CREATE OR REPLACE FUNCTION hours_in_mask(mask INTEGER)
+RETURNS INTEGER AS $$
+    SELECT COUNT(*)::INTEGER
+    FROM generate_series(0, 23) AS h
+    WHERE (mask >> h) & 1 = 1;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE TABLE IF NOT EXISTS air_quality_daily_stats (
+    district_id INTEGER NOT NULL REFERENCES districts(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    
+    record_count INTEGER NOT NULL DEFAULT 0,
+    
+    pm25_count INTEGER NOT NULL DEFAULT 0,
+    pm25_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    pm25_min DECIMAL(10, 2),
+    pm25_max DECIMAL(10, 2),
+    
+    aqi_sum BIGINT NOT NULL DEFAULT 0,
+    aqi_min INTEGER,
+    aqi_max INTEGER,
+    
+    -- Покриття: біт N = є хоча б одне вимірювання за годину N
+    hours_mask INTEGER NOT NULL DEFAULT 0,
+    hours_covered INTEGER GENERATED ALWAYS AS (hours_in_mask(hours_mask)) STORED,
+    
+    first_measured_at TIMESTAMP,
+    last_measured_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (district_id, day)
+);
+
+-- Повний перерахунок агрегатів для набору (район, день)
+CREATE OR REPLACE FUNCTION recompute_air_quality_daily_stats(p_district_ids INTEGER[], p_days DATE[])
+RETURNS void AS $$
+BEGIN
+    DELETE FROM air_quality_daily_stats s
+    USING unnest(p_district_ids, p_days) AS k(district_id, day)
+    WHERE s.district_id = k.district_id AND s.day = k.day;
+    
+    INSERT INTO air_quality_daily_stats (
+        district_id, day, record_count,
+        pm25_count, pm25_sum, pm25_min, pm25_max,
+        aqi_sum, aqi_min, aqi_max,
+        hours_mask, first_measured_at, last_measured_at
+    )
+    SELECT
+        h.district_id,
+        h.measured_at::date,
+        COUNT(*),
+        COUNT(h.pm25),
+        COALESCE(SUM(h.pm25), 0),
+        MIN(h.pm25),
+        MAX(h.pm25),
+        SUM(h.aqi),
+        MIN(h.aqi),
+        MAX(h.aqi),
+        bit_or(1 << EXTRACT(HOUR FROM h.measured_at)::INTEGER),
+        MIN(h.measured_at),
+        MAX(h.measured_at)
+    FROM air_quality_history h
+    JOIN (
+        SELECT DISTINCT district_id, day
+        FROM unnest(p_district_ids, p_days) AS k(district_id, day)
+    ) k ON h.district_id = k.district_id
+       AND h.measured_at >= k.day
+       AND h.measured_at < k.day + 1
+    WHERE h.is_forecast = FALSE
+    GROUP BY h.district_id, h.measured_at::date;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Вставка: інкрементально додаємо агрегати нових рядків
+CREATE OR REPLACE FUNCTION air_quality_daily_stats_on_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO air_quality_daily_stats AS s (
+        district_id, day, record_count,
+        pm25_count, pm25_sum, pm25_min, pm25_max,
+        aqi_sum, aqi_min, aqi_max,
+        hours_mask, first_measured_at, last_measured_at
+    )
+    SELECT
+        district_id,
+        measured_at::date,
+        COUNT(*),
+        COUNT(pm25),
+        COALESCE(SUM(pm25), 0),
+        MIN(pm25),
+        MAX(pm25),
+        SUM(aqi),
+        MIN(aqi),
+        MAX(aqi),
+        bit_or(1 << EXTRACT(HOUR FROM measured_at)::INTEGER),
+        MIN(measured_at),
+        MAX(measured_at)
+    FROM new_rows
+    WHERE is_forecast = FALSE AND district_id IS NOT NULL
+    GROUP BY district_id, measured_at::date
+    ON CONFLICT (district_id, day) DO UPDATE SET
+        record_count = s.record_count + EXCLUDED.record_count,
+        pm25_count = s.pm25_count + EXCLUDED.pm25_count,
+        pm25_sum = s.pm25_sum + EXCLUDED.pm25_sum,
+        pm25_min = LEAST(s.pm25_min, EXCLUDED.pm25_min),
+        pm25_max = GREATEST(s.pm25_max, EXCLUDED.pm25_max),
+        aqi_sum = s.aqi_sum + EXCLUDED.aqi_sum,
+        aqi_min = LEAST(s.aqi_min, EXCLUDED.aqi_min),
+        aqi_max = GREATEST(s.aqi_max, EXCLUDED.aqi_max),
+        hours_mask = s.hours_mask | EXCLUDED.hours_mask,
+        first_measured_at = LEAST(s.first_measured_at, EXCLUDED.first_measured_at),
+        last_measured_at = GREATEST(s.last_measured_at, EXCLUDED.last_measured_at),
+        updated_at = CURRENT_TIMESTAMP;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Видалення: min/max не можна відняти, тому перераховуємо зачеплені дні
+CREATE OR REPLACE FUNCTION air_quality_daily_stats_on_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM recompute_air_quality_daily_stats(
+        array_agg(district_id), array_agg(day)
+    )
+    FROM (
+        SELECT DISTINCT district_id, measured_at::date AS day
+        FROM old_rows
+        WHERE is_forecast = FALSE AND district_id IS NOT NULL
+    ) affected
+    HAVING COUNT(*) > 0;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Оновлення: перераховуємо дні і до, і після зміни
+CREATE OR REPLACE FUNCTION air_quality_daily_stats_on_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM recompute_air_quality_daily_stats(
+        array_agg(district_id), array_agg(day)
+    )
+    FROM (
+        SELECT district_id, measured_at::date AS day FROM old_rows
+        WHERE district_id IS NOT NULL
+        UNION
+        SELECT district_id, measured_at::date AS day FROM new_rows
+        WHERE district_id IS NOT NULL
+    ) affected
+    HAVING COUNT(*) > 0;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS air_quality_daily_stats_insert ON air_quality_history;
+CREATE TRIGGER air_quality_daily_stats_insert
+    AFTER INSERT ON air_quality_history
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION air_quality_daily_stats_on_insert();
+
+DROP TRIGGER IF EXISTS air_quality_daily_stats_delete ON air_quality_history;
+CREATE TRIGGER air_quality_daily_stats_delete
+    AFTER DELETE ON air_quality_history
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION air_quality_daily_stats_on_delete();
+
+DROP TRIGGER IF EXISTS air_quality_daily_stats_update ON air_quality_history;
+CREATE TRIGGER air_quality_daily_stats_update
+    AFTER UPDATE ON air_quality_history
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION air_quality_daily_stats_on_update();
+
+-- Початкове заповнення з існуючої історії
+TRUNCATE air_quality_daily_stats;
+
+SELECT recompute_air_quality_daily_stats(
+    array_agg(district_id), array_agg(day)
+)
+FROM (
+    SELECT DISTINCT district_id, measured_at::date AS day
+    FROM air_quality_history
+    WHERE is_forecast = FALSE AND district_id IS NOT NULL
+) existing_days;
+
+COMMENT ON TABLE air_quality_daily_stats IS 'Щоденні агрегати реальних вимірювань по районах (підтримуються тригерами)';
+COMMENT ON COLUMN air_quality_daily_stats.hours_mask IS 'Біт N = є вимірювання за годину N доби';
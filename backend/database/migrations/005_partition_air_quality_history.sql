@@ -0,0 +1,267 @@
+-- 005_partition_air_quality_history.sql
+-- Помісячне партиціювання air_quality_history
+--
+-- * RANGE-партиції по measured_at (одна на місяць) + DEFAULT для даних поза діапазоном
+-- * BRIN на measured_at замість великого B-tree
+-- * Часткові покривні індекси (district_id, measured_at) окремо для вимірювань і прогнозів,
+--   щоб ML-запити лишались index-only scan незалежно від обсягу історії
+-- * Retention видаляє цілі партиції (DROP замість DELETE + VACUUM)
+--
+-- Потребує міграції 004 (тригери air_quality_daily_stats переносяться на нову таблицю)
+
+BEGIN;
+
+-- ------------------------------------------------
+-- 1. Функції керування партиціями
+-- ------------------------------------------------
+
+-- Створити місячні партиції для [p_from, p_to)
+-- Рядки цього місяця, що вже лежать у DEFAULT, не дали б створити партицію
+-- (CREATE ... PARTITION OF перевіряє, що в DEFAULT немає її діапазону), тому
+-- вони тимчасово виносяться і після створення вставляються вже в нову партицію
+CREATE OR REPLACE FUNCTION create_air_quality_history_partitions(p_from DATE, p_to DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::date;
+    month_end DATE;
+    partition_name TEXT;
+    moved INTEGER;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start < p_to LOOP
+        partition_name := format('air_quality_history_y%sm%s',
+                                 to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+        month_end := (month_start + INTERVAL '1 month')::date;
+        
+        IF to_regclass(partition_name) IS NULL THEN
+            moved := 0;
+            
+            IF to_regclass('air_quality_history_default') IS NOT NULL THEN
+                -- Нові рядки цього місяця не потраплять у DEFAULT до кінця транзакції
+                LOCK TABLE air_quality_history_default IN EXCLUSIVE MODE;
+                
+                IF EXISTS (
+                    SELECT 1 FROM air_quality_history_default
+                    WHERE measured_at >= month_start AND measured_at < month_end
+                ) THEN
+                    CREATE TEMP TABLE IF NOT EXISTS aqh_default_rows
+                        (LIKE air_quality_history) ON COMMIT DROP;
+                    TRUNCATE aqh_default_rows;
+                    
+                    -- DELETE/INSERT через батьківську таблицю: тригери
+                    -- air_quality_daily_stats перераховують зачеплені дні
+                    WITH deleted AS (
+                        DELETE FROM air_quality_history
+                        WHERE measured_at >= month_start AND measured_at < month_end
+                        RETURNING *
+                    )
+                    INSERT INTO aqh_default_rows SELECT * FROM deleted;
+                    GET DIAGNOSTICS moved = ROW_COUNT;
+                END IF;
+            END IF;
+            
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF air_quality_history FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end
+            );
+            
+            IF moved > 0 THEN
+                INSERT INTO air_quality_history SELECT * FROM aqh_default_rows;
+                RAISE NOTICE 'Партиція %: перенесено % рядків з DEFAULT', partition_name, moved;
+            END IF;
+            
+            created := created + 1;
+        END IF;
+        
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Видалити партиції, які повністю старші за p_keep_months місяців
+CREATE OR REPLACE FUNCTION drop_old_air_quality_history_partitions(p_keep_months INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => p_keep_months))::date;
+    part RECORD;
+    dropped INTEGER := 0;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'air_quality_history'::regclass
+          AND c.relname ~ '^air_quality_history_y[0-9]{4}m[0-9]{2}$'
+          AND to_date(substring(c.relname FROM 'y([0-9]{4}m[0-9]{2})$'), 'YYYY"m"MM') < cutoff
+    LOOP
+        EXECUTE format('ALTER TABLE air_quality_history DETACH PARTITION %I', part.relname);
+        EXECUTE format('DROP TABLE %I', part.relname);
+        dropped := dropped + 1;
+    END LOOP;
+    
+    -- DROP не викликає DELETE-тригери, тому агрегати чистимо явно
+    DELETE FROM air_quality_daily_stats WHERE day < cutoff;
+    
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ------------------------------------------------
+-- 2. Нова партиційована таблиця
+-- ------------------------------------------------
+
+DROP VIEW IF EXISTS current_air_quality;
+
+ALTER TABLE air_quality_history ADD COLUMN IF NOT EXISTS forecast_batch_id VARCHAR(36);
+ALTER TABLE air_quality_history RENAME TO air_quality_history_unpartitioned;
+ALTER SEQUENCE air_quality_history_id_seq OWNED BY NONE;
+
+CREATE TABLE air_quality_history (
+    id INTEGER NOT NULL DEFAULT nextval('air_quality_history_id_seq'),
+    district_id INTEGER REFERENCES districts(id) ON DELETE CASCADE,
+    
+    aqi INTEGER NOT NULL CHECK (aqi >= 0 AND aqi <= 500),
+    aqi_status VARCHAR(50) NOT NULL,
+    
+    pm25 DECIMAL(10, 2) CHECK (pm25 >= 0),
+    pm10 DECIMAL(10, 2) CHECK (pm10 >= 0),
+    no2 DECIMAL(10, 2) CHECK (no2 >= 0),
+    so2 DECIMAL(10, 2) CHECK (so2 >= 0),
+    co DECIMAL(10, 2) CHECK (co >= 0),
+    o3 DECIMAL(10, 2) CHECK (o3 >= 0),
+    
+    temperature DECIMAL(5, 2),
+    humidity INTEGER CHECK (humidity >= 0 AND humidity <= 100),
+    pressure INTEGER,
+    wind_speed DECIMAL(5, 2),
+    wind_direction VARCHAR(10),
+    
+    data_source VARCHAR(50) DEFAULT 'sensor',
+    sensor_id VARCHAR(100),
+    is_forecast BOOLEAN DEFAULT FALSE,
+    confidence_level DECIMAL(3, 2) CHECK (confidence_level >= 0 AND confidence_level <= 1),
+    forecast_batch_id VARCHAR(36),
+    
+    measured_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (id, measured_at)
+) PARTITION BY RANGE (measured_at);
+
+ALTER SEQUENCE air_quality_history_id_seq OWNED BY air_quality_history.id;
+
+CREATE TABLE air_quality_history_default PARTITION OF air_quality_history DEFAULT;
+
+-- Партиції для існуючих даних + рік наперед
+SELECT create_air_quality_history_partitions(
+    COALESCE((SELECT MIN(measured_at)::date FROM air_quality_history_unpartitioned), CURRENT_DATE),
+    (date_trunc('month', CURRENT_DATE) + INTERVAL '12 months')::date
+);
+
+-- ------------------------------------------------
+-- 3. Індекси (створюються на всіх партиціях автоматично)
+-- ------------------------------------------------
+
+CREATE INDEX idx_aqh_measured_at_brin ON air_quality_history USING BRIN (measured_at);
+
+CREATE INDEX idx_aqh_measurements_district_time
+    ON air_quality_history (district_id, measured_at)
+    INCLUDE (pm25, pm10, no2, so2, co, o3, aqi, temperature, humidity, pressure, wind_speed, wind_direction)
+    WHERE is_forecast = FALSE;
+
+CREATE INDEX idx_aqh_forecasts_district_time
+    ON air_quality_history (district_id, measured_at)
+    INCLUDE (pm25, pm10, no2, so2, co, o3, aqi)
+    WHERE is_forecast = TRUE;
+
+-- ------------------------------------------------
+-- 4. Перенесення даних
+-- ------------------------------------------------
+
+INSERT INTO air_quality_history (
+    id, district_id, aqi, aqi_status,
+    pm25, pm10, no2, so2, co, o3,
+    temperature, humidity, pressure, wind_speed, wind_direction,
+    data_source, sensor_id, is_forecast, confidence_level, forecast_batch_id,
+    measured_at, created_at
+)
+SELECT
+    id, district_id, aqi, aqi_status,
+    pm25, pm10, no2, so2, co, o3,
+    temperature, humidity, pressure, wind_speed, wind_direction,
+    data_source, sensor_id, is_forecast, confidence_level, forecast_batch_id,
+    measured_at, created_at
+FROM air_quality_history_unpartitioned;
+
+DROP TABLE air_quality_history_unpartitioned;
+
+-- ------------------------------------------------
+-- 5. Тригери щоденних агрегатів (створені після перенесення,
+--    бо air_quality_daily_stats вже заповнена цими даними)
+-- ------------------------------------------------
+
+CREATE TRIGGER air_quality_daily_stats_insert
+    AFTER INSERT ON air_quality_history
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION air_quality_daily_stats_on_insert();
+
+CREATE TRIGGER air_quality_daily_stats_delete
+    AFTER DELETE ON air_quality_history
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION air_quality_daily_stats_on_delete();
+
+CREATE TRIGGER air_quality_daily_stats_update
+    AFTER UPDATE ON air_quality_history
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION air_quality_daily_stats_on_update();
+
+-- ------------------------------------------------
+-- 6. Залежні об'єкти
+-- ------------------------------------------------
+
+CREATE OR REPLACE VIEW current_air_quality AS
+SELECT DISTINCT ON (d.id)
+    d.id as district_id,
+    d.name as district_name,
+    d.name_en as district_name_en,
+    d.latitude,
+    d.longitude,
+    aqh.aqi,
+    aqh.aqi_status,
+    aqh.pm25,
+    aqh.pm10,
+    aqh.no2,
+    aqh.temperature,
+    aqh.humidity,
+    aqh.measured_at
+FROM districts d
+LEFT JOIN air_quality_history aqh ON d.id = aqh.district_id
+WHERE aqh.is_forecast = FALSE
+ORDER BY d.id, aqh.measured_at DESC;
+
+-- Retention реальних вимірювань - цілими партиціями (~90 днів)
+CREATE OR REPLACE FUNCTION cleanup_old_air_quality_data()
+RETURNS void AS $$
+BEGIN
+    PERFORM drop_old_air_quality_history_partitions(3);
+    
+    DELETE FROM air_quality_history
+    WHERE measured_at < CURRENT_TIMESTAMP - INTERVAL '7 days'
+    AND is_forecast = TRUE;
+    
+    DELETE FROM notifications
+    WHERE read_at IS NOT NULL
+    AND read_at < CURRENT_TIMESTAMP - INTERVAL '30 days';
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
+
+ANALYZE air_quality_history;
+
+COMMENT ON TABLE air_quality_history IS 'Історія якості повітря, помісячні RANGE-партиції по measured_at';
@@ -0,0 +1,89 @@
+-- 006_create_forecast_runs.sql
+-- Окреме сховище прогнозів з версіонуванням за часом випуску (issued_at)
+--
+-- Один рядок = один запуск прогнозу для району: траєкторія зберігається
+-- масивами, елемент [h] - прогноз на base_time + h годин (h = горизонт).
+-- Запис прогнозу - один INSERT без DELETE, старі запуски лишаються для аналізу точності.
+
+CREATE TABLE IF NOT EXISTS forecast_runs (
+    id BIGSERIAL PRIMARY KEY,
+    district_id INTEGER NOT NULL REFERENCES districts(id) ON DELETE CASCADE,
+    
+    issued_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    base_time TIMESTAMP NOT NULL,  -- остання реальна точка, від якої рахується горизонт
+    horizon_hours SMALLINT NOT NULL CHECK (horizon_hours > 0),
+    model_type VARCHAR(50) NOT NULL,
+    
+    pm25 REAL[] NOT NULL,
+    pm10 REAL[] NOT NULL,
+    no2 REAL[] NOT NULL,
+    so2 REAL[] NOT NULL,
+    co REAL[] NOT NULL,
+    o3 REAL[] NOT NULL,
+    aqi SMALLINT[] NOT NULL,
+    
+    CONSTRAINT unique_forecast_run UNIQUE (district_id, issued_at),
+    CONSTRAINT forecast_run_lengths CHECK (
+        cardinality(pm25) = horizon_hours AND cardinality(pm10) = horizon_hours AND
+        cardinality(no2) = horizon_hours AND cardinality(so2) = horizon_hours AND
+        cardinality(co) = horizon_hours AND cardinality(o3) = horizon_hours AND
+        cardinality(aqi) = horizon_hours
+    )
+);
+
+CREATE INDEX IF NOT EXISTS idx_forecast_runs_issued ON forecast_runs(issued_at);
+
+-- Розгорнуті прогнози: (район, issued_at, горизонт) → значення
+CREATE OR REPLACE VIEW forecast_points AS
+SELECT
+    r.id AS run_id,
+    r.district_id,
+    r.issued_at,
+    r.model_type,
+    p.horizon::INTEGER AS horizon,
+    r.base_time + p.horizon * INTERVAL '1 hour' AS measured_at,
+    p.pm25, p.pm10, p.no2, p.so2, p.co, p.o3,
+    p.aqi::INTEGER AS aqi,
+    CASE
+        WHEN p.aqi <= 50 THEN 'Good'
+        WHEN p.aqi <= 100 THEN 'Moderate'
+        WHEN p.aqi <= 150 THEN 'Unhealthy for Sensitive'
+        WHEN p.aqi <= 200 THEN 'Unhealthy'
+        WHEN p.aqi <= 300 THEN 'Very Unhealthy'
+        ELSE 'Hazardous'
+    END AS aqi_status
+FROM forecast_runs r
+CROSS JOIN LATERAL unnest(r.pm25, r.pm10, r.no2, r.so2, r.co, r.o3, r.aqi)
+    WITH ORDINALITY AS p(pm25, pm10, no2, so2, co, o3, aqi, horizon);
+
+-- Останній запуск прогнозу для кожного району (для API/frontend)
+CREATE OR REPLACE VIEW latest_forecast_points AS
+SELECT fp.*
+FROM forecast_points fp
+JOIN (
+    SELECT DISTINCT ON (district_id) id
+    FROM forecast_runs
+    ORDER BY district_id, issued_at DESC
+) latest ON latest.id = fp.run_id;
+
+-- Retention: прогнози з таблиці історії більше не пишуться, запуски зберігаються 30 днів
+CREATE OR REPLACE FUNCTION cleanup_old_air_quality_data()
+RETURNS void AS $$
+BEGIN
+    PERFORM drop_old_air_quality_history_partitions(3);
+    
+    DELETE FROM air_quality_history
+    WHERE measured_at < CURRENT_TIMESTAMP - INTERVAL '7 days'
+    AND is_forecast = TRUE;
+    
+    DELETE FROM forecast_runs
+    WHERE issued_at < CURRENT_TIMESTAMP - INTERVAL '30 days';
+    
+    DELETE FROM notifications
+    WHERE read_at IS NOT NULL
+    AND read_at < CURRENT_TIMESTAMP - INTERVAL '30 days';
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON TABLE forecast_runs IS 'Запуски прогнозів: траєкторія на horizon_hours годин від base_time, масив на параметр';
+COMMENT ON COLUMN forecast_runs.issued_at IS 'Час випуску прогнозу (версія)';
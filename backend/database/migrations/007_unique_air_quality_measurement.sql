@@ -0,0 +1,21 @@
+-- 007_unique_air_quality_measurement.sql
+-- Унікальність запису (район, час, прогноз/реальні) для ідемпотентного
+-- INSERT ... ON CONFLICT DO NOTHING при масовому завантаженні історії
+
+BEGIN;
+
+UPDATE air_quality_history SET is_forecast = FALSE WHERE is_forecast IS NULL;
+ALTER TABLE air_quality_history ALTER COLUMN is_forecast SET NOT NULL;
+
+-- Видалити дублікати, лишивши найстаріший запис
+DELETE FROM air_quality_history a
+USING air_quality_history b
+WHERE a.district_id = b.district_id
+  AND a.measured_at = b.measured_at
+  AND a.is_forecast = b.is_forecast
+  AND a.id > b.id;
+
+ALTER TABLE air_quality_history
+    ADD CONSTRAINT unique_aqh_district_time UNIQUE (district_id, measured_at, is_forecast);
+
+COMMIT;
@@ -7,6 +7,9 @@ const mlTestController = require('../controllers/mlTestController');
 // Запустити тест моделі
 router.post('/run', mlTestController.runModelTest);
 
+// Стан запущеного тесту (202 з /run повертає job_id)
+router.get('/jobs/:jobId', mlTestController.getTestJob);
+
 // Отримати інфо про доступні дані
 router.get('/data-info/:districtId', mlTestController.getTestDataInfo);
 
@@ -6,19 +6,26 @@ const axios = require('axios');
 const FormData = require('form-data');
 const fs = require('fs');
 
+const path = require('path');
+
 const ML_SERVICE_URL = process.env.ML_SERVICE_URL || 'http://localhost:5001';
 
+// Формати датасетів, які приймає ML-сервіс (CSV читається частинами, Parquet/Feather - колонками)
+const DATASET_EXTENSIONS = ['.csv', '.parquet', '.pq', '.feather', '.arrow'];
+const MAX_DATASET_MB = parseInt(process.env.RESEARCH_MAX_UPLOAD_MB || '500', 10);
+
 // Налаштування multer для завантаження файлів
 const upload = multer({
   dest: 'uploads/',
   limits: {
-    fileSize: 50 * 1024 * 1024 // 50 MB
+    fileSize: MAX_DATASET_MB * 1024 * 1024
   },
   fileFilter: (req, file, cb) => {
-    if (file.mimetype === 'text/csv') {
+    const extension = path.extname(file.originalname || '').toLowerCase();
+    if (DATASET_EXTENSIONS.includes(extension)) {
       cb(null, true);
     } else {
-      cb(new Error('Тільки CSV файли дозволені'), false);
+      cb(new Error('Дозволені лише CSV, Parquet та Feather файли'), false);
     }
   }
 });
@@ -26,6 +33,8 @@ const upload = multer({
 /**
  * POST /api/research/train-custom-model
  * Тренування custom моделі на user's датасеті
+ * ML-сервіс ставить навчання у фон і одразу повертає 202 з job_id;
+ * прогрес - GET /api/research/jobs/:jobId, скасування - POST /api/research/jobs/:jobId/cancel
  */
 router.post('/train-custom-model', upload.single('dataset'), async (req, res) => {
   try {
@@ -50,13 +59,13 @@ router.post('/train-custom-model', upload.single('dataset'), async (req, res) =>
     const formData = new FormData();
     formData.append('dataset', fs.createReadStream(req.file.path), {
       filename: req.file.originalname,
-      contentType: 'text/csv'
+      contentType: req.file.mimetype || 'application/octet-stream'
     });
     formData.append('config', JSON.stringify(config));
 
     console.log('🚀 Відправляємо на ML-сервіс...');
 
-    // Відправляємо на ML-сервіс
+    // Відправляємо на ML-сервіс (чекаємо лише завантаження і валідації, не навчання)
     const response = await axios.post(
       `${ML_SERVICE_URL}/api/research/train-custom`,
       formData,
@@ -64,16 +73,16 @@ router.post('/train-custom-model', upload.single('dataset'), async (req, res) =>
         headers: formData.getHeaders(),
         maxContentLength: Infinity,
         maxBodyLength: Infinity,
-        timeout: 600000 // 10 хвилин
+        timeout: 120000
       }
     );
 
-    console.log('✅ Отримано відповідь від ML-сервісу');
+    console.log('✅ Навчання поставлено в чергу:', response.data.job_id);
 
     // Видаляємо тимчасовий файл
     fs.unlinkSync(req.file.path);
 
-    res.json(response.data);
+    res.status(response.status).json(response.data);
 
   } catch (error) {
     console.error('❌ Помилка тренування:', error.message);
@@ -91,6 +100,93 @@ router.post('/train-custom-model', upload.single('dataset'), async (req, res) =>
   }
 });
 
+/**
+ * GET /api/research/jobs/:jobId
+ * Стан навчання: прогрес, епоха, loss, ETA, результат після завершення
+ */
+router.get('/jobs/:jobId', async (req, res) => {
+  try {
+    const response = await axios.get(
+      `${ML_SERVICE_URL}/api/jobs/${encodeURIComponent(req.params.jobId)}`,
+      { timeout: 10000 }
+    );
+    res.json(response.data);
+  } catch (error) {
+    res.status(error.response?.status || 500).json({
+      success: false,
+      error: error.response?.data?.error || error.message
+    });
+  }
+});
+
+/**
+ * GET /api/research/jobs/:jobId/events
+ * Прогрес навчання як server-sent events (проксі до ML-сервісу)
+ */
+router.get('/jobs/:jobId/events', async (req, res) => {
+  try {
+    const response = await axios.get(
+      `${ML_SERVICE_URL}/api/jobs/${encodeURIComponent(req.params.jobId)}/events`,
+      { responseType: 'stream', timeout: 0 }
+    );
+
+    res.setHeader('Content-Type', 'text/event-stream');
+    res.setHeader('Cache-Control', 'no-cache');
+    res.setHeader('X-Accel-Buffering', 'no');
+    res.flushHeaders();
+
+    response.data.pipe(res);
+    req.on('close', () => response.data.destroy());
+  } catch (error) {
+    res.status(error.response?.status || 500).json({
+      success: false,
+      error: error.message
+    });
+  }
+});
+
+/**
+ * POST /api/research/jobs/:jobId/cancel
+ * Скасувати навчання (зупиниться після поточної епохи)
+ */
+router.post('/jobs/:jobId/cancel', async (req, res) => {
+  try {
+    const response = await axios.post(
+      `${ML_SERVICE_URL}/api/jobs/${encodeURIComponent(req.params.jobId)}/cancel`,
+      {},
+      { timeout: 10000 }
+    );
+    res.status(response.status).json(response.data);
+  } catch (error) {
+    res.status(error.response?.status || 500).json({
+      success: false,
+      error: error.response?.data?.error || error.message
+    });
+  }
+});
+
+/**
+ * GET /api/research/plots/:jobId/:name
+ * PNG-графік навчання (рендериться у фоні на ML-сервісі)
+ */
+router.get('/plots/:jobId/:name', async (req, res) => {
+  try {
+    const response = await axios.get(
+      `${ML_SERVICE_URL}/api/research/plots/${encodeURIComponent(req.params.jobId)}/${encodeURIComponent(req.params.name)}`,
+      { responseType: 'stream', timeout: 60000 }
+    );
+
+    res.setHeader('Content-Type', 'image/png');
+    res.setHeader('Cache-Control', response.headers['cache-control'] || 'no-cache');
+    response.data.pipe(res);
+  } catch (error) {
+    res.status(error.response?.status || 500).json({
+      success: false,
+      error: error.message
+    });
+  }
+});
+
 /**
  * GET /api/research/download-template
  * Завантажити шаблон CSV з більшою кількістю даних
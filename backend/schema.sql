@@ -4,6 +4,8 @@
 
 -- Видалення існуючих таблиць (якщо є)
 DROP TABLE IF EXISTS notifications CASCADE;
+DROP TABLE IF EXISTS air_quality_daily_stats CASCADE;
+DROP TABLE IF EXISTS forecast_runs CASCADE;
 DROP TABLE IF EXISTS air_quality_history CASCADE;
 DROP TABLE IF EXISTS user_subscriptions CASCADE;
 DROP TABLE IF EXISTS districts CASCADE;
@@ -62,7 +64,7 @@ CREATE INDEX idx_districts_coordinates ON districts(latitude, longitude);
 -- 3. Таблиця даних про якість повітря
 -- ================================================
 CREATE TABLE air_quality_history (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     district_id INTEGER REFERENCES districts(id) ON DELETE CASCADE,
     
     aqi INTEGER NOT NULL CHECK (aqi >= 0 AND aqi <= 500),
@@ -83,18 +85,337 @@ CREATE TABLE air_quality_history (
     
     data_source VARCHAR(50) DEFAULT 'sensor',
     sensor_id VARCHAR(100),
-    is_forecast BOOLEAN DEFAULT FALSE,
+    is_forecast BOOLEAN NOT NULL DEFAULT FALSE,
     confidence_level DECIMAL(3, 2) CHECK (confidence_level >= 0 AND confidence_level <= 1),
     
     measured_at TIMESTAMP NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (id, measured_at),
+    CONSTRAINT unique_aqh_district_time UNIQUE (district_id, measured_at, is_forecast)
+) PARTITION BY RANGE (measured_at);
+
+CREATE TABLE air_quality_history_default PARTITION OF air_quality_history DEFAULT;
+
+CREATE INDEX idx_aqh_measured_at_brin ON air_quality_history USING BRIN (measured_at);
+
+CREATE INDEX idx_aqh_measurements_district_time
+    ON air_quality_history (district_id, measured_at)
+    INCLUDE (pm25, pm10, no2, so2, co, o3, aqi, temperature, humidity, pressure, wind_speed, wind_direction)
+    WHERE is_forecast = FALSE;
+
+CREATE INDEX idx_aqh_forecasts_district_time
+    ON air_quality_history (district_id, measured_at)
+    INCLUDE (pm25, pm10, no2, so2, co, o3, aqi)
+    WHERE is_forecast = TRUE;
+
+-- Створити місячні партиції для [p_from, p_to)
+-- Рядки цього місяця, що вже лежать у DEFAULT, не дали б створити партицію
+-- (CREATE ... PARTITION OF перевіряє, що в DEFAULT немає її діапазону), тому
+-- вони тимчасово виносяться і після створення вставляються вже в нову партицію
+CREATE OR REPLACE FUNCTION create_air_quality_history_partitions(p_from DATE, p_to DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::date;
+    month_end DATE;
+    partition_name TEXT;
+    moved INTEGER;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start < p_to LOOP
+        partition_name := format('air_quality_history_y%sm%s',
+                                 to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+        month_end := (month_start + INTERVAL '1 month')::date;
+        
+        IF to_regclass(partition_name) IS NULL THEN
+            moved := 0;
+            
+            IF to_regclass('air_quality_history_default') IS NOT NULL THEN
+                -- Нові рядки цього місяця не потраплять у DEFAULT до кінця транзакції
+                LOCK TABLE air_quality_history_default IN EXCLUSIVE MODE;
+                
+                IF EXISTS (
+                    SELECT 1 FROM air_quality_history_default
+                    WHERE measured_at >= month_start AND measured_at < month_end
+                ) THEN
+                    CREATE TEMP TABLE IF NOT EXISTS aqh_default_rows
+                        (LIKE air_quality_history) ON COMMIT DROP;
+                    TRUNCATE aqh_default_rows;
+                    
+                    -- DELETE/INSERT через батьківську таблицю: тригери
+                    -- air_quality_daily_stats перераховують зачеплені дні
+                    WITH deleted AS (
+                        DELETE FROM air_quality_history
+                        WHERE measured_at >= month_start AND measured_at < month_end
+                        RETURNING *
+                    )
+                    INSERT INTO aqh_default_rows SELECT * FROM deleted;
+                    GET DIAGNOSTICS moved = ROW_COUNT;
+                END IF;
+            END IF;
+            
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF air_quality_history FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end
+            );
+            
+            IF moved > 0 THEN
+                INSERT INTO air_quality_history SELECT * FROM aqh_default_rows;
+                RAISE NOTICE 'Партиція %: перенесено % рядків з DEFAULT', partition_name, moved;
+            END IF;
+            
+            created := created + 1;
+        END IF;
+        
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Видалити партиції, які повністю старші за p_keep_months місяців
+CREATE OR REPLACE FUNCTION drop_old_air_quality_history_partitions(p_keep_months INTEGER)
+RETURNS INTEGER AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => p_keep_months))::date;
+    part RECORD;
+    dropped INTEGER := 0;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'air_quality_history'::regclass
+          AND c.relname ~ '^air_quality_history_y[0-9]{4}m[0-9]{2}$'
+          AND to_date(substring(c.relname FROM 'y([0-9]{4}m[0-9]{2})$'), 'YYYY"m"MM') < cutoff
+    LOOP
+        EXECUTE format('ALTER TABLE air_quality_history DETACH PARTITION %I', part.relname);
+        EXECUTE format('DROP TABLE %I', part.relname);
+        dropped := dropped + 1;
+    END LOOP;
+    
+    -- DROP не викликає DELETE-тригери, тому агрегати чистимо явно
+    DELETE FROM air_quality_daily_stats WHERE day < cutoff;
+    
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Партиції: поточний місяць + рік наперед
+SELECT create_air_quality_history_partitions(
+    date_trunc('month', CURRENT_DATE)::date,
+    (date_trunc('month', CURRENT_DATE) + INTERVAL '12 months')::date
 );
 
-CREATE INDEX idx_aqi_district ON air_quality_history(district_id);
-CREATE INDEX idx_aqi_measured_at ON air_quality_history(measured_at DESC);
-CREATE INDEX idx_aqi_district_time ON air_quality_history(district_id, measured_at DESC);
-CREATE INDEX idx_aqi_status ON air_quality_history(aqi_status);
-CREATE INDEX idx_aqi_forecast ON air_quality_history(is_forecast, measured_at);
+-- ================================================
+-- 3.1. Щоденні агрегати якості повітря (для статистики)
+-- ================================================
+-- Кількість годин доби, позначених у 24-бітній масці
+CREATE OR REPLACE FUNCTION hours_in_mask(mask INTEGER)
+RETURNS INTEGER AS $$
+    SELECT COUNT(*)::INTEGER
+    FROM generate_series(0, 23) AS h
+    WHERE (mask >> h) & 1 = 1;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE TABLE air_quality_daily_stats (
+    district_id INTEGER NOT NULL REFERENCES districts(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    
+    record_count INTEGER NOT NULL DEFAULT 0,
+    
+    pm25_count INTEGER NOT NULL DEFAULT 0,
+    pm25_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    pm25_min DECIMAL(10, 2),
+    pm25_max DECIMAL(10, 2),
+    
+    aqi_sum BIGINT NOT NULL DEFAULT 0,
+    aqi_min INTEGER,
+    aqi_max INTEGER,
+    
+    -- Покриття: біт N = є хоча б одне вимірювання за годину N
+    hours_mask INTEGER NOT NULL DEFAULT 0,
+    hours_covered INTEGER GENERATED ALWAYS AS (hours_in_mask(hours_mask)) STORED,
+    
+    first_measured_at TIMESTAMP,
+    last_measured_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    PRIMARY KEY (district_id, day)
+);
+
+-- Повний перерахунок агрегатів для набору (район, день)
+CREATE OR REPLACE FUNCTION recompute_air_quality_daily_stats(p_district_ids INTEGER[], p_days DATE[])
+RETURNS void AS $$
+BEGIN
+    DELETE FROM air_quality_daily_stats s
+    USING unnest(p_district_ids, p_days) AS k(district_id, day)
+    WHERE s.district_id = k.district_id AND s.day = k.day;
+    
+    INSERT INTO air_quality_daily_stats (
+        district_id, day, record_count,
+        pm25_count, pm25_sum, pm25_min, pm25_max,
+        aqi_sum, aqi_min, aqi_max,
+        hours_mask, first_measured_at, last_measured_at
+    )
+    SELECT
+        h.district_id,
+        h.measured_at::date,
+        COUNT(*),
+        COUNT(h.pm25),
+        COALESCE(SUM(h.pm25), 0),
+        MIN(h.pm25),
+        MAX(h.pm25),
+        SUM(h.aqi),
+        MIN(h.aqi),
+        MAX(h.aqi),
+        bit_or(1 << EXTRACT(HOUR FROM h.measured_at)::INTEGER),
+        MIN(h.measured_at),
+        MAX(h.measured_at)
+    FROM air_quality_history h
+    JOIN (
+        SELECT DISTINCT district_id, day
+        FROM unnest(p_district_ids, p_days) AS k(district_id, day)
+    ) k ON h.district_id = k.district_id
+       AND h.measured_at >= k.day
+       AND h.measured_at < k.day + 1
+    WHERE h.is_forecast = FALSE
+    GROUP BY h.district_id, h.measured_at::date;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Вставка: інкрементально додаємо агрегати нових рядків
+CREATE OR REPLACE FUNCTION air_quality_daily_stats_on_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO air_quality_daily_stats AS s (
+        district_id, day, record_count,
+        pm25_count, pm25_sum, pm25_min, pm25_max,
+        aqi_sum, aqi_min, aqi_max,
+        hours_mask, first_measured_at, last_measured_at
+    )
+    SELECT
+        district_id,
+        measured_at::date,
+        COUNT(*),
+        COUNT(pm25),
+        COALESCE(SUM(pm25), 0),
+        MIN(pm25),
+        MAX(pm25),
+        SUM(aqi),
+        MIN(aqi),
+        MAX(aqi),
+        bit_or(1 << EXTRACT(HOUR FROM measured_at)::INTEGER),
+        MIN(measured_at),
+        MAX(measured_at)
+    FROM new_rows
+    WHERE is_forecast = FALSE AND district_id IS NOT NULL
+    GROUP BY district_id, measured_at::date
+    ON CONFLICT (district_id, day) DO UPDATE SET
+        record_count = s.record_count + EXCLUDED.record_count,
+        pm25_count = s.pm25_count + EXCLUDED.pm25_count,
+        pm25_sum = s.pm25_sum + EXCLUDED.pm25_sum,
+        pm25_min = LEAST(s.pm25_min, EXCLUDED.pm25_min),
+        pm25_max = GREATEST(s.pm25_max, EXCLUDED.pm25_max),
+        aqi_sum = s.aqi_sum + EXCLUDED.aqi_sum,
+        aqi_min = LEAST(s.aqi_min, EXCLUDED.aqi_min),
+        aqi_max = GREATEST(s.aqi_max, EXCLUDED.aqi_max),
+        hours_mask = s.hours_mask | EXCLUDED.hours_mask,
+        first_measured_at = LEAST(s.first_measured_at, EXCLUDED.first_measured_at),
+        last_measured_at = GREATEST(s.last_measured_at, EXCLUDED.last_measured_at),
+        updated_at = CURRENT_TIMESTAMP;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Видалення: min/max не можна відняти, тому перераховуємо зачеплені дні
+CREATE OR REPLACE FUNCTION air_quality_daily_stats_on_delete()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM recompute_air_quality_daily_stats(
+        array_agg(district_id), array_agg(day)
+    )
+    FROM (
+        SELECT DISTINCT district_id, measured_at::date AS day
+        FROM old_rows
+        WHERE is_forecast = FALSE AND district_id IS NOT NULL
+    ) affected
+    HAVING COUNT(*) > 0;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Оновлення: перераховуємо дні і до, і після зміни
+CREATE OR REPLACE FUNCTION air_quality_daily_stats_on_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM recompute_air_quality_daily_stats(
+        array_agg(district_id), array_agg(day)
+    )
+    FROM (
+        SELECT district_id, measured_at::date AS day FROM old_rows
+        WHERE district_id IS NOT NULL
+        UNION
+        SELECT district_id, measured_at::date AS day FROM new_rows
+        WHERE district_id IS NOT NULL
+    ) affected
+    HAVING COUNT(*) > 0;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER air_quality_daily_stats_insert
+    AFTER INSERT ON air_quality_history
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION air_quality_daily_stats_on_insert();
+
+CREATE TRIGGER air_quality_daily_stats_delete
+    AFTER DELETE ON air_quality_history
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION air_quality_daily_stats_on_delete();
+
+CREATE TRIGGER air_quality_daily_stats_update
+    AFTER UPDATE ON air_quality_history
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION air_quality_daily_stats_on_update();
+
+-- ================================================
+-- 3.2. Запуски прогнозів (окремо від реальних вимірювань)
+-- ================================================
+CREATE TABLE forecast_runs (
+    id BIGSERIAL PRIMARY KEY,
+    district_id INTEGER NOT NULL REFERENCES districts(id) ON DELETE CASCADE,
+    
+    issued_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    base_time TIMESTAMP NOT NULL,  -- остання реальна точка, від якої рахується горизонт
+    horizon_hours SMALLINT NOT NULL CHECK (horizon_hours > 0),
+    model_type VARCHAR(50) NOT NULL,
+    
+    pm25 REAL[] NOT NULL,
+    pm10 REAL[] NOT NULL,
+    no2 REAL[] NOT NULL,
+    so2 REAL[] NOT NULL,
+    co REAL[] NOT NULL,
+    o3 REAL[] NOT NULL,
+    aqi SMALLINT[] NOT NULL,
+    
+    CONSTRAINT unique_forecast_run UNIQUE (district_id, issued_at),
+    CONSTRAINT forecast_run_lengths CHECK (
+        cardinality(pm25) = horizon_hours AND cardinality(pm10) = horizon_hours AND
+        cardinality(no2) = horizon_hours AND cardinality(so2) = horizon_hours AND
+        cardinality(co) = horizon_hours AND cardinality(o3) = horizon_hours AND
+        cardinality(aqi) = horizon_hours
+    )
+);
+
+CREATE INDEX idx_forecast_runs_issued ON forecast_runs(issued_at);
 
 -- ================================================
 -- 4. Таблиця підписок користувачів на райони
@@ -219,6 +540,39 @@ LEFT JOIN air_quality_history aqh ON d.id = aqh.district_id
 WHERE aqh.is_forecast = FALSE
 ORDER BY d.id, aqh.measured_at DESC;
 
+-- Розгорнуті прогнози: (район, issued_at, горизонт) → значення
+CREATE OR REPLACE VIEW forecast_points AS
+SELECT
+    r.id AS run_id,
+    r.district_id,
+    r.issued_at,
+    r.model_type,
+    p.horizon::INTEGER AS horizon,
+    r.base_time + p.horizon * INTERVAL '1 hour' AS measured_at,
+    p.pm25, p.pm10, p.no2, p.so2, p.co, p.o3,
+    p.aqi::INTEGER AS aqi,
+    CASE
+        WHEN p.aqi <= 50 THEN 'Good'
+        WHEN p.aqi <= 100 THEN 'Moderate'
+        WHEN p.aqi <= 150 THEN 'Unhealthy for Sensitive'
+        WHEN p.aqi <= 200 THEN 'Unhealthy'
+        WHEN p.aqi <= 300 THEN 'Very Unhealthy'
+        ELSE 'Hazardous'
+    END AS aqi_status
+FROM forecast_runs r
+CROSS JOIN LATERAL unnest(r.pm25, r.pm10, r.no2, r.so2, r.co, r.o3, r.aqi)
+    WITH ORDINALITY AS p(pm25, pm10, no2, so2, co, o3, aqi, horizon);
+
+-- Останній запуск прогнозу для кожного району (для API/frontend)
+CREATE OR REPLACE VIEW latest_forecast_points AS
+SELECT fp.*
+FROM forecast_points fp
+JOIN (
+    SELECT DISTINCT ON (district_id) id
+    FROM forecast_runs
+    ORDER BY district_id, issued_at DESC
+) latest ON latest.id = fp.run_id;
+
 CREATE OR REPLACE VIEW district_subscription_stats AS
 SELECT 
     d.id as district_id,
@@ -237,14 +591,16 @@ GROUP BY d.id, d.name;
 CREATE OR REPLACE FUNCTION cleanup_old_air_quality_data()
 RETURNS void AS $$
 BEGIN
-    DELETE FROM air_quality_history
-    WHERE measured_at < CURRENT_TIMESTAMP - INTERVAL '90 days'
-    AND is_forecast = FALSE;
+    -- Реальні вимірювання видаляються цілими партиціями (~90 днів)
+    PERFORM drop_old_air_quality_history_partitions(3);
     
     DELETE FROM air_quality_history
     WHERE measured_at < CURRENT_TIMESTAMP - INTERVAL '7 days'
     AND is_forecast = TRUE;
     
+    DELETE FROM forecast_runs
+    WHERE issued_at < CURRENT_TIMESTAMP - INTERVAL '30 days';
+    
     DELETE FROM notifications
     WHERE read_at IS NOT NULL
     AND read_at < CURRENT_TIMESTAMP - INTERVAL '30 days';
@@ -25,7 +25,8 @@ class AirQualityHistoryService {
         await query(
           `INSERT INTO air_quality_history 
            (district_id, aqi, aqi_status, pm25, pm10, no2, so2, co, o3, measured_at, data_source, is_forecast)
-           VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)`,
+           VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+           ON CONFLICT (district_id, measured_at, is_forecast) DO NOTHING`,
           [
             districtData.districtId,
             districtData.aqi,
@@ -45,7 +46,6 @@ class AirQualityHistoryService {
       
       console.log(`✅ Збережено дані для ${data.length} районів`);
       return { success: true, count: data.length };
-      await this.triggerMLCheck();
 
     } catch (error) {
       console.error('❌ Помилка збереження в історію:', error);
@@ -53,29 +53,6 @@ class AirQualityHistoryService {
     }
   }
 
-  async triggerMLCheck() {
-  try {
-    console.log('🤖 Запуск ML перевірки...');
-    
-    const response = await axios.post('http://localhost:5001/api/monitor/all', {
-      timeout: 30000
-    });
-    
-    if (response.data.success) {
-      const retrainedCount = response.data.results.filter(r => r.retrained).length;
-      
-      if (retrainedCount > 0) {
-        console.log(`🔄 Перенавчано ${retrainedCount} моделей`);
-      } else {
-        console.log('✅ Всі моделі працюють нормально');
-      }
-    }
-    
-  } catch (error) {
-    console.error('⚠️ ML перевірка недоступна:', error.message);
-  }
-}
-
   /**
    * Отримати історію для району (БЕЗ прогнозів!)
    */
@@ -187,13 +164,13 @@ class AirQualityHistoryService {
   }
 
   /**
-   * Отримати прогнози для району (тільки is_forecast = true)
+   * Отримати прогнози для району (з останнього запуску в forecast_runs)
    */
   async getDistrictForecasts(districtId, hours = 24) {
     try {
       const result = await query(
         `SELECT 
-          id,
+          run_id as id,
           aqi,
           aqi_status,
           pm25,
@@ -203,10 +180,9 @@ class AirQualityHistoryService {
           co,
           o3,
           measured_at,
-          confidence_level
-        FROM air_quality_history
+          NULL as confidence_level
+        FROM latest_forecast_points
         WHERE district_id = $1 
-          AND is_forecast = true
           AND measured_at >= NOW()
           AND measured_at <= NOW() + INTERVAL '${hours} hours'
         ORDER BY measured_at ASC`,
@@ -222,16 +198,16 @@ class AirQualityHistoryService {
   }
 
   /**
-   * Видалити старі прогнози (які вже в минулому)
+   * Видалити старі запуски прогнозів
+   * (минулі прогнози зберігаються daysToKeep днів для аналізу точності)
    */
-  async cleanOldForecasts() {
+  async cleanOldForecasts(daysToKeep = 30) {
     try {
       console.log('🧹 Очищення старих прогнозів...');
       
       const result = await query(
-        `DELETE FROM air_quality_history 
-         WHERE is_forecast = true 
-           AND measured_at < NOW()
+        `DELETE FROM forecast_runs 
+         WHERE issued_at < NOW() - INTERVAL '${parseInt(daysToKeep, 10)} days'
          RETURNING id`,
         []
       );
@@ -111,23 +111,47 @@ class MLService {
   }
 
   /**
-   * Протестувати ML модель
+   * Отримати стан фонової задачі ML сервісу
+   * @param {string} jobId - ID задачі
+   * @returns {Promise<Object>} job: { status, progress, message, result, error }
+   */
+  async getJob(jobId) {
+    const response = await axios.get(
+      `${this.baseURL}/api/jobs/${jobId}`,
+      { timeout: this.timeout }
+    );
+    return response.data.job;
+  }
+
+  /**
+   * Поставити фонову задачу, не чекаючи її завершення
+   * HTTP-запит клієнта не тримається відкритим на час задачі: клієнт отримує
+   * 202 з job_id і сам опитує стан (як /api/research/train-custom-model)
+   * @param {string} path - ендпоінт, що повертає 202 з job_id (або 200 з cached-результатом)
+   * @param {Object} body - тіло запиту
+   * @returns {Promise<{status: number, data: Object}>} відповідь ML сервісу
+   */
+  async startJob(path, body = {}) {
+    const response = await axios.post(
+      `${this.baseURL}${path}`,
+      body,
+      { timeout: this.timeout }
+    );
+
+    return { status: response.status, data: response.data };
+  }
+
+  /**
+   * Протестувати ML модель (фонова задача в ML сервісі)
+   * @returns {Promise<{status: number, data: Object}>} 202 з job_id або 200 з cached-результатом
    */
   async testModel(districtId, days = 30, testSize = 20) {
     try {
-      const response = await axios.post(
-        `${this.baseURL}/test-model`,
-        {
-          district_id: districtId,
-          days: days,
-          test_size: testSize
-        },
-        {
-          timeout: 120000 // 2 хвилини
-        }
-      );
-
-      return response.data;
+      return await this.startJob('/test-model', {
+        district_id: districtId,
+        days: days,
+        test_size: testSize
+      });
     } catch (error) {
       console.error('ML Service testModel error:', error.message);
       throw new Error('Failed to test ML model: ' + error.message);
@@ -9,6 +9,11 @@ import {
 import researchService from '../services/researchService';
 import { useTranslation } from 'react-i18next';
 
+const DATASET_EXTENSIONS = ['.csv', '.parquet', '.pq', '.feather', '.arrow'];
+const MAX_DATASET_MB = 500;
+const PREVIEW_BYTES = 256 * 1024;
+const ALGORITHM_IDS = ['xgboost', 'lstm', 'random_forest'];
+
 const ResearchPage = () => {
   const { t } = useTranslation();
 
@@ -26,11 +31,14 @@ const ResearchPage = () => {
     hiddenLayers: 3,
     neurons: [128, 64, 32],
     dropoutRate: 0.2,
+    lookback: 24,
     lagHours: 12,
     rollingWindow: 6
   });
+  const [compareAlgorithms, setCompareAlgorithms] = useState(false);
   const [training, setTraining] = useState(false);
   const [trainingProgress, setTrainingProgress] = useState(null);
+  const [cancelling, setCancelling] = useState(false);
   const [results, setResults] = useState(null);
 
   // Крок 1: Завантаження датасету
@@ -38,38 +46,60 @@ const ResearchPage = () => {
     const file = event.target.files[0];
     if (!file) return;
 
-    if (file.type !== 'text/csv') {
+    const extension = file.name.slice(file.name.lastIndexOf('.')).toLowerCase();
+    if (!DATASET_EXTENSIONS.includes(extension)) {
       alert(t('research.errorFileType'));
       return;
     }
 
-    if (file.size > 50 * 1024 * 1024) {
+    if (file.size > MAX_DATASET_MB * 1024 * 1024) {
       alert(t('research.errorFileSize'));
       return;
     }
 
     setDataset(file);
 
+    // Parquet/Feather - бінарні, попередній перегляд лише для CSV
+    if (extension !== '.csv') {
+      setDatasetInfo({
+        fileName: file.name,
+        fileSize: (file.size / 1024).toFixed(2) + ' KB',
+        headers: [],
+        preview: [],
+        rowCount: '—'
+      });
+      setCurrentStep(2);
+      return;
+    }
+
+    // Для перегляду досить початку файлу - великий CSV не читається в пам'ять браузера повністю
+    const head = file.slice(0, PREVIEW_BYTES);
     const reader = new FileReader();
     reader.onload = (e) => {
       const text = e.target.result;
-      const lines = text.split('\n').slice(0, 6);
+      const lines = text.split('\n');
       const headers = lines[0].split(',').map(h => h.trim());
-      const preview = lines.slice(1).map(line =>
+      const preview = lines.slice(1, 6).map(line =>
         line.split(',').map(cell => cell.trim())
       );
 
+      // Якщо прочитано лише початок - оцінка кількості рядків за середньою довжиною рядка
+      const isPartial = file.size > PREVIEW_BYTES;
+      const rowCount = isPartial
+        ? '~' + Math.round((file.size / head.size) * (lines.length - 2))
+        : lines.filter(line => line.trim()).length - 1;
+
       setDatasetInfo({
         fileName: file.name,
         fileSize: (file.size / 1024).toFixed(2) + ' KB',
         headers,
         preview,
-        rowCount: text.split('\n').length - 1
+        rowCount
       });
 
       setCurrentStep(2);
     };
-    reader.readAsText(file);
+    reader.readAsText(head);
   };
 
   // Крок 2: Налаштування моделі
@@ -91,19 +121,37 @@ const ResearchPage = () => {
     }
 
     setTraining(true);
+    setCancelling(false);
     setCurrentStep(3);
-    setTrainingProgress({
-      epoch: 0,
-      total: modelConfig.epochs,
-      loss: null,
-      valLoss: null
-    });
+    setTrainingProgress(null);
 
     try {
       console.log('🚀', t('research.consoleStartTraining'));
-      const response = await researchService.trainCustomModel(dataset, modelConfig);
+      // Режим порівняння: дані готуються один раз, алгоритми навчаються паралельно
+      const config = compareAlgorithms
+        ? { ...modelConfig, algorithms: ALGORITHM_IDS }
+        : modelConfig;
+      const response = await researchService.trainCustomModel(dataset, config, job => {
+        setTrainingProgress(prev => ({
+          progress: job.progress ?? 0,
+          message: job.message,
+          algorithm: job.details?.algorithm ?? prev?.algorithm ?? null,
+          step: job.details?.step ?? prev?.step ?? null,
+          total: job.details?.total ?? prev?.total ?? null,
+          loss: job.details?.loss ?? null,
+          valLoss: job.details?.val_loss ?? null,
+          eta: job.eta_seconds
+        }));
+      });
       console.log('✅', t('research.consoleResults'), response);
 
+      if (response.cancelled) {
+        setTraining(false);
+        setCurrentStep(2);
+        alert(t('research.trainingCancelled'));
+        return;
+      }
+
       if (response.success) {
         setTraining(false);
         setCurrentStep(4);
@@ -123,6 +171,25 @@ const ResearchPage = () => {
     }
   };
 
+  const handleCancelTraining = async () => {
+    setCancelling(true);
+    try {
+      await researchService.cancelTraining();
+    } catch (error) {
+      console.error('❌', t('research.consoleError'), error);
+      setCancelling(false);
+    }
+  };
+
+  const formatEta = (seconds) => {
+    if (seconds == null) return null;
+    const minutes = Math.floor(seconds / 60);
+    const rest = Math.round(seconds % 60);
+    return minutes > 0
+      ? `${minutes} ${t('research.timeMinShort')} ${rest} ${t('research.timeSecShort')}`
+      : `${rest} ${t('research.timeSecShort')}`;
+  };
+
   // Експорт звіту в TXT
   const handleExportReport = () => {
     if (!results) return;
@@ -132,7 +199,7 @@ const ResearchPage = () => {
     report += '='.repeat(70) + '\n\n';
 
     report += `Час тренування: ${results.trainingTime}\n`;
-    report += `Алгоритм: ${modelConfig.algorithm.toUpperCase()}\n`;
+    report += `Алгоритм: ${(results.algorithm || modelConfig.algorithm).toUpperCase()}\n`;
     report += `Датасет: ${results.datasetInfo.totalRows} рядків\n`;
     report += `Train/Test: ${results.datasetInfo.trainRows}/${results.datasetInfo.testRows}\n\n`;
 
@@ -361,7 +428,7 @@ const ResearchPage = () => {
               <div className="border-2 border-dashed border-indigo-300 rounded-xl p-12 text-center hover:border-indigo-500 transition-all bg-indigo-50/50">
                 <input
                   type="file"
-                  accept=".csv"
+                  accept={DATASET_EXTENSIONS.join(',')}
                   onChange={handleFileUpload}
                   className="hidden"
                   id="dataset-upload"
@@ -611,6 +678,22 @@ const ResearchPage = () => {
                     </label>
                   ))}
                 </div>
+                <label className="flex items-start gap-3 mt-4 cursor-pointer">
+                  <input
+                    type="checkbox"
+                    checked={compareAlgorithms}
+                    onChange={(e) => setCompareAlgorithms(e.target.checked)}
+                    className="mt-1"
+                  />
+                  <div>
+                    <div className="font-semibold text-gray-800">
+                      {t('research.algorithmCompare')}
+                    </div>
+                    <div className="text-xs text-gray-600">
+                      {t('research.algorithmCompareDesc')}
+                    </div>
+                  </div>
+                </label>
               </div>
 
               {/* Гіперпараметри */}
@@ -724,6 +807,24 @@ const ResearchPage = () => {
                         className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-indigo-500"
                       />
                     </div>
+                    <div>
+                      <label className="block text-sm font-medium text-gray-700 mb-2">
+                        {t('research.lstmLookback')}
+                      </label>
+                      <input
+                        type="number"
+                        min="1"
+                        max="168"
+                        value={modelConfig.lookback}
+                        onChange={(e) =>
+                          handleConfigChange(
+                            'lookback',
+                            parseInt(e.target.value)
+                          )
+                        }
+                        className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-indigo-500"
+                      />
+                    </div>
                   </div>
 
                   <div className="mt-4">
@@ -847,10 +948,62 @@ const ResearchPage = () => {
             </p>
             <p className="text-center text-sm text-gray-500 mt-2">
               {t('research.trainingSubtitle', {
-                algo: modelConfig.algorithm.toUpperCase(),
+                algo: compareAlgorithms
+                  ? ALGORITHM_IDS.join(', ').toUpperCase()
+                  : modelConfig.algorithm.toUpperCase(),
                 epochs: modelConfig.epochs
               })}
             </p>
+
+            {trainingProgress && (
+              <div className="max-w-xl mx-auto mt-6">
+                <div className="w-full bg-gray-200 rounded-full h-3">
+                  <div
+                    className="bg-indigo-600 h-3 rounded-full transition-all"
+                    style={{ width: `${Math.round(trainingProgress.progress * 100)}%` }}
+                  />
+                </div>
+                <div className="flex justify-between text-sm text-gray-600 mt-2">
+                  <span>
+                    {trainingProgress.step
+                      ? t('research.trainingStep', {
+                          step: trainingProgress.step,
+                          total: trainingProgress.total
+                        })
+                      : trainingProgress.message}
+                    {trainingProgress.algorithm &&
+                      ` (${trainingProgress.algorithm.toUpperCase()})`}
+                  </span>
+                  <span>{Math.round(trainingProgress.progress * 100)}%</span>
+                </div>
+                {trainingProgress.loss != null && (
+                  <p className="text-center text-sm text-gray-500 mt-2">
+                    {t('research.trainingLoss', {
+                      loss: trainingProgress.loss.toFixed(4),
+                      valLoss:
+                        trainingProgress.valLoss != null
+                          ? trainingProgress.valLoss.toFixed(4)
+                          : '—'
+                    })}
+                  </p>
+                )}
+                {trainingProgress.eta != null && (
+                  <p className="text-center text-sm text-gray-500 mt-1">
+                    {t('research.trainingEta', { eta: formatEta(trainingProgress.eta) })}
+                  </p>
+                )}
+              </div>
+            )}
+
+            <div className="flex justify-center mt-6">
+              <button
+                onClick={handleCancelTraining}
+                disabled={!trainingProgress || cancelling}
+                className="px-6 py-2 border-2 border-red-300 text-red-600 rounded-lg font-semibold hover:bg-red-50 transition-all disabled:opacity-50 disabled:cursor-not-allowed"
+              >
+                {cancelling ? t('research.btnCancelling') : t('research.btnCancelTraining')}
+              </button>
+            </div>
           </div>
         )}
 
@@ -893,11 +1046,56 @@ const ResearchPage = () => {
                     {t('research.resultsAlgorithm')}
                   </div>
                   <div className="text-xl font-bold text-indigo-600">
-                    {modelConfig.algorithm.toUpperCase()}
+                    {(results.algorithm || modelConfig.algorithm).toUpperCase()}
                   </div>
                 </div>
               </div>
 
+              {results.leaderboard && (
+                <>
+                  <h3 className="font-bold text-gray-700 mb-4">
+                    {t('research.leaderboardTitle')}
+                  </h3>
+                  <div className="overflow-x-auto mb-8">
+                    <table className="w-full text-sm">
+                      <thead>
+                        <tr className="text-left text-gray-600 border-b">
+                          <th className="py-2 pr-4">#</th>
+                          <th className="py-2 pr-4">{t('research.resultsAlgorithm')}</th>
+                          <th className="py-2 pr-4">{t('research.metricsMae')}</th>
+                          <th className="py-2 pr-4">{t('research.metricsRmse')}</th>
+                          <th className="py-2 pr-4">R²</th>
+                          <th className="py-2 pr-4">{t('research.resultsTrainTime')}</th>
+                        </tr>
+                      </thead>
+                      <tbody>
+                        {results.leaderboard.map(entry => (
+                          <tr
+                            key={entry.algorithm}
+                            className={`border-b ${entry.rank === 1 ? 'bg-green-50 font-semibold' : ''}`}
+                          >
+                            <td className="py-2 pr-4">{entry.rank}</td>
+                            <td className="py-2 pr-4">{entry.algorithm.toUpperCase()}</td>
+                            {entry.success ? (
+                              <>
+                                <td className="py-2 pr-4">{entry.mae}</td>
+                                <td className="py-2 pr-4">{entry.rmse}</td>
+                                <td className="py-2 pr-4">{entry.r2}</td>
+                                <td className="py-2 pr-4">{formatTrainingTime(entry.trainingTime)}</td>
+                              </>
+                            ) : (
+                              <td colSpan={4} className="py-2 pr-4 text-red-600">
+                                {t('research.leaderboardFailed')}: {entry.error}
+                              </td>
+                            )}
+                          </tr>
+                        ))}
+                      </tbody>
+                    </table>
+                  </div>
+                </>
+              )}
+
               <h3 className="font-bold text-gray-700 mb-4">
                 {t('research.metricsTitle')}
               </h3>
@@ -958,7 +1156,7 @@ const ResearchPage = () => {
                         {t('research.plotActualVsPred')}
                       </h4>
                       <img
-                        src={`data:image/png;base64,${results.plots.actual_vs_predicted}`}
+                        src={researchService.plotUrl(results.plots.actual_vs_predicted)}
                         alt="Actual vs Predicted"
                         className="w-full rounded-lg border border-gray-200"
                       />
@@ -971,7 +1169,7 @@ const ResearchPage = () => {
                         {t('research.plotCorrelation')}
                       </h4>
                       <img
-                        src={`data:image/png;base64,${results.plots.scatter_plots}`}
+                        src={researchService.plotUrl(results.plots.scatter_plots)}
                         alt="Scatter Plots"
                         className="w-full rounded-lg border border-gray-200"
                       />
@@ -984,7 +1182,7 @@ const ResearchPage = () => {
                         {t('research.plotResiduals')}
                       </h4>
                       <img
-                        src={`data:image/png;base64,${results.plots.residuals}`}
+                        src={researchService.plotUrl(results.plots.residuals)}
                         alt="Residuals"
                         className="w-full rounded-lg border border-gray-200"
                       />
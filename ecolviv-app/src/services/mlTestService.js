@@ -5,6 +5,8 @@ import api from './api';
 const mlTestService = {
   /**
    * Запустити тест ML моделі
+   * Тест іде у фоні: сервер одразу повертає job_id, результат - після опитування
+   * (або одразу, якщо він уже є в кеші ML сервісу)
    */
   runTest: async (districtId, days = 30, testSize = 20) => {
     try {
@@ -13,13 +15,33 @@ const mlTestService = {
         days,
         testSize
       });
-      return response.data;
+
+      if (response.data.cached) {
+        return response.data.result;
+      }
+      return await mlTestService.waitForJob(response.data.job_id);
     } catch (error) {
       console.error('Error running test:', error);
       throw error;
     }
   },
 
+  /**
+   * Опитувати стан тесту до завершення
+   */
+  waitForJob: async (jobId, intervalMs = 2000) => {
+    for (;;) {
+      const response = await api.get(`/ml-test/jobs/${jobId}`);
+      const job = response.data.job;
+
+      if (job.status === 'succeeded' || job.status === 'failed' || job.status === 'cancelled') {
+        return job.result || { success: false, error: job.error };
+      }
+
+      await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+  },
+
   /**
    * Отримати інформацію про доступні дані
    */
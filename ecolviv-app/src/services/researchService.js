@@ -6,8 +6,10 @@ const API_URL = 'http://localhost:5000/api/research';
 class ResearchService {
   /**
    * Тренування custom моделі
+   * Навчання йде у фоні на ML-сервісі; onProgress(job) викликається при кожному
+   * опитуванні стану (job.progress, job.details.step/total/loss/val_loss, job.eta_seconds)
    */
-  async trainCustomModel(file, config) {
+  async trainCustomModel(file, config, onProgress = null) {
     try {
       const formData = new FormData();
       formData.append('dataset', file);
@@ -21,20 +23,62 @@ class ResearchService {
         headers: {
           'Content-Type': 'multipart/form-data'
         },
-        timeout: 600000, // 10 хвилин
+        timeout: 120000,
         onUploadProgress: (progressEvent) => {
           const percentCompleted = Math.round((progressEvent.loaded * 100) / progressEvent.total);
           console.log(`Upload progress: ${percentCompleted}%`);
         }
       });
 
-      return response.data;
+      this.currentJobId = response.data.job_id;
+      return await this.waitForJob(response.data.job_id, onProgress);
     } catch (error) {
       console.error('❌ Помилка тренування:', error);
       throw error;
+    } finally {
+      this.currentJobId = null;
     }
   }
 
+  /**
+   * Опитувати стан задачі навчання до завершення
+   */
+  async waitForJob(jobId, onProgress = null, intervalMs = 1000) {
+    for (;;) {
+      const response = await axios.get(`${API_URL}/jobs/${jobId}`);
+      const job = response.data.job;
+
+      if (onProgress) {
+        onProgress(job);
+      }
+
+      if (job.status === 'succeeded' || job.status === 'failed') {
+        return job.result || { success: false, error: job.error };
+      }
+      if (job.status === 'cancelled') {
+        return { success: false, cancelled: true, error: job.error };
+      }
+
+      await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+  }
+
+  /**
+   * Скасувати поточне навчання
+   */
+  async cancelTraining() {
+    if (!this.currentJobId) return null;
+    const response = await axios.post(`${API_URL}/jobs/${this.currentJobId}/cancel`);
+    return response.data;
+  }
+
+  /**
+   * URL PNG-графіка з результату навчання (results.plots.* - шлях відносно API)
+   */
+  plotUrl(path) {
+    return `${API_URL}/${path}`;
+  }
+
   /**
    * Завантажити шаблон CSV
    */
@@ -3,148 +3,32 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from config import Config
 from utils.db_helper import DatabaseHelper
+from utils.aqi import calculate_aqi_from_pm25, get_aqi_status
+from utils.forecasting import build_district_forecast, forecast_all_districts
+from utils.job_manager import get_job_manager
+from utils.pipeline import build_scheduler
+from utils.serialization import OrjsonProvider, columns_to_records
+from utils.result_cache import get_test_model_cache
+import os
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 import traceback
 from routes.research import research_bp
+from routes.jobs import jobs_bp, job_accepted
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+app.config['MAX_CONTENT_LENGTH'] = Config.RESEARCH_MAX_UPLOAD_MB * 1024 * 1024
 CORS(app)
 
 db = DatabaseHelper()
+jobs = get_job_manager()
+scheduler = build_scheduler(db)
 
 # Реєстрація blueprint
 app.register_blueprint(research_bp, url_prefix='/api/research')
-
-# ==================== HELPER FUNCTIONS ====================
-
-def linear_interpolation(value, c_low, c_high, aqi_low, aqi_high):
-    """Лінійна інтерполяція для розрахунку AQI"""
-    return ((aqi_high - aqi_low) / (c_high - c_low)) * (value - c_low) + aqi_low
-
-def calculate_aqi_from_pm25(pm25):
-    """Розрахунок AQI з PM2.5 (μg/m³)"""
-    if pm25 <= 12.0:
-        return linear_interpolation(pm25, 0, 12.0, 0, 50)
-    elif pm25 <= 35.4:
-        return linear_interpolation(pm25, 12.1, 35.4, 51, 100)
-    elif pm25 <= 55.4:
-        return linear_interpolation(pm25, 35.5, 55.4, 101, 150)
-    elif pm25 <= 150.4:
-        return linear_interpolation(pm25, 55.5, 150.4, 151, 200)
-    elif pm25 <= 250.4:
-        return linear_interpolation(pm25, 150.5, 250.4, 201, 300)
-    else:
-        return linear_interpolation(pm25, 250.5, 500.4, 301, 500)
-
-def calculate_aqi_from_pm10(pm10):
-    """Розрахунок AQI з PM10 (μg/m³)"""
-    if pm10 <= 54:
-        return linear_interpolation(pm10, 0, 54, 0, 50)
-    elif pm10 <= 154:
-        return linear_interpolation(pm10, 55, 154, 51, 100)
-    elif pm10 <= 254:
-        return linear_interpolation(pm10, 155, 254, 101, 150)
-    elif pm10 <= 354:
-        return linear_interpolation(pm10, 255, 354, 151, 200)
-    elif pm10 <= 424:
-        return linear_interpolation(pm10, 355, 424, 201, 300)
-    else:
-        return linear_interpolation(pm10, 425, 604, 301, 500)
-
-def calculate_aqi_from_no2(no2):
-    """Розрахунок AQI з NO2 (μg/m³)"""
-    no2_ppb = no2 / 1.88
-    
-    if no2_ppb <= 53:
-        return linear_interpolation(no2_ppb, 0, 53, 0, 50)
-    elif no2_ppb <= 100:
-        return linear_interpolation(no2_ppb, 54, 100, 51, 100)
-    elif no2_ppb <= 360:
-        return linear_interpolation(no2_ppb, 101, 360, 101, 150)
-    elif no2_ppb <= 649:
-        return linear_interpolation(no2_ppb, 361, 649, 151, 200)
-    elif no2_ppb <= 1249:
-        return linear_interpolation(no2_ppb, 650, 1249, 201, 300)
-    else:
-        return linear_interpolation(no2_ppb, 1250, 2049, 301, 500)
-
-def calculate_aqi_from_so2(so2):
-    """Розрахунок AQI з SO2 (μg/m³)"""
-    so2_ppb = so2 / 2.62
-    
-    if so2_ppb <= 35:
-        return linear_interpolation(so2_ppb, 0, 35, 0, 50)
-    elif so2_ppb <= 75:
-        return linear_interpolation(so2_ppb, 36, 75, 51, 100)
-    elif so2_ppb <= 185:
-        return linear_interpolation(so2_ppb, 76, 185, 101, 150)
-    elif so2_ppb <= 304:
-        return linear_interpolation(so2_ppb, 186, 304, 151, 200)
-    elif so2_ppb <= 604:
-        return linear_interpolation(so2_ppb, 305, 604, 201, 300)
-    else:
-        return linear_interpolation(so2_ppb, 605, 1004, 301, 500)
-
-def calculate_aqi_from_co(co):
-    """Розрахунок AQI з CO (μg/m³)"""
-    co_ppm = co / 1150
-    
-    if co_ppm <= 4.4:
-        return linear_interpolation(co_ppm, 0, 4.4, 0, 50)
-    elif co_ppm <= 9.4:
-        return linear_interpolation(co_ppm, 4.5, 9.4, 51, 100)
-    elif co_ppm <= 12.4:
-        return linear_interpolation(co_ppm, 9.5, 12.4, 101, 150)
-    elif co_ppm <= 15.4:
-        return linear_interpolation(co_ppm, 12.5, 15.4, 151, 200)
-    elif co_ppm <= 30.4:
-        return linear_interpolation(co_ppm, 15.5, 30.4, 201, 300)
-    else:
-        return linear_interpolation(co_ppm, 30.5, 50.4, 301, 500)
-
-def calculate_aqi_from_o3(o3):
-    """Розрахунок AQI з O3 (μg/m³)"""
-    o3_ppb = o3 / 2.0
-    
-    if o3_ppb <= 54:
-        return linear_interpolation(o3_ppb, 0, 54, 0, 50)
-    elif o3_ppb <= 70:
-        return linear_interpolation(o3_ppb, 55, 70, 51, 100)
-    elif o3_ppb <= 85:
-        return linear_interpolation(o3_ppb, 71, 85, 101, 150)
-    elif o3_ppb <= 105:
-        return linear_interpolation(o3_ppb, 86, 105, 151, 200)
-    elif o3_ppb <= 200:
-        return linear_interpolation(o3_ppb, 106, 200, 201, 300)
-    else:
-        return 301
-
-def calculate_overall_aqi(pm25, pm10, no2, so2, co, o3):
-    """Розрахувати загальний AQI як максимум з усіх параметрів"""
-    aqis = {
-        'pm25': calculate_aqi_from_pm25(pm25),
-        'pm10': calculate_aqi_from_pm10(pm10),
-        'no2': calculate_aqi_from_no2(no2),
-        'so2': calculate_aqi_from_so2(so2),
-        'co': calculate_aqi_from_co(co),
-        'o3': calculate_aqi_from_o3(o3)
-    }
-    
-    max_aqi = max(aqis.values())
-    dominant = max(aqis, key=aqis.get)
-    
-    return int(max_aqi), dominant, aqis
-
-def get_aqi_status(aqi):
-    """Отримати статус якості повітря"""
-    if aqi <= 50: return 'Good'
-    elif aqi <= 100: return 'Moderate'
-    elif aqi <= 150: return 'Unhealthy for Sensitive'
-    elif aqi <= 200: return 'Unhealthy'
-    elif aqi <= 300: return 'Very Unhealthy'
-    else: return 'Hazardous'
+app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
 
 # ==================== API ENDPOINTS ====================
 
@@ -171,65 +55,14 @@ def predict_district(district_id):
         print(f"\n🔮 Прогноз для району {district_id} на {hours} годин...")
         
         df = db.get_training_data(district_id, days=2)
+        result, forecasts_df = build_district_forecast(district_id, hours, df)
         
-        if len(df) < 10:
-            return jsonify({
-                'success': False,
-                'error': f'Not enough historical data: {len(df)} records'
-            }), 400
-        
-        print(f"✅ Завантажено {len(df)} історичних записів")
-        
-        from models.simple_forecast_model import SimpleForecastModel
-        
-        simple_model = SimpleForecastModel(district_id)
-        recent_data = df[['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']].tail(24)
-        
-        if len(recent_data) < 5:
-            return jsonify({
-                'success': False,
-                'error': 'Not enough recent data for forecast'
-            }), 400
-        
-        print(f"🤖 Генерація прогнозу на {hours} годин...")
-        forecast_df = simple_model.predict(recent_data, hours=hours)
-        
-        forecasts = []
-        last_time = df['measured_at'].max()
+        if forecasts_df is None:
+            return jsonify(result), 400
         
-        for i, row in forecast_df.iterrows():
-            forecast_time = last_time + timedelta(hours=i+1)
-            
-            aqi, dominant, aqi_breakdown = calculate_overall_aqi(
-                row['pm25'], row['pm10'], row['no2'],
-                row['so2'], row['co'], row['o3']
-            )
-            
-            forecasts.append({
-                'measured_at': forecast_time.isoformat(),
-                'pm25': round(float(row['pm25']), 2),
-                'pm10': round(float(row['pm10']), 2),
-                'no2': round(float(row['no2']), 2),
-                'so2': round(float(row['so2']), 2),
-                'co': round(float(row['co']), 2),
-                'o3': round(float(row['o3']), 2),
-                'aqi': aqi,
-                'aqi_status': get_aqi_status(aqi),
-                'dominant_pollutant': dominant
-            })
-        
-        print(f"✅ Створено {len(forecasts)} прогнозів")
-        
-        forecasts_df = pd.DataFrame(forecasts)
         db.save_forecasts(district_id, forecasts_df)
         
-        return jsonify({
-            'success': True,
-            'district_id': district_id,
-            'hours': hours,
-            'model_type': 'persistence_trend',
-            'forecasts': forecasts
-        })
+        return jsonify(result)
         
     except Exception as e:
         print(f"❌ Помилка: {str(e)}")
@@ -241,34 +74,10 @@ def predict_all_districts():
     """Прогноз для всіх районів"""
     try:
         hours = request.args.get('hours', default=24, type=int)
-        results = []
+        if hours not in [12, 24, 48]:
+            hours = 24
         
-        for district in Config.DISTRICTS:
-            try:
-                response = predict_district(district['id'])
-                data = response.get_json()
-                
-                if data.get('success'):
-                    results.append({
-                        'district_id': district['id'],
-                        'district_name': district['name'],
-                        'success': True,
-                        'forecasts_count': len(data['forecasts'])
-                    })
-                else:
-                    results.append({
-                        'district_id': district['id'],
-                        'district_name': district['name'],
-                        'success': False,
-                        'error': data.get('error')
-                    })
-            except Exception as e:
-                results.append({
-                    'district_id': district['id'],
-                    'district_name': district['name'],
-                    'success': False,
-                    'error': str(e)
-                })
+        results = forecast_all_districts(db, hours)
         
         return jsonify({'success': True, 'results': results})
         
@@ -279,15 +88,31 @@ def predict_all_districts():
 def get_model_info(district_id):
     """Отримати інформацію про модель"""
     try:
+        from models.model_registry import get_model_registry
+        registry = get_model_registry()
         stats = db.get_data_stats(district_id)
+        bundle = registry.get(district_id)
         return jsonify({
             'success': True,
             'district_id': district_id,
-            'training_data': stats
+            'training_data': stats,
+            'model': bundle.info() if bundle else None,
+            'versions': registry.list_versions(district_id)
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/model/<int:district_id>/rollback', methods=['POST'])
+def rollback_model(district_id):
+    """Повернути одну з попередніх версій моделі"""
+    from models.model_registry import get_model_registry
+    version = (request.json or {}).get('version')
+    try:
+        get_model_registry().rollback(district_id, version)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'district_id': district_id, 'version': version})
+
 @app.route('/api/model/<int:district_id>/monitor', methods=['GET'])
 def monitor_model(district_id):
     """Перевірити якість моделі"""
@@ -296,39 +121,151 @@ def monitor_model(district_id):
     result = monitor.auto_retrain_if_needed(district_id)
     return jsonify({'success': True, 'result': result})
 
-@app.route('/api/model/<int:district_id>/retrain', methods=['POST'])
-def force_retrain(district_id):
-    """Примусово перенавчити модель"""
+@app.route('/api/model/<int:district_id>/accuracy', methods=['GET'])
+def model_accuracy_by_horizon(district_id):
+    """Точність прогнозів по горизонтах"""
     from utils.model_monitor import ModelMonitor
+    hours_back = request.args.get('hours_back', default=24 * 7, type=int)
     monitor = ModelMonitor()
-    result = monitor.retrain_model(district_id)
-    return jsonify(result)
+    result = monitor.check_accuracy_by_horizon(district_id, hours_back=hours_back)
+    return jsonify({'success': True, 'district_id': district_id, 'result': result})
+
+@app.route('/api/drift/update', methods=['POST'])
+def update_drift_detectors():
+    """Оновити онлайн-детектори дрейфу новими вимірюваннями"""
+    from utils.drift_detectors import get_drift_monitor
+    try:
+        district_ids = [district['id'] for district in Config.DISTRICTS]
+        summary = get_drift_monitor().update_from_db(db, district_ids)
+        return jsonify({'success': True, 'results': summary})
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/drift/<int:district_id>', methods=['GET'])
+def drift_status(district_id):
+    """Стан детекторів дрейфу району"""
+    from utils.drift_detectors import get_drift_monitor
+    return jsonify({
+        'success': True,
+        'district_id': district_id,
+        'drift': get_drift_monitor().status(district_id)
+    })
+
+@app.route('/api/scheduler', methods=['GET'])
+def scheduler_status():
+    """Стан планувальника та час етапів конвеєра"""
+    return jsonify({'success': True, 'scheduler': scheduler.status()})
+
+@app.route('/api/scheduler/<name>/run', methods=['POST'])
+def run_scheduled_job(name):
+    """Запустити задачу планувальника позачергово"""
+    try:
+        started = scheduler.trigger(name)
+    except KeyError:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    
+    if not started:
+        return jsonify({'success': False, 'error': 'Job is already running'}), 409
+    return jsonify({'success': True, 'job': name}), 202
+
+def retrain_job(job, district_id):
+    from utils.model_monitor import ModelMonitor
+    job.update(message=f'Перенавчання моделі району {district_id}')
+    return ModelMonitor().retrain_model(district_id)
+
+def monitor_all_job(job):
+    from utils.model_monitor import ModelMonitor
+    job.update(message='Перевірка всіх районів')
+    results = ModelMonitor().monitor_all([district['id'] for district in Config.DISTRICTS])
+    return {'success': True, 'results': results}
+
+@app.route('/api/model/<int:district_id>/retrain', methods=['POST'])
+def force_retrain(district_id):
+    """Примусово перенавчити модель (фонова задача)"""
+    job, created = jobs.submit(
+        'retrain', retrain_job, district_id,
+        key=f'retrain:{district_id}', params={'district_id': district_id}
+    )
+    return job_accepted(job, created)
 
 @app.route('/api/monitor/all', methods=['POST'])
 def monitor_all_districts():
-    """Перевірити та перенавчити всі моделі якщо потрібно"""
-    from utils.model_monitor import ModelMonitor
-    monitor = ModelMonitor()
-    results = []
+    """Перевірити та перенавчити всі моделі якщо потрібно (фонова задача)"""
+    job, created = jobs.submit('monitor_all', monitor_all_job, key='monitor_all')
+    return job_accepted(job, created)
+
+def backtest_job(job, district_id, days, options):
+    from models.backtester import WalkForwardBacktester
     
-    for district in Config.DISTRICTS:
-        result = monitor.auto_retrain_if_needed(district['id'])
-        results.append(result)
+    job.update(progress=0.05, message='Завантаження даних')
+    df = db.get_training_data(district_id, days=days)
     
-    return jsonify({'success': True, 'results': results})
+    job.update(progress=0.2, message='Навчання fold-ів')
+    return WalkForwardBacktester(district_id, **options).run(df)
 
-@app.route('/test-model', methods=['POST'])
-def test_model():
-    """Тестування ML моделі з детальною діагностикою на data leakage"""
-    try:
-        data = request.json
-        district_id = data.get('district_id')
-        days = data.get('days', 30)
+@app.route('/api/model/<int:district_id>/backtest', methods=['POST'])
+def backtest_model(district_id):
+    """Walk-forward бектест (фонова задача; продакшн-модель не змінюється)"""
+    data = request.json or {}
+    days = data.get('days', 30)
+    options = {
+        key: data[key]
+        for key in ('n_folds', 'test_size', 'purge', 'embargo', 'window', 'train_size', 'model_type')
+        if key in data
+    }
+    
+    job, created = jobs.submit(
+        'backtest', backtest_job, district_id, days, options,
+        key=f"backtest:{district_id}:{days}:{sorted(options.items())}",
+        params={'district_id': district_id, 'days': days, **options}
+    )
+    return job_accepted(job, created)
+
+_test_model_spec = None
+
+def test_model_spec():
+    """Версія features та конфігурації моделі, що тестується (частина ключа кешу)"""
+    global _test_model_spec
+    
+    if _test_model_spec is None:
+        from data.preprocessor import DataPreprocessor
+        from models.air_quality_model import AirQualityModel
         
+        params = AirQualityModel(0, model_type='xgboost').create_model().get_params(deep=True)
+        _test_model_spec = {
+            'feature_spec_version': DataPreprocessor.FEATURE_SPEC_VERSION,
+            'features': DataPreprocessor(0).get_feature_columns(),
+            'model_type': 'xgboost',
+            'model_params': {
+                name: value for name, value in sorted(params.items())
+                if value is None or isinstance(value, (bool, int, float, str))
+            }
+        }
+    return _test_model_spec
+
+def test_model_cache_key(district_id, days, last_measured_at, row_count):
+    """Ключ кешу /test-model; None якщо даних немає"""
+    if last_measured_at is None:
+        return None
+    return {
+        'district_id': int(district_id),
+        'days': int(days),
+        'spec': test_model_spec(),
+        'watermark': [int(pd.Timestamp(last_measured_at).timestamp()), int(row_count)]
+    }
+
+def run_model_test(job, district_id, days=30):
+    """
+    Тестування ML моделі з детальною діагностикою на data leakage
+    Виконується як фонова задача (див. POST /test-model)
+    """
+    try:
         print(f"\n{'='*70}")
         print(f"🧪 TIME SERIES ТЕСТУВАННЯ - Район {district_id}")
         print(f"{'='*70}")
         
+        job.update(progress=0.05, message='Завантаження даних')
         # 1. Завантажити дані
         print(f"\n1️⃣ Завантаження даних за {days} днів...")
         query = """
@@ -341,18 +278,22 @@ def test_model():
             ORDER BY measured_at
         """
         
-        conn = db.get_connection()
-        df = pd.read_sql_query(query, conn, params=(district_id, days))
-        conn.close()
+        df = db.copy_query_to_dataframe(
+            query, (district_id, days), parse_dates=['measured_at']
+        )
         
         if len(df) < 100:
-            return jsonify({
+            return {
                 'success': False,
                 'error': f'Недостатньо даних: {len(df)} записів (потрібно мінімум 100)'
-            }), 400
+            }
         
         print(f"✅ Завантажено {len(df)} записів")
         
+        # Версія саме тих даних, на яких рахується результат
+        cache_key = test_model_cache_key(district_id, days, df['measured_at'].max(), len(df))
+        
+        job.update(progress=0.15, message='Підготовка features')
         # 2. Підготовка features
         print("\n2️⃣ Підготовка features...")
         from data.preprocessor import DataPreprocessor
@@ -399,12 +340,16 @@ def test_model():
         print(f"✅ Train scaled: {X_train_scaled.shape}")
         print(f"✅ Test scaled: {X_test_scaled.shape}")
         
+        job.update(progress=0.3, message='Навчання моделі')
         # 5. Навчання моделі
         print("\n5️⃣ Навчання XGBoost моделі...")
         from models.air_quality_model import AirQualityModel
         
         model = AirQualityModel(district_id, model_type='xgboost')
-        train_score, val_score = model.train(X_train_scaled, y_train, X_test_scaled, y_test)
+        # Тест не публікує модель - продакшн-версія не змінюється
+        train_score, val_score = model.train(
+            X_train_scaled, y_train, X_test_scaled, y_test, scaler=scaler, save=False
+        )
         
         print(f"✅ Train R²: {train_score:.4f}, Test R²: {val_score:.4f}")
         
@@ -412,6 +357,7 @@ def test_model():
         print("\n6️⃣ Прогнозування на тестовій вибірці...")
         predictions = model.predict(X_test_scaled)
         
+        job.update(progress=0.6, message='Розрахунок метрик')
         # 7. Розрахунок метрик
         print("\n7️⃣ Розрахунок метрик...")
         
@@ -491,26 +437,26 @@ def test_model():
         
         print(f"   AQI: MAE={mae_aqi:.2f}, RMSE={rmse_aqi:.2f}, R²={r2_aqi:.4f}, Accuracy={accuracy_aqi:.1f}%")
         
+        job.update(progress=0.7, message='Підготовка даних для графіка')
         # 9. Підготовка даних для графіка
         print("\n9️⃣ Підготовка даних для графіка...")
         
-        comparison_data = []
+        # Стовпцями: округлення одним np.round на стовпець, без float() на кожне значення
+        actual_records = columns_to_records({
+            'aqi': aqi_actual,
+            **{param: y_test[:, i] for i, param in enumerate(parameters)}
+        })
+        predicted_records = columns_to_records({
+            'aqi': aqi_predicted,
+            **{param: predictions[:, i] for i, param in enumerate(parameters)}
+        })
         
-        for idx in range(len(test_df)):
-            row = test_df.iloc[idx]
-            
-            actual_dict = {'aqi': float(aqi_actual[idx])}
-            predicted_dict = {'aqi': float(aqi_predicted[idx])}
-            
-            for i, param in enumerate(parameters):
-                actual_dict[param] = float(y_test[idx, i])
-                predicted_dict[param] = float(predictions[idx, i])
-            
-            comparison_data.append({
-                'timestamp': row['measured_at'].isoformat(),
-                'actual': actual_dict,
-                'predicted': predicted_dict
-            })
+        comparison_data = [
+            {'timestamp': timestamp.isoformat(), 'actual': actual, 'predicted': predicted}
+            for timestamp, actual, predicted in zip(
+                test_df['measured_at'], actual_records, predicted_records
+            )
+        ]
         
         # DEBUG інформація про стрибок
         print("\n🔍 DEBUG - Перші 5 прогнозів (PM2.5):")
@@ -720,15 +666,6 @@ def test_model():
         
         print(f"{'='*70}\n")
         
-        # 10. Зберегти scaler
-        print("🔟 Збереження scaler...")
-        preprocessor.scaler = scaler
-        import joblib
-        import os
-        os.makedirs(Config.MODEL_PATH, exist_ok=True)
-        joblib.dump(scaler, preprocessor.scaler_path)
-        print(f"✅ Scaler збережено: {preprocessor.scaler_path}")
-        
         print(f"\n{'='*70}")
         print("✅ ТЕСТУВАННЯ ЗАВЕРШЕНО")
         print(f"{'='*70}\n")
@@ -744,13 +681,10 @@ def test_model():
             'test5_overfitting': bool(test5_passed),
             'total_passed': int(checks_passed),
             'total_tests': int(total_checks),
-            'top_features': [
-                {
-                    'feature': str(row['feature']),
-                    'importance': round(float(row['importance']), 4)
-                }
-                for _, row in importance_df.head(20).iterrows()
-            ]
+            'top_features': columns_to_records({
+                'feature': importance_df['feature'].head(20).astype(str).to_numpy(),
+                'importance': importance_df['importance'].head(20).to_numpy()
+            }, decimals=4)
         }
 
         # 🔍 ДЕТАЛЬНА ПЕРЕВІРКА АНОМАЛІЇ
@@ -919,16 +853,13 @@ def test_model():
             'total_passed': int(checks_passed),
             'total_tests': int(total_checks),
             'anomaly_analysis': anomaly_details,
-            'top_features': [
-                {
-                    'feature': str(row['feature']),
-                    'importance': round(float(row['importance']), 4)
-                }
-                for _, row in importance_df.head(20).iterrows()
-            ]
+            'top_features': columns_to_records({
+                'feature': importance_df['feature'].head(20).astype(str).to_numpy(),
+                'importance': importance_df['importance'].head(20).to_numpy()
+            }, decimals=4)
         }
         
-        return jsonify({
+        result = {
             'success': True,
             'district_id': district_id,
             'metrics': metrics,
@@ -945,41 +876,64 @@ def test_model():
                     'end': df['measured_at'].max().isoformat()
                 }
             }
-        })
-    
+        }
+        
+        get_test_model_cache().set(cache_key, result)
+        
+        return result
         
     except Exception as e:
         print(f"❌ Помилка тестування: {str(e)}")
         traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return {'success': False, 'error': str(e)}
+
+@app.route('/test-model', methods=['POST'])
+def test_model():
+    """
+    Запустити тестування моделі (фонова задача, результат - GET /api/jobs/<job_id>)
+    
+    Якщо з попереднього такого ж тесту нових даних не з'явилось - результат
+    одразу з кешу (200, cached=True). refresh=true - перерахувати примусово.
+    """
+    data = request.json or {}
+    district_id = data.get('district_id')
+    days = data.get('days', 30)
+    
+    if district_id is None:
+        return jsonify({'success': False, 'error': 'district_id is required'}), 400
+    
+    if not data.get('refresh'):
+        watermark = db.get_data_watermark(district_id, days)
+        cache_key = test_model_cache_key(district_id, days, *watermark) if watermark else None
+        cached = get_test_model_cache().get(cache_key) if cache_key else None
+        
+        if cached is not None:
+            print(f"⚡ /test-model району {district_id}: результат з кешу")
+            return jsonify({'success': True, 'cached': True, 'result': cached})
+    
+    job, created = jobs.submit(
+        'test_model', run_model_test, district_id, days,
+        key=f'test_model:{district_id}:{days}',
+        params={'district_id': district_id, 'days': days}
+    )
+    return job_accepted(job, created)
 
 @app.route('/test-data-info/<int:district_id>', methods=['GET'])
 def get_test_data_info(district_id):
     """Інформація про доступні дані для тестування"""
     try:
-        query = """
-            SELECT COUNT(*) as total_records,
-                   MIN(measured_at) as first_date,
-                   MAX(measured_at) as last_date,
-                   COUNT(DISTINCT DATE(measured_at)) as days_with_data
-            FROM air_quality_history
-            WHERE district_id = %s AND is_forecast = false
-        """
+        stats = db.get_data_stats(district_id)
         
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(query, (district_id,))
-        result = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        if stats is None:
+            return jsonify({'success': False, 'error': 'Failed to load data stats'}), 500
         
         return jsonify({
             'success': True,
             'district_id': district_id,
-            'total_records': result[0],
-            'first_date': result[1].isoformat() if result[1] else None,
-            'last_date': result[2].isoformat() if result[2] else None,
-            'days_with_data': result[3]
+            'total_records': stats['total_records'],
+            'first_date': stats['first_date'].isoformat() if stats['first_date'] else None,
+            'last_date': stats['last_date'].isoformat() if stats['last_date'] else None,
+            'days_with_data': stats['days_with_data']
         })
         
     except Exception as e:
@@ -1007,7 +961,7 @@ def test_scenario():
         if not model.load_model():
             return jsonify({
                 'success': False,
-                'error': 'Модель не натренована. Спочатку запустіть тест моделі.'
+                'error': 'Модель не натренована. Спочатку запустіть перенавчання моделі.'
             }), 400
         
         print("✅ Модель завантажена")
@@ -1023,9 +977,7 @@ def test_scenario():
             LIMIT 50
         """
         
-        conn = db.get_connection()
-        df_context = pd.read_sql_query(query, conn, params=(district_id,))
-        conn.close()
+        df_context = db.read_dataframe(query, params=(district_id,))
         
         if len(df_context) < 10:
             return jsonify({
@@ -1090,22 +1042,13 @@ def test_scenario():
         print("\n4️⃣ Підготовка features...")
         preprocessor = DataPreprocessor(district_id)
         
-        import os
-        import joblib
-        scaler_path = f"{Config.MODEL_PATH}/scaler_district_{district_id}.pkl"
-        
-        if not os.path.exists(scaler_path):
-            return jsonify({
-                'success': False,
-                'error': 'Scaler не знайдено. Спочатку запустіть тест моделі.'
-            }), 400
-        
-        preprocessor.scaler = joblib.load(scaler_path)
+        # Scaler з тієї ж версії, що й модель (None - модель навчалась без нормалізації)
+        preprocessor.scaler = model.scaler
         
         # Отримати назви колонок features
         feature_cols = preprocessor.get_feature_columns()
         
-        print(f"✅ Scaler завантажено")
+        print(f"✅ Версія моделі: {model.version}")
         
         # 5. ІТЕРАТИВНЕ прогнозування на наступні 12 годин
         print("\n5️⃣ ІТЕРАТИВНЕ прогнозування наступних 12 годин...")
@@ -1129,7 +1072,10 @@ def test_scenario():
             
             # 2. Взяти перший рядок (найсвіжіші дані)
             X_current = df_features[feature_cols].iloc[0:1].values
-            X_current_scaled = preprocessor.scaler.transform(X_current)
+            X_current_scaled = (
+                preprocessor.scaler.transform(X_current)
+                if preprocessor.scaler is not None else X_current
+            )
             
             # 3. Зробити прогноз
             prediction = model.predict(X_current_scaled)[0]
@@ -1142,8 +1088,7 @@ def test_scenario():
                 'hour': hour
             }
             
-            for i, param in enumerate(parameters):
-                forecast_dict[param] = round(float(prediction[i]), 2)
+            forecast_dict.update(zip(parameters, np.round(prediction.astype(np.float64), 2).tolist()))
             
             # Розрахувати AQI
             aqi = calculate_aqi_from_pm25(forecast_dict['pm25'])
@@ -1314,11 +1259,20 @@ if __name__ == '__main__':
     print(f"   GET  /api/predict/<district_id>?hours=24")
     print(f"   GET  /api/predict/all?hours=24")
     print(f"   GET  /api/model/<district_id>/info")
-    print(f"   POST /test-model")
+    print(f"   POST /api/model/<district_id>/retrain  (job)")
+    print(f"   POST /api/monitor/all                  (job)")
+    print(f"   POST /test-model                       (job)")
+    print(f"   POST /api/model/<district_id>/backtest (job)")
+    print(f"   GET  /api/jobs/<job_id>")
     print(f"   GET  /test-data-info/<district_id>")
     print(f"   POST /test-scenario")
+    print(f"   GET  /api/scheduler")
     print("=" * 60)
     
+    # У debug-режимі Flask перезапускає процес - планувальник лише в дочірньому
+    if Config.SCHEDULER_ENABLED and (not Config.FLASK_DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        scheduler.start()
+    
     app.run(
         host='0.0.0.0',
         port=Config.FLASK_PORT,
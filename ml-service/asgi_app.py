@@ -0,0 +1,40 @@
+# ml-service/asgi_app.py
+"""
+ASGI-застосунок асинхронних ендпоінтів /api/async/... (Quart)
+
+Запуск: uvicorn asgi_app:app --port 5002  (або python asgi_app.py)
+Синхронний API (app.py) працює окремим процесом на FLASK_PORT.
+"""
+
+from quart import Quart
+from config import Config
+from utils.serialization import OrjsonProvider
+from routes.async_api import async_bp, adb
+
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
+
+app.register_blueprint(async_bp, url_prefix='/api/async')
+
+
+@app.after_serving
+async def close_db_pool():
+    adb.close()
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("=" * 60)
+    print("🚀 ML SERVICE (ASYNC) ЗАПУЩЕНО")
+    print("=" * 60)
+    print(f"🌐 URL: http://localhost:{Config.ASYNC_PORT}")
+    print(f"📊 Endpoints:")
+    print(f"   GET  /api/async/predict/<district_id>?hours=24")
+    print(f"   GET  /api/async/predict/all?hours=24")
+    print(f"   GET  /api/async/model/<district_id>/info")
+    print(f"   GET  /api/async/model/info/all")
+    print(f"   GET  /api/async/latest?hours=24")
+    print("=" * 60)
+
+    uvicorn.run(app, host='0.0.0.0', port=Config.ASYNC_PORT)
@@ -33,6 +33,17 @@ def get_connection():
 
 
 def load_data():
+    # Parquet-дзеркало (sync_history_mirror.py) - без скану всієї таблиці в БД
+    from data.history_mirror import HistoryMirror
+    mirror = HistoryMirror()
+    if mirror.exists():
+        try:
+            mirror.refresh_if_stale()
+            print("Дані з Parquet-дзеркала історії.")
+            return mirror.load(columns=COLUMNS_FOR_CORR)
+        except Exception as e:
+            print(f"Не вдалося оновити Parquet-дзеркало ({e}) - дані з БД.")
+
     query = f"""
         SELECT {DISTRICT_COLUMN}, {', '.join(COLUMNS_FOR_CORR)}
         FROM {TABLE_NAME}
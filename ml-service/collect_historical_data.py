@@ -1,10 +1,12 @@
 # ml-service/collect_historical_data.py
 import requests
 import psycopg2
+from psycopg2.extras import execute_values
 from datetime import datetime, timedelta
 import time
 import os
 from dotenv import load_dotenv
+from utils.aqi import calculate_overall_aqi, get_aqi_status
 
 load_dotenv()
 
@@ -28,6 +30,9 @@ DISTRICTS = [
     {'id': 6, 'name': 'Сихівський', 'lat': 49.8025, 'lon': 23.9815}
 ]
 
+# Скільки записів вставляти одним INSERT
+INSERT_BATCH_SIZE = 500
+
 def get_historical_air_pollution(lat, lon, start_timestamp, end_timestamp):
     """
     Отримати історичні дані про забруднення повітря
@@ -50,59 +55,127 @@ def get_historical_air_pollution(lat, lon, start_timestamp, end_timestamp):
         print(f"❌ Помилка запиту: {e}")
         return None
 
-def save_to_database(district_id, data_list):
-    """Зберегти дані в БД"""
-    conn = psycopg2.connect(**DB_CONFIG)
-    cursor = conn.cursor()
-    
-    inserted = 0
+def build_rows(district_id, data_list):
+    """Перетворити відповідь API на рядки для вставки"""
+    rows = []
     
     for data_point in data_list:
         try:
             components = data_point['components']
-            measured_at = datetime.fromtimestamp(data_point['dt'])
             
-            # Перевірити чи вже є такий запис
-            cursor.execute(
-                "SELECT id FROM air_quality_history WHERE district_id = %s AND measured_at = %s",
-                (district_id, measured_at)
+            # AQI з концентрацій за тими ж breakpoints, що й живі дані (не індекс 1-5 OpenWeather)
+            aqi, _, _ = calculate_overall_aqi(
+                components.get('pm2_5', 0),
+                components.get('pm10', 0),
+                components.get('no2', 0),
+                components.get('so2', 0),
+                components.get('co', 0),
+                components.get('o3', 0)
             )
             
-            if cursor.fetchone() is not None:
-                continue  # Вже є
-            
-            # Вставити новий запис
-            cursor.execute("""
-                INSERT INTO air_quality_history 
-                (district_id, aqi, aqi_status, pm25, pm10, no2, so2, co, o3, 
-                 measured_at, data_source, is_forecast)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
+            rows.append((
                 district_id,
-                data_point['main']['aqi'] * 50,  # Конвертувати 1-5 в AQI
-                'Historical',
+                aqi,
+                get_aqi_status(aqi),
                 components.get('pm2_5', 0),
                 components.get('pm10', 0),
                 components.get('no2', 0),
                 components.get('so2', 0),
                 components.get('co', 0),
                 components.get('o3', 0),
-                measured_at,
+                datetime.fromtimestamp(data_point['dt']),
                 'openweather_history',
                 False
             ))
-            
-            inserted += 1
-            
         except Exception as e:
-            print(f"  ⚠️ Помилка збереження: {e}")
-            continue
+            print(f"  ⚠️ Пропущено некоректний запис: {e}")
+    
+    return rows
+
+def get_live_hours(cursor, district_id, start_time, end_time):
+    """Години, за які вже є живі вимірювання (з backend scheduler, не з history API)"""
+    cursor.execute("""
+        SELECT DISTINCT date_trunc('hour', measured_at)
+        FROM air_quality_history
+        WHERE district_id = %s
+          AND is_forecast = false
+          AND data_source <> 'openweather_history'
+          AND measured_at >= %s AND measured_at < %s
+    """, (district_id, start_time, end_time + timedelta(hours=1)))
+    return {row[0] for row in cursor.fetchall()}
+
+def save_to_database(district_id, data_list, fill_gaps_only=False):
+    """
+    Зберегти дані в БД пакетами
+    INSERT ... ON CONFLICT DO NOTHING - повторний запуск не створює дублікатів
+    fill_gaps_only - лише години без живих вимірювань: backend scheduler пише
+    поточні дані кожні 15 хвилин з іншими мітками часу, тож ON CONFLICT їх не відсіює
+    
+    Returns:
+        dict: {'inserted': int, 'skipped': int}
+    """
+    rows = build_rows(district_id, data_list)
+    report = {'inserted': 0, 'skipped': len(data_list) - len(rows)}
     
-    conn.commit()
-    cursor.close()
-    conn.close()
+    if not rows:
+        return report
+    
+    conn = psycopg2.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    
+    try:
+        if fill_gaps_only:
+            live_hours = get_live_hours(
+                cursor, district_id,
+                min(row[9] for row in rows), max(row[9] for row in rows)
+            )
+            gap_rows = [
+                row for row in rows
+                if row[9].replace(minute=0, second=0, microsecond=0) not in live_hours
+            ]
+            report['skipped'] += len(rows) - len(gap_rows)
+            rows = gap_rows
+            
+            if not rows:
+                return report
+        
+        # Місячні партиції для всього діапазону дат
+        measured = [row[9] for row in rows]
+        cursor.execute(
+            "SELECT create_air_quality_history_partitions(%s, %s)",
+            (min(measured).date(), (max(measured) + timedelta(days=1)).date())
+        )
+        
+        for batch_start in range(0, len(rows), INSERT_BATCH_SIZE):
+            batch = rows[batch_start:batch_start + INSERT_BATCH_SIZE]
+            
+            inserted_rows = execute_values(cursor, """
+                INSERT INTO air_quality_history 
+                (district_id, aqi, aqi_status, pm25, pm10, no2, so2, co, o3, 
+                 measured_at, data_source, is_forecast)
+                VALUES %s
+                ON CONFLICT (district_id, measured_at, is_forecast) DO NOTHING
+                RETURNING id
+            """, batch, page_size=INSERT_BATCH_SIZE, fetch=True)
+            
+            inserted = len(inserted_rows)
+            skipped = len(batch) - inserted
+            report['inserted'] += inserted
+            report['skipped'] += skipped
+            
+            print(f"   📦 Пакет {batch_start // INSERT_BATCH_SIZE + 1}: "
+                  f"додано {inserted}, пропущено {skipped} (вже є)")
+        
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"  ❌ Помилка збереження: {e}")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
     
-    return inserted
+    return report
 
 def collect_historical_data(days_back=30):
     """
@@ -112,13 +185,29 @@ def collect_historical_data(days_back=30):
     print(f"🚀 ЗБІР ІСТОРИЧНИХ ДАНИХ ЗА ОСТАННІ {days_back} ДНІВ")
     print("=" * 70)
     
+    end_time = datetime.now()
+    start_time = end_time - timedelta(days=days_back)
+    
+    return collect_period(start_time, end_time)
+
+def collect_recent_data(hours_back=3):
+    """
+    Дозібрати дані за останні години (для планувальника)
+    Лише пропуски: години, де вже є живі вимірювання backend, не дублюються
+    """
+    end_time = datetime.now()
+    start_time = end_time - timedelta(hours=hours_back)
+    
+    return collect_period(start_time, end_time, fill_gaps_only=True)
+
+def collect_period(start_time, end_time, fill_gaps_only=False):
+    """
+    Зібрати дані всіх районів за період
+    """
     if not OPENWEATHER_API_KEY:
         print("❌ OPENWEATHER_API_KEY не знайдено в .env!")
         return
     
-    end_time = datetime.now()
-    start_time = end_time - timedelta(days=days_back)
-    
     start_timestamp = int(start_time.timestamp())
     end_timestamp = int(end_time.timestamp())
     
@@ -126,6 +215,7 @@ def collect_historical_data(days_back=30):
     print()
     
     total_inserted = 0
+    total_skipped = 0
     
     for district in DISTRICTS:
         print(f"📍 {district['name']} (ID: {district['id']})")
@@ -143,10 +233,11 @@ def collect_historical_data(days_back=30):
             print(f"   📦 Отримано {len(data['list'])} записів")
             
             # Зберегти в БД
-            inserted = save_to_database(district['id'], data['list'])
-            total_inserted += inserted
+            report = save_to_database(district['id'], data['list'], fill_gaps_only=fill_gaps_only)
+            total_inserted += report['inserted']
+            total_skipped += report['skipped']
             
-            print(f"   ✅ Збережено {inserted} нових записів")
+            print(f"   ✅ Збережено {report['inserted']} нових записів, пропущено {report['skipped']}")
         else:
             print("   ❌ Не вдалося отримати дані")
         
@@ -154,8 +245,10 @@ def collect_historical_data(days_back=30):
         time.sleep(1)  # Пауза між запитами
     
     print("=" * 70)
-    print(f"✅ ЗАВЕРШЕНО! Всього додано {total_inserted} записів")
+    print(f"✅ ЗАВЕРШЕНО! Всього додано {total_inserted} записів, пропущено {total_skipped}")
     print("=" * 70)
+    
+    return {'inserted': total_inserted, 'skipped': total_skipped}
 
 if __name__ == "__main__":
     # Зібрати дані за останні 30 днів
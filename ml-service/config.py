@@ -16,10 +16,86 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'postgres')
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'your_password')
     
+    # ASGI-застосунок асинхронних ендпоінтів (/api/async/..., asgi_app.py)
+    ASYNC_PORT = int(os.getenv('ASYNC_PORT', 5002))
+    
+    # Пул asyncpg для асинхронних ендпоінтів (/api/async/...)
+    ASYNC_DB_POOL_MIN_SIZE = int(os.getenv('ASYNC_DB_POOL_MIN_SIZE', 2))
+    ASYNC_DB_POOL_MAX_SIZE = int(os.getenv('ASYNC_DB_POOL_MAX_SIZE', 10))
+    
+    # Партиції air_quality_history (помісячні)
+    HISTORY_PARTITIONS_AHEAD_MONTHS = 2  # Скільки місяців наперед створювати партиції
+    HISTORY_RETENTION_MONTHS = 3         # Старші партиції видаляються цілком
+    
     # ML параметри
     MODEL_PATH = './trained_models/'
+    MODEL_VERSIONS_TO_KEEP = 5        # Версій моделі на район (для rollback)
+    MODEL_RELOAD_CHECK_SECONDS = 5    # Як часто перевіряти CURRENT на нову версію
+    
+    # Walk-forward бектест
+    BACKTEST_FOLDS = 5
+    BACKTEST_TEST_SIZE = 24           # Записів (годин) у тестовому блоці
+    BACKTEST_PURGE = 12               # Найдовше rolling-вікно features
+    BACKTEST_EMBARGO = 0
+    BACKTEST_MIN_TRAIN_SIZE = 100
+    BACKTEST_WORKERS = 3
+    BACKTEST_HORIZON_BUCKETS = [1, 3, 6, 12, 24]  # Усі досяжні при TEST_SIZE=24, EMBARGO=0 (решта - >24)
+    
+    # Фонові задачі (навчання, перевірки, тести моделей)
+    JOBS_PATH = os.getenv('JOBS_PATH', './jobs/')
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOBS_IN_MEMORY = 200  # Завершені задачі понад ліміт читаються з диску
+    
+    # Датасети користувачів для /api/research/train-custom (CSV, Parquet, Feather)
+    RESEARCH_MAX_UPLOAD_MB = int(os.getenv('RESEARCH_MAX_UPLOAD_MB', 500))
+    RESEARCH_MAX_ROWS = int(os.getenv('RESEARCH_MAX_ROWS', 2_000_000))
+    RESEARCH_MAX_MEMORY_MB = int(os.getenv('RESEARCH_MAX_MEMORY_MB', 512))  # Після розбору (float32)
+    RESEARCH_CHUNK_ROWS = 100_000    # Рядків на частину при читанні CSV/Parquet
+    RESEARCH_CHART_POINTS = 500      # Точок на ряд у відповіді (LTTB-проріджування)
+    RESEARCH_LSTM_LOOKBACK = 24      # Годин історії на вході LSTM (config['lookback'])
+    RESEARCH_LSTM_MAX_LOOKBACK = 168
+    PLOTS_PATH = os.getenv('PLOTS_PATH', './cache/plots/')
+    PLOT_WORKERS = 1
+    PLOT_WAIT_SECONDS = 30
+    RESEARCH_PLOTS_TO_KEEP = 50
+    RESEARCH_COMPARE_CPUS = int(os.getenv('RESEARCH_COMPARE_CPUS', os.cpu_count() or 2))  # Спільно на всі алгоритми порівняння
+    # Кеш розібраних датасетів і підготовлених матриць за sha256 вмісту файлу
+    RESEARCH_CACHE_PATH = os.getenv('RESEARCH_CACHE_PATH', './cache/research/')
+    RESEARCH_CACHE_MAX_MB = int(os.getenv('RESEARCH_CACHE_MAX_MB', 2048))
+    
+    # Кеш результатів /test-model (ключ включає версію даних - max(measured_at) + кількість записів)
+    TEST_MODEL_CACHE_PATH = os.getenv('TEST_MODEL_CACHE_PATH', './cache/test_model/')
+    TEST_MODEL_CACHE_MAX_MB = int(os.getenv('TEST_MODEL_CACHE_MAX_MB', 200))
+    
+    # Parquet-дзеркало історії для офлайн-навчання та аналітики
+    HISTORY_MIRROR_PATH = os.getenv('HISTORY_MIRROR_PATH', './history_mirror/')
+    TRAINING_DATA_SOURCE = os.getenv('TRAINING_DATA_SOURCE', 'postgres')  # 'postgres' або 'parquet'
     HISTORY_HOURS = 48  # Скільки годин історії для прогнозу
     
+    # Планувальник усередині процесу (ingest → features → forecast → monitor)
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'True') == 'True'
+    SCHEDULER_STATE_PATH = os.getenv('SCHEDULER_STATE_PATH', './jobs/scheduler_state.json')
+    SCHEDULER_WORKERS = 2
+    SCHEDULER_TICK_SECONDS = 15
+    PIPELINE_OFFSET_MINUTES = 5      # Щогодини о :05
+    PIPELINE_JITTER_SECONDS = 120
+    PIPELINE_INGEST_HOURS = 3        # Вікно дозбору з перекриттям
+    PIPELINE_FORECAST_HOURS = 24
+    
+    # Онлайн-детектори дрейфу (Page-Hinkley на похибках, PSI на розподілах)
+    DRIFT_STATE_PATH = os.getenv('DRIFT_STATE_PATH', './trained_models/drift_state.json')
+    DRIFT_BOOTSTRAP_HOURS = 24 * 7   # Історія для першого запуску (далі - лише нові записи)
+    DRIFT_PH_DELTA = 0.05            # Допустиме зростання відносної похибки
+    DRIFT_PH_THRESHOLD = 2.0         # Поріг статистики Page-Hinkley
+    DRIFT_PH_MIN_SAMPLES = 24        # Не сигналізувати до накопичення доби
+    DRIFT_MIN_SCALE = 1.0            # Мінімальний знаменник відносної похибки (μg/m³)
+    DRIFT_PSI_BINS = 10
+    DRIFT_PSI_REFERENCE_SIZE = 24 * 7
+    DRIFT_PSI_HALF_LIFE = 24         # Поточний розподіл ~ остання доба
+    DRIFT_PSI_MIN_WEIGHT = 12
+    DRIFT_PSI_THRESHOLD = 0.25       # PSI > 0.25 - суттєвий зсув розподілу
+    DRIFT_MAX_ALERTS = 20
+    
     # Параметри які прогнозуємо
     TARGET_FEATURES = ['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']
     
@@ -29,6 +105,16 @@ class Config:
     # Часові features
     TIME_FEATURES = ['hour', 'day_of_week', 'is_weekend']
     
+    # Типи числових колонок при завантаженні з БД
+    # (DECIMAL інакше приходить як decimal.Decimal і колонки мають dtype object)
+    MEASUREMENT_DTYPES = {
+        'pm25': 'float32', 'pm10': 'float32', 'no2': 'float32',
+        'so2': 'float32', 'co': 'float32', 'o3': 'float32',
+        'aqi': 'float32',
+        'temperature': 'float32', 'humidity': 'float32',
+        'pressure': 'float32', 'wind_speed': 'float32'
+    }
+    
     # Райони
     DISTRICTS = [
         {'id': 1, 'name': 'Галицький'},
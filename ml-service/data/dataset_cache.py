@@ -0,0 +1,146 @@
+# ml-service/data/dataset_cache.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+from config import Config
+from utils.disk_cache import LRUDirectory, atomic_write, atomic_write_dir, touch
+
+PREPARED_ARRAYS = ('X_train', 'X_test', 'y_train', 'y_test')
+
+
+def fingerprint(stream, chunk_size=1024 * 1024):
+    """sha256 вмісту завантаженого файлу (читається частинами, потім stream.seek(0))"""
+    digest = hashlib.sha256()
+
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(0)
+
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """
+    Кеш датасетів /api/research за відбитком вмісту файлу
+
+    Два рівні:
+        parsed/<file_hash>.parquet    - розібраний і перевірений датасет
+        prepared/<key_hash>/*.npy     - features + train/test split + StandardScaler
+                                        (ключ: file_hash + параметри підготовки)
+
+    Повторне завантаження того самого файлу зі зміною лише гіперпараметрів
+    моделі не розбирає CSV і не рахує features заново. Матриці читаються
+    через np.load(mmap_mode='r') - без копіювання в пам'ять процесу.
+    Записи з'являються атомарно (tmp + rename); при перевищенні max_mb
+    видаляються ті, що найдовше не використовувались.
+    """
+
+    def __init__(self, root=None, max_mb=None):
+        self.root = root or Config.RESEARCH_CACHE_PATH
+        self.max_bytes = (max_mb or Config.RESEARCH_CACHE_MAX_MB) * 1024 * 1024
+        self.parsed_dir = os.path.join(self.root, 'parsed')
+        self.prepared_dir = os.path.join(self.root, 'prepared')
+        self._entries = LRUDirectory([self.parsed_dir, self.prepared_dir], max_bytes=self.max_bytes)
+
+    # ==================== PARSED ====================
+
+    def parsed_path(self, file_hash):
+        return os.path.join(self.parsed_dir, f'{file_hash}.parquet')
+
+    def load_parsed(self, file_hash):
+        path = self.parsed_path(file_hash)
+        if not os.path.exists(path):
+            return None
+
+        touch(path)
+        return pd.read_parquet(path)
+
+    def save_parsed(self, file_hash, df):
+        try:
+            atomic_write(self.parsed_path(file_hash), lambda tmp_path: df.to_parquet(tmp_path, index=False))
+        except Exception as e:
+            print(f"⚠️ Не вдалося закешувати датасет: {e}")
+            return
+
+        self.evict()
+
+    # ==================== PREPARED ====================
+
+    @staticmethod
+    def prepared_key_hash(key):
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    def prepared_path(self, key):
+        return os.path.join(self.prepared_dir, self.prepared_key_hash(key))
+
+    def has_prepared(self, key):
+        return os.path.isdir(self.prepared_path(key))
+
+    def load_prepared(self, key):
+        """
+        Returns:
+            dict: X_train, X_test, y_train, y_test (read-only memmap) + метадані; або None
+        """
+        path = self.prepared_path(key)
+        if not os.path.isdir(path):
+            return None
+
+        try:
+            with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+                prepared = json.load(f)
+            for name in PREPARED_ARRAYS:
+                prepared[name] = np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Пошкоджений запис кешу {path}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+        touch(path)
+        return prepared
+
+    def save_prepared(self, key, prepared):
+        path = self.prepared_path(key)
+
+        def write(tmp_dir):
+            for name in PREPARED_ARRAYS:
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), prepared[name])
+
+            meta = {name: value for name, value in prepared.items() if name not in PREPARED_ARRAYS}
+            meta['key'] = key
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+
+        try:
+            atomic_write_dir(path, write)
+        except OSError as e:
+            # Паралельна задача вже записала той самий ключ - або диск недоступний
+            if not os.path.isdir(path):
+                print(f"⚠️ Не вдалося закешувати підготовлені дані: {e}")
+            return
+
+        self.evict()
+
+    # ==================== EVICTION ====================
+
+    def evict(self):
+        """Видаляти записи, що найдовше не використовувались, поки кеш > max_bytes"""
+        self._entries.evict()
+
+
+_dataset_cache = None
+_dataset_cache_lock = threading.Lock()
+
+
+def get_dataset_cache():
+    """Спільний кеш датасетів процесу"""
+    global _dataset_cache
+
+    with _dataset_cache_lock:
+        if _dataset_cache is None:
+            _dataset_cache = DatasetCache()
+        return _dataset_cache
@@ -0,0 +1,215 @@
+# ml-service/data/dataset_loader.py
+import os
+import numpy as np
+import pandas as pd
+from config import Config
+
+# Явна схема датасету користувача: числові колонки одразу float32
+# (вдвічі менше пам'яті, ніж float64 за замовчуванням у read_csv).
+# Додаткові колонки зберігаються як додаткові ознаки (теж float32)
+NUMERIC_COLUMNS = [
+    'pm25', 'pm10', 'no2', 'so2', 'co', 'o3',
+    'temperature', 'humidity', 'pressure', 'wind_speed', 'wind_direction'
+]
+TIMESTAMP_COLUMN = 'timestamp'
+DATASET_COLUMNS = [TIMESTAMP_COLUMN] + NUMERIC_COLUMNS
+
+CSV_DTYPES = {column: np.float32 for column in NUMERIC_COLUMNS}
+CSV_DTYPES[TIMESTAMP_COLUMN] = str
+
+SUPPORTED_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather'
+}
+
+
+class DatasetTooLarge(ValueError):
+    """Датасет перевищує ліміт рядків або пам'яті"""
+
+
+class DatasetInvalid(ValueError):
+    """Нечислові значення в колонках, що мають бути числовими, або зламаний CSV"""
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension not in SUPPORTED_FORMATS:
+        raise ValueError(
+            f"Непідтримуваний формат файлу '{extension}'. "
+            f"Підтримуються: {', '.join(sorted(SUPPORTED_FORMATS))}"
+        )
+    return SUPPORTED_FORMATS[extension]
+
+
+class DatasetLoader:
+    """
+    Завантаження датасету для /api/research/train-custom
+
+    - CSV читається частинами по chunk_rows рядків з явною float32-схемою
+    - Parquet/Feather читаються батчами через pyarrow, кількість рядків
+      перевіряється за метаданими до читання
+    - додаткові колонки (поза NUMERIC_COLUMNS) лишаються ознаками моделі і
+      приводяться до float32; нечислова колонка або значення -> DatasetInvalid
+    - ліміти max_rows і max_memory_mb перевіряються по ходу читання:
+      завеликий файл відхиляється, не встигнувши зайняти пам'ять воркера
+    """
+
+    def __init__(self, max_rows=None, max_memory_mb=None, chunk_rows=None):
+        self.max_rows = max_rows or Config.RESEARCH_MAX_ROWS
+        self.max_memory_bytes = (max_memory_mb or Config.RESEARCH_MAX_MEMORY_MB) * 1024 * 1024
+        self.chunk_rows = chunk_rows or Config.RESEARCH_CHUNK_ROWS
+
+    def load(self, source, filename):
+        """
+        source - файловий об'єкт (напр. request.files['dataset'].stream)
+
+        Returns:
+            DataFrame: timestamp (datetime64) + числові колонки float32
+        Raises:
+            DatasetTooLarge: перевищено max_rows / max_memory_mb
+            DatasetInvalid: нечислові значення в числових колонках
+        """
+        file_format = detect_format(filename)
+
+        if file_format == 'csv':
+            df = self._load_csv(source)
+        elif file_format == 'parquet':
+            df = self._load_parquet(source)
+        else:
+            df = self._load_feather(source)
+
+        return self._normalize(df)
+
+    # ==================== LIMITS ====================
+
+    def _check_limits(self, rows, memory_bytes):
+        if rows > self.max_rows:
+            raise DatasetTooLarge(
+                f'Датасет перевищує ліміт {self.max_rows} рядків'
+            )
+        if memory_bytes > self.max_memory_bytes:
+            raise DatasetTooLarge(
+                f'Датасет перевищує ліміт пам\'яті {self.max_memory_bytes // (1024 * 1024)} MB'
+            )
+
+    @staticmethod
+    def _memory_usage(df):
+        # deep=True - реальний розмір і object-колонок (нерозібрані рядки)
+        return int(df.memory_usage(deep=True).sum())
+
+    # ==================== FORMATS ====================
+
+    def _load_csv(self, source):
+        chunks = []
+        rows = 0
+        memory_bytes = 0
+
+        reader = pd.read_csv(
+            source,
+            dtype=CSV_DTYPES,
+            chunksize=self.chunk_rows
+        )
+
+        while True:
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                break
+            except pd.errors.ParserError as e:
+                raise DatasetInvalid(f'Некоректний CSV: {e}') from e
+            except ValueError as e:
+                # float32-колонка з нечисловою клітинкою: read_csv не називає колонку
+                raise DatasetInvalid(
+                    f'Нечислове значення в числовій колонці ({", ".join(NUMERIC_COLUMNS)}): {e}'
+                ) from e
+
+            # Розбір дат по частинах: рядкові значення не накопичуються
+            if TIMESTAMP_COLUMN in chunk.columns:
+                chunk[TIMESTAMP_COLUMN] = pd.to_datetime(chunk[TIMESTAMP_COLUMN], errors='coerce')
+            chunk = self._cast_numeric(chunk)
+
+            rows += len(chunk)
+            memory_bytes += self._memory_usage(chunk)
+            self._check_limits(rows, memory_bytes)
+            chunks.append(chunk)
+
+        if not chunks:
+            return pd.DataFrame(columns=DATASET_COLUMNS)
+
+        return pd.concat(chunks, ignore_index=True, copy=False)
+
+    def _load_parquet(self, source):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source)
+        columns = parquet_file.schema_arrow.names
+        self._check_limits(parquet_file.metadata.num_rows, 0)
+
+        batches = []
+        memory_bytes = 0
+
+        for batch in parquet_file.iter_batches(batch_size=self.chunk_rows):
+            batch_df = self._cast_numeric(batch.to_pandas())
+            memory_bytes += self._memory_usage(batch_df)
+            self._check_limits(0, memory_bytes)
+            batches.append(batch_df)
+
+        if not batches:
+            return pd.DataFrame(columns=columns)
+
+        return pd.concat(batches, ignore_index=True, copy=False)
+
+    def _load_feather(self, source):
+        import pyarrow as pa
+
+        # Feather v2 = Arrow IPC file: батчі читаються по одному
+        reader = pa.ipc.open_file(source)
+        columns = reader.schema.names
+
+        batches = []
+        rows = 0
+        memory_bytes = 0
+
+        for idx in range(reader.num_record_batches):
+            batch = reader.get_batch(idx)
+            batch_df = self._cast_numeric(batch.to_pandas())
+            rows += len(batch_df)
+            memory_bytes += self._memory_usage(batch_df)
+            self._check_limits(rows, memory_bytes)
+            batches.append(batch_df)
+
+        if not batches:
+            return pd.DataFrame(columns=columns)
+
+        return pd.concat(batches, ignore_index=True, copy=False)
+
+    # ==================== SCHEMA ====================
+
+    @staticmethod
+    def _cast_numeric(df):
+        """Усі колонки, крім timestamp, -> float32; нечислові -> DatasetInvalid зі списком"""
+        invalid = []
+
+        for column in df.columns:
+            if column == TIMESTAMP_COLUMN or df[column].dtype == np.float32:
+                continue
+            try:
+                df[column] = pd.to_numeric(df[column], errors='raise').astype(np.float32)
+            except (ValueError, TypeError):
+                invalid.append(str(column))
+
+        if invalid:
+            raise DatasetInvalid(f'Нечислові значення в колонках: {", ".join(invalid)}')
+
+        return df
+
+    def _normalize(self, df):
+        df = self._cast_numeric(df)
+
+        if TIMESTAMP_COLUMN in df.columns and not pd.api.types.is_datetime64_any_dtype(df[TIMESTAMP_COLUMN]):
+            df[TIMESTAMP_COLUMN] = pd.to_datetime(df[TIMESTAMP_COLUMN], errors='coerce')
+
+        return df
@@ -0,0 +1,256 @@
+# ml-service/data/history_mirror.py
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+import pandas as pd
+from config import Config
+from utils.db_helper import DatabaseHelper
+
+MIRROR_COLUMNS = [
+    'measured_at', 'aqi',
+    'pm25', 'pm10', 'no2', 'so2', 'co', 'o3',
+    'temperature', 'humidity', 'pressure', 'wind_speed', 'wind_direction'
+]
+
+class HistoryMirror:
+    """
+    Локальна Parquet-копія реальних вимірювань air_quality_history
+    
+    Структура: <root>/district_id=<id>/month=<YYYY-MM>/data.parquet
+    Важкі офлайн-скани (навчання, кореляції, бектести) читають звідси,
+    а не з PostgreSQL, і не конкурують з API за I/O бази.
+    Перед читанням - refresh_if_stale(): остання година в маніфесті
+    порівнюється з get_data_watermark БД.
+    """
+    
+    MANIFEST_FILE = '_manifest.json'
+    
+    # Вікно get_data_watermark для перевірки свіжості (нові дані - у поточному місяці)
+    WATERMARK_DAYS = 31
+    
+    def __init__(self, root=None, db=None):
+        self.root = root or Config.HISTORY_MIRROR_PATH
+        self.db = db or DatabaseHelper()
+        self.manifest_path = os.path.join(self.root, self.MANIFEST_FILE)
+    
+    def partition_path(self, district_id, month):
+        return os.path.join(
+            self.root, f'district_id={district_id}', f'month={month}', 'data.parquet'
+        )
+    
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+    
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+    
+    def _save_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f'{self.manifest_path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _months_in_db(self, district_ids):
+        """Кількість записів по (район, місяць) - з щоденних агрегатів, без скану історії"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT district_id, to_char(day, 'YYYY-MM') AS month, SUM(record_count)
+            FROM air_quality_daily_stats
+            WHERE district_id = ANY(%s)
+            GROUP BY district_id, to_char(day, 'YYYY-MM')
+            ORDER BY district_id, month
+        """, (list(district_ids),))
+        rows = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        return rows
+    
+    def _write_partition(self, district_id, month):
+        month_start = datetime.strptime(month, '%Y-%m')
+        month_end = (month_start + timedelta(days=32)).replace(day=1)
+        
+        df = self.db.copy_query_to_dataframe("""
+            SELECT measured_at, aqi,
+                   pm25, pm10, no2, so2, co, o3,
+                   temperature, humidity, pressure, wind_speed, wind_direction
+            FROM air_quality_history
+            WHERE district_id = %s
+              AND is_forecast = FALSE
+              AND measured_at >= %s
+              AND measured_at < %s
+            ORDER BY measured_at ASC
+        """, (district_id, month_start, month_end), parse_dates=['measured_at'])
+        
+        path = self.partition_path(district_id, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        # Атомарний запис: читачі не побачать недописаний файл. Префікс '_' -
+        # pyarrow пропускає такі файли при скануванні дзеркала (зокрема залишки
+        # після збою); uuid - паралельні sync не пишуть в один tmp
+        tmp_path = os.path.join(os.path.dirname(path), f'_data.{uuid.uuid4().hex}.parquet.tmp')
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        last_measured_at = df['measured_at'].max() if len(df) else None
+        return len(df), (last_measured_at.isoformat() if last_measured_at is not None else None)
+    
+    def sync(self, district_ids=None):
+        """
+        Синхронізувати дзеркало з БД
+        Переписуються лише нові партиції та ті, де змінилась кількість записів
+        (поточний місяць, дозавантажені дані)
+        
+        Returns:
+            dict: {'written': int, 'skipped': int, 'rows': int}
+        """
+        if district_ids is None:
+            district_ids = [district['id'] for district in Config.DISTRICTS]
+        
+        print(f"\n🪞 Синхронізація Parquet-дзеркала: {self.root}")
+        
+        manifest = self._load_manifest()
+        report = {'written': 0, 'skipped': 0, 'rows': 0}
+        
+        for district_id, month, db_rows in self._months_in_db(district_ids):
+            key = f'{district_id}/{month}'
+            entry = manifest.get(key)
+            
+            # Записи маніфесту без last_measured_at (старіший формат) переписуються один раз
+            if (entry and entry['rows'] == db_rows and 'last_measured_at' in entry
+                    and os.path.exists(self.partition_path(district_id, month))):
+                report['skipped'] += 1
+                continue
+            
+            rows, last_measured_at = self._write_partition(district_id, month)
+            manifest[key] = {
+                'rows': int(db_rows),
+                'last_measured_at': last_measured_at,
+                'synced_at': datetime.now().isoformat()
+            }
+            report['written'] += 1
+            report['rows'] += rows
+            
+            print(f"   ✅ Район {district_id}, {month}: {rows} записів")
+        
+        self._save_manifest(manifest)
+        
+        print(f"✅ Записано {report['written']} партицій ({report['rows']} записів), "
+              f"без змін {report['skipped']}")
+        
+        return report
+    
+    @staticmethod
+    def _manifest_watermark(manifest, district_id):
+        """Остання година району в дзеркалі (за маніфестом) або None"""
+        prefix = f'{district_id}/'
+        values = [
+            pd.Timestamp(entry['last_measured_at'])
+            for key, entry in manifest.items()
+            if key.startswith(prefix) and entry.get('last_measured_at')
+        ]
+        return max(values) if values else None
+    
+    def stale_districts(self, district_ids=None):
+        """
+        Райони, для яких у БД є новіші виміри, ніж у дзеркалі
+        (max measured_at з get_data_watermark > last_measured_at маніфесту)
+        """
+        if district_ids is None:
+            district_ids = [district['id'] for district in Config.DISTRICTS]
+        
+        manifest = self._load_manifest()
+        stale = []
+        
+        for district_id in district_ids:
+            db_watermark = self.db.get_data_watermark(district_id, self.WATERMARK_DAYS)
+            if db_watermark is None:
+                raise RuntimeError(f'Не вдалося отримати версію даних району {district_id} з БД')
+            
+            db_last = db_watermark[0]
+            if db_last is None:
+                continue
+            
+            mirror_last = self._manifest_watermark(manifest, district_id)
+            if mirror_last is None or pd.Timestamp(db_last) > mirror_last:
+                stale.append(district_id)
+        
+        return stale
+    
+    def refresh_if_stale(self, district_ids=None):
+        """
+        Дотягнути дзеркало до БД, якщо воно відстає
+        
+        Returns:
+            bool: чи була синхронізація
+        """
+        stale = self.stale_districts(district_ids)
+        if not stale:
+            return False
+        
+        print(f"🪞 Parquet-дзеркало відстає від БД (райони {stale}) - синхронізація")
+        self.sync(stale)
+        return True
+    
+    def load(self, district_ids=None, start=None, end=None, columns=None):
+        """
+        Прочитати виміри з дзеркала
+        Фільтри по району та місяцю відсікають зайві файли ще до читання
+        
+        Returns:
+            DataFrame з колонками district_id + columns (за замовчуванням усі)
+        """
+        filters = []
+        if district_ids is not None:
+            filters.append(('district_id', 'in', [int(d) for d in district_ids]))
+        if start is not None:
+            filters.append(('month', '>=', pd.Timestamp(start).strftime('%Y-%m')))
+        if end is not None:
+            filters.append(('month', '<=', pd.Timestamp(end).strftime('%Y-%m')))
+        
+        read_columns = None
+        if columns is not None:
+            read_columns = ['district_id'] + [col for col in columns if col != 'district_id']
+            if 'measured_at' not in read_columns:
+                read_columns.append('measured_at')
+        
+        df = pd.read_parquet(
+            self.root,
+            engine='pyarrow',
+            columns=read_columns,
+            filters=filters or None
+        )
+        
+        if 'month' in df.columns:
+            df = df.drop(columns='month')
+        df['district_id'] = df['district_id'].astype(int)
+        
+        if start is not None:
+            df = df[df['measured_at'] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df['measured_at'] < pd.Timestamp(end)]
+        
+        return df.sort_values(['district_id', 'measured_at']).reset_index(drop=True)
+    
+    def get_training_data(self, district_id, days=30):
+        """Те саме, що DatabaseHelper.get_training_data, але з дзеркала"""
+        start = datetime.now() - timedelta(days=days)
+        
+        df = self.load(
+            district_ids=[district_id],
+            start=start,
+            columns=['measured_at'] + Config.TARGET_FEATURES + Config.WEATHER_FEATURES
+        )
+        
+        print(f"✅ Завантажено {len(df)} записів для району {district_id} (Parquet)")
+        return df.drop(columns='district_id')
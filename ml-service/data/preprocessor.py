@@ -2,20 +2,17 @@
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
-import joblib
-import os
 from config import Config
 
 class DataPreprocessor:
     """Покращена підготовка даних для ML моделі"""
     
+    # Збільшувати при зміні логіки побудови features (інвалідує кеш результатів тестів)
+    FEATURE_SPEC_VERSION = 1
+    
     def __init__(self, district_id):
         self.district_id = district_id
         self.scaler = MinMaxScaler()
-        self.scaler_path = os.path.join(
-            Config.MODEL_PATH, 
-            f'scaler_district_{district_id}.pkl'
-        )
     
     def add_time_features(self, df):
         """Розширені часові ознаки"""
@@ -176,25 +173,22 @@ class DataPreprocessor:
         return features
     
     def fit_scaler(self, df):
-        """Навчити scaler"""
+        """
+        Навчити scaler
+        На диск не пишеться - зберігається разом з моделлю (AirQualityModel.train(scaler=...))
+        """
         feature_cols = self.get_feature_columns()
         X = df[feature_cols].values
         
         self.scaler.fit(X)
         
-        os.makedirs(Config.MODEL_PATH, exist_ok=True)
-        joblib.dump(self.scaler, self.scaler_path)
-        
-        print(f"✅ Scaler збережено: {self.scaler_path}")
+        print("✅ Scaler навчено")
     
     def transform(self, df):
         """Нормалізувати дані"""
         feature_cols = self.get_feature_columns()
         X = df[feature_cols].values
         
-        if os.path.exists(self.scaler_path):
-            self.scaler = joblib.load(self.scaler_path)
-        
         X_scaled = self.scaler.transform(X)
         
         return X_scaled, df[Config.TARGET_FEATURES].values
@@ -0,0 +1,75 @@
+# ml-service/data/sequence_windows.py
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class SequenceWindows:
+    """
+    Послідовності (lookback, features) для LSTM без матеріалізації N×lookback×features
+
+    windows - view над суцільним масивом X (sliding_window_view + transpose, без копії):
+    windows[k] = X[k : k + lookback] - вхід для цілі y[k + lookback - 1].
+    Копіюється лише поточний батч (batch_size × lookback × features) при його збиранні.
+
+    targets - номери рядків X/y, для яких будуються приклади; рядки раніше
+    за lookback - 1 не мають повної історії й пропускаються. Кілька наборів
+    (train/val/test) над тим самим X не копіюють його: view будується за O(1).
+    """
+
+    def __init__(self, X, y, lookback, targets=None):
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        self.y = np.ascontiguousarray(y, dtype=np.float32)
+        self.lookback = lookback
+
+        if lookback > len(self.X):
+            raise ValueError(f"lookback={lookback} більший за кількість рядків ({len(self.X)})")
+
+        # (N - lookback + 1, features, lookback) -> (N - lookback + 1, lookback, features)
+        self.windows = sliding_window_view(self.X, lookback, axis=0).transpose(0, 2, 1)
+
+        targets = np.arange(len(self.X)) if targets is None else np.asarray(targets)
+        self.targets = targets[targets >= lookback - 1].astype(np.int64)
+
+    def __len__(self):
+        return len(self.targets)
+
+    @property
+    def n_features(self):
+        return self.X.shape[1]
+
+    def gather(self, rows):
+        """Батч: (len(rows), lookback, features), (len(rows), targets)"""
+        return self.windows[rows - self.lookback + 1], self.y[rows]
+
+    def to_dataset(self, batch_size, shuffle=False, seed=42, threads=None):
+        """
+        tf.data: перемішуються лише індекси цілей, батчі збираються з view
+        паралельно з навчанням (prefetch); threads - власний пул потоків конвеєра
+        """
+        import tensorflow as tf  # type: ignore
+
+        lookback, n_features, n_targets = self.lookback, self.n_features, self.y.shape[1]
+
+        def gather_batch(rows):
+            X_batch, y_batch = tf.numpy_function(self.gather, [rows], (tf.float32, tf.float32))
+            X_batch.set_shape([None, lookback, n_features])
+            y_batch.set_shape([None, n_targets])
+            return X_batch, y_batch
+
+        dataset = tf.data.Dataset.from_tensor_slices(self.targets)
+        if shuffle:
+            dataset = dataset.shuffle(len(self.targets), seed=seed, reshuffle_each_iteration=True)
+
+        dataset = (
+            dataset
+            .batch(batch_size)
+            .map(gather_batch, num_parallel_calls=tf.data.AUTOTUNE)
+            .prefetch(tf.data.AUTOTUNE)
+        )
+
+        if threads:
+            options = tf.data.Options()
+            options.threading.private_threadpool_size = threads
+            dataset = dataset.with_options(options)
+
+        return dataset
@@ -6,21 +6,20 @@ from sklearn.multioutput import MultiOutputRegressor
 import joblib
 import os
 from config import Config
-import json
+from models.model_registry import get_model_registry
 
 class AirQualityModel:  
     def __init__(self, district_id, model_type='xgboost'):
         self.district_id = district_id
         self.model_type = model_type
         self.model = None
+        self.scaler = None
+        self.version = None
+        # Старий формат (один .pkl без версій) - лише для читання
         self.model_path = os.path.join(
             Config.MODEL_PATH,
             f'{model_type}_district_{district_id}.pkl'
         )
-        self.metrics_path = os.path.join(
-            Config.MODEL_PATH,
-            f'metrics_district_{district_id}.json'
-        )
     
     def create_model(self):
         if self.model_type == 'xgboost':
@@ -54,7 +53,12 @@ class AirQualityModel:
         self.model = MultiOutputRegressor(base_model)
         return self.model
     
-    def train(self, X_train, y_train, X_val=None, y_val=None):
+    def train(self, X_train, y_train, X_val=None, y_val=None, scaler=None, save=True):
+        """
+        Навчити модель
+        scaler - яким нормалізовано X (публікується разом з моделлю)
+        save=False - не публікувати версію (експерименти, бектести)
+        """
         print(f"\n🎯 Навчання {self.model_type} моделі (з anti-overfitting)...")
 
         self.create_model()
@@ -77,16 +81,14 @@ class AirQualityModel:
             else:
                 print(f"   ❌ Можливий overfitting")
 
-        self.save_model()
-        metrics = {
-            'train_r2': float(train_score),
-            'val_r2': float(val_score) if val_score else None,
-            'model_type': self.model_type
-        }
+        self.scaler = scaler
         
-        os.makedirs(Config.MODEL_PATH, exist_ok=True)
-        with open(self.metrics_path, 'w') as f:
-            json.dump(metrics, f, indent=2)
+        if save:
+            self.save_model(metrics={
+                'train_r2': float(train_score),
+                'val_r2': float(val_score) if val_score else None,
+                'model_type': self.model_type
+            })
         
         return train_score, val_score
     
@@ -95,16 +97,53 @@ class AirQualityModel:
             raise ValueError("Model not trained or loaded")
         return self.model.predict(X)
     
-    def save_model(self):
-        os.makedirs(Config.MODEL_PATH, exist_ok=True)
-        joblib.dump(self.model, self.model_path)
-        print(f"✅ Модель збережена: {self.model_path}")
+    def evaluate(self, X, y):
+        """
+        Метрики по кожному забруднювачу
+
+        Returns:
+            dict: {param: {'mae', 'rmse', 'r2'}}
+        """
+        predictions = self.predict(X)
+        y = np.asarray(y)
+        errors = predictions - y
+
+        metrics = {}
+        for i, param in enumerate(Config.TARGET_FEATURES):
+            y_true = y[:, i]
+            ss_res = float(np.sum(errors[:, i] ** 2))
+            ss_tot = float(np.sum((y_true - y_true.mean()) ** 2))
+            metrics[param] = {
+                'mae': float(np.abs(errors[:, i]).mean()),
+                'rmse': float(np.sqrt(ss_res / len(y_true))),
+                'r2': 1 - ss_res / ss_tot if ss_tot > 0 else 0.0
+            }
+
+        return metrics
+    
+    def save_model(self, metrics=None):
+        """Опублікувати нову версію (модель + scaler) атомарно"""
+        self.version = get_model_registry().publish(
+            self.district_id, self.model, scaler=self.scaler,
+            model_type=self.model_type, metrics=metrics
+        )
+        print(f"✅ Модель збережена: версія {self.version}")
     
     def load_model(self):
+        """Завантажити активну версію (модель і scaler з одного bundle)"""
+        bundle = get_model_registry().get(self.district_id)
+        
+        if bundle is not None:
+            self.model = bundle.model
+            self.scaler = bundle.scaler
+            self.version = bundle.version
+            print(f"✅ Модель завантажена: версія {bundle.version}")
+            return True
+        
         if os.path.exists(self.model_path):
             self.model = joblib.load(self.model_path)
             print(f"✅ Модель завантажена: {self.model_path}")
             return True
         else:
             print(f"⚠️ Модель не знайдена: {self.model_path}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,227 @@
+# ml-service/models/backtester.py
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from data.preprocessor import DataPreprocessor
+from models.air_quality_model import AirQualityModel
+
+
+class WalkForwardBacktester:
+    """
+    Walk-forward (rolling-origin) бектест моделі району
+
+    Для кожного fold-а k (останні n_folds блоків по test_size записів):
+
+        [ train ........ ][ purge ][ embargo ][ test ]
+                                   ^ origin
+
+    - purge: останні записи перед origin викидаються з train
+      (їхні rolling/lag features перекриваються з тестовим періодом)
+    - embargo: перші записи після origin не тестуються
+      (модель, розгорнута в origin, дає прогноз із затримкою)
+    - window='expanding' - train від початку; 'rolling' - останні train_size записів
+
+    Features рахуються один раз; fold-и - це зрізи (views) однієї матриці
+    X/y без копіювання. Fold-и навчаються паралельно. Нічого не
+    публікується в реєстр моделей - продакшн-артефакти не змінюються.
+    Нормалізація не потрібна: дерева (XGBoost/RF) інваріантні до монотонного масштабування.
+    """
+
+    def __init__(self, district_id, n_folds=None, test_size=None, purge=None, embargo=None,
+                 window='expanding', train_size=None, min_train_size=None,
+                 model_type='xgboost', max_workers=None):
+        self.district_id = district_id
+        self.n_folds = n_folds or Config.BACKTEST_FOLDS
+        self.test_size = test_size or Config.BACKTEST_TEST_SIZE
+        self.purge = Config.BACKTEST_PURGE if purge is None else purge
+        self.embargo = Config.BACKTEST_EMBARGO if embargo is None else embargo
+        self.window = window
+        self.train_size = train_size
+        self.min_train_size = min_train_size or Config.BACKTEST_MIN_TRAIN_SIZE
+        self.model_type = model_type
+        self.max_workers = max_workers or Config.BACKTEST_WORKERS
+
+        if window not in ('expanding', 'rolling'):
+            raise ValueError(f"Unknown window: {window}")
+        if window == 'rolling' and not train_size:
+            raise ValueError("train_size is required for rolling window")
+
+        unreachable = self.unreachable_horizon_buckets(self.test_size, self.embargo)
+        if unreachable:
+            print(f"⚠️ Горизонти {unreachable} недосяжні при test_size={self.test_size}, "
+                  f"embargo={self.embargo} - ці кошики будуть порожні")
+
+    @staticmethod
+    def unreachable_horizon_buckets(test_size, embargo, buckets=None):
+        """
+        Кошики (lower, upper] з BACKTEST_HORIZON_BUCKETS, у які не потрапить жоден
+        тестовий запис: горизонти fold-а - embargo+1 .. embargo+test_size годин
+        """
+        buckets = Config.BACKTEST_HORIZON_BUCKETS if buckets is None else buckets
+        lowers = [0] + list(buckets[:-1])
+        return [
+            (lower, upper) for lower, upper in zip(lowers, buckets)
+            if lower >= embargo + test_size or upper <= embargo
+        ]
+
+    def make_folds(self, n_samples):
+        """
+        Межі fold-ів як slice-и (базове індексування numpy повертає view)
+
+        Returns:
+            list: [{'fold', 'train': slice, 'origin': int, 'test': slice}]
+        """
+        folds = []
+
+        for k in range(self.n_folds):
+            test_end = n_samples - (self.n_folds - 1 - k) * self.test_size
+            test_start = test_end - self.test_size
+            origin = test_start - self.embargo
+            train_end = origin - self.purge
+            train_start = 0 if self.window == 'expanding' else max(0, train_end - self.train_size)
+
+            if train_end - train_start < self.min_train_size:
+                continue
+
+            folds.append({
+                'fold': k + 1,
+                'train': slice(train_start, train_end),
+                'origin': origin,
+                'test': slice(test_start, test_end)
+            })
+
+        return folds
+
+    def _create_model(self):
+        """Модель без збереження; потоки XGBoost діляться між паралельними fold-ами"""
+        model = AirQualityModel(self.district_id, model_type=self.model_type).create_model()
+        threads_per_fold = max(1, (os.cpu_count() or 1) // self.max_workers)
+        model.set_params(estimator__n_jobs=threads_per_fold)
+        return model
+
+    def _run_fold(self, fold, X, y, hours):
+        train, test = fold['train'], fold['test']
+
+        model = self._create_model()
+        model.fit(X[train], y[train])
+        predictions = model.predict(X[test])
+
+        errors = predictions - y[test]
+        abs_errors = np.abs(errors)
+
+        metrics = {}
+        for i, param in enumerate(Config.TARGET_FEATURES):
+            y_true = y[test][:, i]
+            ss_res = float(np.sum(errors[:, i] ** 2))
+            ss_tot = float(np.sum((y_true - y_true.mean()) ** 2))
+            metrics[param] = {
+                'mae': float(abs_errors[:, i].mean()),
+                'rmse': float(np.sqrt(ss_res / len(y_true))),
+                'r2': 1 - ss_res / ss_tot if ss_tot > 0 else 0.0
+            }
+
+        # Горизонт - години від origin (останній запис, відомий на момент прогнозу;
+        # purge лише прибирає його з train) до тестового
+        horizon = hours[test] - hours[fold['origin'] - 1]
+
+        return {
+            'fold': fold['fold'],
+            'train_samples': train.stop - train.start,
+            'test_samples': test.stop - test.start,
+            'metrics': metrics,
+            '_horizon': horizon,
+            '_abs_errors': abs_errors
+        }
+
+    def run(self, df):
+        """
+        df - сирі дані району (measured_at + забруднювачі + погода)
+
+        Returns:
+            dict: {'folds': [...], 'summary': {...}, 'by_horizon': [...]}
+        """
+        preprocessor = DataPreprocessor(self.district_id)
+        df_processed = preprocessor.prepare_features(df)
+        feature_cols = preprocessor.get_feature_columns()
+
+        # Одна суцільна матриця; fold-и нижче - лише її зрізи
+        X = np.ascontiguousarray(df_processed[feature_cols].to_numpy(dtype=np.float32))
+        y = np.ascontiguousarray(df_processed[Config.TARGET_FEATURES].to_numpy(dtype=np.float32))
+        hours = (
+            df_processed['measured_at'].to_numpy(dtype='datetime64[s]').astype(np.int64) / 3600.0
+        )
+
+        folds = self.make_folds(len(X))
+        if not folds:
+            return {
+                'success': False,
+                'error': f'Not enough data for {self.n_folds} folds: {len(X)} samples'
+            }
+
+        print(f"🔁 Walk-forward: {len(folds)} fold-ів, {len(X)} записів, {self.max_workers} паралельно")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(lambda fold: self._run_fold(fold, X, y, hours), folds))
+
+        by_horizon = self.aggregate_by_horizon(results)
+
+        for result in results:
+            del result['_horizon']
+            del result['_abs_errors']
+
+        return {
+            'success': True,
+            'district_id': self.district_id,
+            'config': {
+                'n_folds': self.n_folds,
+                'test_size': self.test_size,
+                'purge': self.purge,
+                'embargo': self.embargo,
+                'window': self.window,
+                'train_size': self.train_size,
+                'model_type': self.model_type
+            },
+            'folds': results,
+            'summary': self.aggregate_folds(results),
+            'by_horizon': by_horizon
+        }
+
+    @staticmethod
+    def aggregate_folds(results):
+        """Середнє та std метрик по fold-ах"""
+        summary = {}
+
+        for param in Config.TARGET_FEATURES:
+            summary[param] = {}
+            for metric in ('mae', 'rmse', 'r2'):
+                values = np.array([result['metrics'][param][metric] for result in results])
+                summary[param][metric] = round(float(values.mean()), 4)
+                summary[param][f'{metric}_std'] = round(float(values.std()), 4)
+
+        return summary
+
+    @staticmethod
+    def aggregate_by_horizon(results):
+        """MAE усіх fold-ів, згрупована за горизонтом (Config.BACKTEST_HORIZON_BUCKETS, години)"""
+        horizon = np.concatenate([result['_horizon'] for result in results])
+        abs_errors = np.concatenate([result['_abs_errors'] for result in results])
+
+        buckets = []
+        lower = 0
+        for upper in Config.BACKTEST_HORIZON_BUCKETS + [np.inf]:
+            mask = (horizon > lower) & (horizon <= upper)
+            if mask.any():
+                mae = abs_errors[mask].mean(axis=0)
+                buckets.append({
+                    'horizon_from': lower,
+                    'horizon_to': None if np.isinf(upper) else upper,
+                    'samples': int(mask.sum()),
+                    'mae': {
+                        param: round(float(mae[i]), 4)
+                        for i, param in enumerate(Config.TARGET_FEATURES)
+                    }
+                })
+            lower = upper
+
+        return buckets
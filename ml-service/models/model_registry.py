@@ -0,0 +1,234 @@
+# ml-service/models/model_registry.py
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+import joblib
+from config import Config
+
+
+class ModelBundle:
+    """Модель + scaler однієї версії (завжди разом, тож їх неможливо змішати)"""
+
+    def __init__(self, district_id, version, model, scaler=None, model_type='xgboost',
+                 metrics=None, created_at=None):
+        self.district_id = district_id
+        self.version = version
+        self.model = model
+        self.scaler = scaler
+        self.model_type = model_type
+        self.metrics = metrics or {}
+        self.created_at = created_at
+
+    def transform(self, X):
+        """Нормалізувати features scaler-ом цієї версії (якщо модель навчалась на нормалізованих)"""
+        return self.scaler.transform(X) if self.scaler is not None else X
+
+    def predict(self, X):
+        return self.model.predict(self.transform(X))
+
+    def info(self):
+        return {
+            'district_id': self.district_id,
+            'version': self.version,
+            'model_type': self.model_type,
+            'has_scaler': self.scaler is not None,
+            'metrics': self.metrics,
+            'created_at': self.created_at
+        }
+
+
+class ModelRegistry:
+    """
+    Версіоновані артефакти моделей
+
+    MODEL_PATH/district_<id>/
+        <version>/bundle.pkl    - модель + scaler + метадані
+        <version>/metrics.json
+        CURRENT                 - назва активної версії
+
+    Публікація: версія пишеться в тимчасову теку і перейменовується
+    (rename атомарний), потім атомарно замінюється CURRENT. Читач бачить
+    або стару, або нову версію повністю - ніколи напівзаписаний файл.
+
+    Hot swap: get() тримає завантажений bundle в пам'яті й перевіряє CURRENT
+    не частіше ніж раз на MODEL_RELOAD_CHECK_SECONDS. Нова версія
+    завантажується поза блокуванням, поточні запити дораховують на старій.
+    """
+
+    POINTER = 'CURRENT'
+
+    def __init__(self, root=None):
+        self.root = root or Config.MODEL_PATH
+        self._lock = threading.Lock()
+        self._cache = {}        # district_id -> ModelBundle
+        self._checked_at = {}   # district_id -> time.monotonic() останньої перевірки CURRENT
+
+    def district_dir(self, district_id):
+        return os.path.join(self.root, f'district_{district_id}')
+
+    # ==================== PUBLISH ====================
+
+    def publish(self, district_id, model, scaler=None, model_type='xgboost', metrics=None):
+        """
+        Зберегти нову версію і зробити її активною
+
+        Returns:
+            str: назва версії
+        """
+        district_dir = self.district_dir(district_id)
+        os.makedirs(district_dir, exist_ok=True)
+
+        created_at = datetime.now()
+        version = f"v{created_at.strftime('%Y%m%d%H%M%S%f')}"
+        tmp_dir = os.path.join(district_dir, f'.tmp-{uuid.uuid4().hex}')
+        os.makedirs(tmp_dir)
+
+        try:
+            joblib.dump({
+                'district_id': district_id,
+                'version': version,
+                'model': model,
+                'scaler': scaler,
+                'model_type': model_type,
+                'metrics': metrics or {},
+                'created_at': created_at.isoformat()
+            }, os.path.join(tmp_dir, 'bundle.pkl'))
+
+            with open(os.path.join(tmp_dir, 'metrics.json'), 'w') as f:
+                json.dump(metrics or {}, f, indent=2)
+
+            os.rename(tmp_dir, os.path.join(district_dir, version))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self._write_pointer(district_id, version)
+        self.prune(district_id)
+        
+        # Цей процес одразу перемикається на нову версію; інші - при наступній перевірці CURRENT
+        with self._lock:
+            self._cache[district_id] = ModelBundle(
+                district_id, version, model, scaler=scaler, model_type=model_type,
+                metrics=metrics, created_at=created_at.isoformat()
+            )
+            self._checked_at[district_id] = time.monotonic()
+
+        print(f"✅ Модель району {district_id} опублікована: {version}")
+        return version
+
+    def _write_pointer(self, district_id, version):
+        pointer = os.path.join(self.district_dir(district_id), self.POINTER)
+        tmp_pointer = f'{pointer}.{uuid.uuid4().hex}.tmp'
+
+        with open(tmp_pointer, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, pointer)
+
+    def rollback(self, district_id, version):
+        """Зробити активною одну з попередніх версій"""
+        if version not in self.list_versions(district_id):
+            raise ValueError(f"Unknown version: {version}")
+        self._write_pointer(district_id, version)
+        with self._lock:
+            self._checked_at.pop(district_id, None)
+
+    def prune(self, district_id, keep=None):
+        """Видалити найстаріші версії, крім активної"""
+        keep = keep or Config.MODEL_VERSIONS_TO_KEEP
+        current = self.current_version(district_id)
+        versions = self.list_versions(district_id)
+
+        for version in versions[:-keep]:
+            if version != current:
+                shutil.rmtree(os.path.join(self.district_dir(district_id), version), ignore_errors=True)
+
+    # ==================== READ ====================
+
+    def current_version(self, district_id):
+        pointer = os.path.join(self.district_dir(district_id), self.POINTER)
+        try:
+            with open(pointer) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def list_versions(self, district_id):
+        district_dir = self.district_dir(district_id)
+        if not os.path.isdir(district_dir):
+            return []
+        return sorted(name for name in os.listdir(district_dir) if name.startswith('v'))
+
+    def load_version(self, district_id, version):
+        data = joblib.load(os.path.join(self.district_dir(district_id), version, 'bundle.pkl'))
+        return ModelBundle(
+            district_id, data['version'], data['model'], scaler=data['scaler'],
+            model_type=data['model_type'], metrics=data['metrics'], created_at=data['created_at']
+        )
+
+    def get(self, district_id):
+        """
+        Активний bundle району (з кешу; нова версія підхоплюється автоматично)
+
+        Returns:
+            ModelBundle або None якщо модель ще не навчена
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._cache.get(district_id)
+            checked_at = self._checked_at.get(district_id, 0)
+
+            if cached is not None and now - checked_at < Config.MODEL_RELOAD_CHECK_SECONDS:
+                return cached
+            self._checked_at[district_id] = now
+
+        version = self.current_version(district_id)
+
+        if version is None:
+            return None
+        if cached is not None and cached.version == version:
+            return cached
+
+        # Завантаження поза блокуванням: інші запити тим часом працюють зі старою версією
+        bundle = self.load_version(district_id, version)
+
+        with self._lock:
+            self._cache[district_id] = bundle
+
+        print(f"🔁 Модель району {district_id}: {bundle.version}")
+        return bundle
+
+    def activated_at(self, district_id):
+        """
+        Час, коли активна версія стала активною (або None)
+
+        CURRENT щоразу замінюється новим файлом (publish і rollback), тож його
+        mtime - час активації. Після rollback на старішу версію відлік іде
+        від rollback, а не від навчання цієї версії - інакше монітор одразу
+        перенавчив би модель і мовчки скасував rollback оператора.
+        """
+        pointer = os.path.join(self.district_dir(district_id), self.POINTER)
+        try:
+            return datetime.fromtimestamp(os.path.getmtime(pointer))
+        except FileNotFoundError:
+            return None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """Спільний реєстр процесу (один кеш завантажених моделей)"""
+    global _registry
+
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
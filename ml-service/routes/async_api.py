@@ -0,0 +1,133 @@
+# ml-service/routes/async_api.py
+"""
+Асинхронні версії read-heavy ендпоінтів (Quart blueprint)
+
+Обслуговуються ASGI-застосунком asgi_app.py (uvicorn), а не Flask:
+усі запити процесу ділять один event loop, і поки один чекає на БД,
+інші виконуються. Побудова прогнозів (CPU) винесена в asyncio.to_thread,
+щоб не блокувати loop.
+"""
+
+import asyncio
+import traceback
+from quart import Blueprint, request, jsonify
+from config import Config
+from utils.async_db_helper import AsyncDatabaseHelper
+from utils.forecasting import build_district_forecast, build_forecasts_for_districts
+
+async_bp = Blueprint('async_api', __name__)
+
+adb = AsyncDatabaseHelper()
+
+
+def parse_hours():
+    hours = request.args.get('hours', default=24, type=int)
+    if hours not in [12, 24, 48]:
+        hours = 24
+    return hours
+
+
+@async_bp.route('/predict/<int:district_id>', methods=['GET'])
+async def predict_district(district_id):
+    """Прогноз для одного району"""
+    try:
+        if district_id < 1 or district_id > 6:
+            return jsonify({'success': False, 'error': 'Invalid district_id'}), 400
+
+        hours = parse_hours()
+
+        df = await adb.get_training_data(district_id, days=2)
+        result, forecasts_df = await asyncio.to_thread(build_district_forecast, district_id, hours, df)
+
+        if forecasts_df is None:
+            return jsonify(result), 400
+
+        await adb.save_forecasts_for_districts({district_id: forecasts_df})
+
+        return jsonify(result)
+
+    except Exception as e:
+        print(f"❌ Помилка: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@async_bp.route('/predict/all', methods=['GET'])
+async def predict_all_districts():
+    """Прогноз для всіх районів: історія - одним запитом, збереження - одним INSERT"""
+    try:
+        hours = parse_hours()
+
+        district_ids = [district['id'] for district in Config.DISTRICTS]
+        windows = await adb.get_recent_windows(district_ids, hours=48)
+
+        results, forecasts_by_district = await asyncio.to_thread(
+            build_forecasts_for_districts, windows, hours
+        )
+
+        await adb.save_forecasts_for_districts(forecasts_by_district)
+
+        return jsonify({'success': True, 'results': results})
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@async_bp.route('/model/<int:district_id>/info', methods=['GET'])
+async def get_model_info(district_id):
+    """Отримати інформацію про модель"""
+    try:
+        stats = await adb.get_data_stats(district_id)
+        return jsonify({
+            'success': True,
+            'district_id': district_id,
+            'training_data': stats
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@async_bp.route('/model/info/all', methods=['GET'])
+async def get_all_models_info():
+    """Інформація про дані всіх районів (паралельні запити)"""
+    try:
+        district_ids = [district['id'] for district in Config.DISTRICTS]
+        stats = await adb.get_data_stats_for_districts(district_ids)
+
+        return jsonify({
+            'success': True,
+            'districts': [
+                {
+                    'district_id': district['id'],
+                    'district_name': district['name'],
+                    'training_data': stats[district['id']]
+                }
+                for district in Config.DISTRICTS
+            ]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@async_bp.route('/latest', methods=['GET'])
+async def get_latest_all():
+    """Останні вимірювання для всіх районів (одним запитом)"""
+    try:
+        hours = request.args.get('hours', default=Config.HISTORY_HOURS, type=int)
+
+        district_ids = [district['id'] for district in Config.DISTRICTS]
+        windows = await adb.get_recent_windows(district_ids, hours=hours)
+
+        return jsonify({
+            'success': True,
+            'hours': hours,
+            'data': {
+                str(district_id): [
+                    {**row, 'measured_at': row['measured_at'].isoformat()}
+                    for row in df.to_dict(orient='records')
+                ]
+                for district_id, df in windows.items()
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
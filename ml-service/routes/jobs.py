@@ -0,0 +1,116 @@
+# ml-service/routes/jobs.py
+"""
+Фонові задачі (/api/jobs): статус, стрімінг прогресу, скасування
+
+Ендпоінти, що ставлять задачу в чергу, відповідають job_accepted() (202),
+далі клієнт або опитує GET /api/jobs/<job_id>, або слухає
+GET /api/jobs/<job_id>/events (server-sent events).
+"""
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from utils import serialization
+from utils.job_manager import JobManager, get_job_manager
+
+jobs_bp = Blueprint('jobs', __name__)
+
+# Як часто слати keep-alive коментар, щоб проксі не закрив тихе з'єднання
+EVENTS_KEEPALIVE_SECONDS = 15
+
+
+def job_accepted(job, created):
+    """Відповідь 202 для поставленої (або вже активної) фонової задачі"""
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'deduplicated': not created,
+        'status_url': f'/api/jobs/{job.id}',
+        'events_url': f'/api/jobs/{job.id}/events',
+        'cancel_url': f'/api/jobs/{job.id}/cancel'
+    }), 202
+
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Статус, прогрес і результат фонової задачі"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
+
+
+@jobs_bp.route('', methods=['GET'])
+def list_jobs():
+    """Останні фонові задачі (без результатів)"""
+    kind = request.args.get('kind')
+    limit = request.args.get('limit', default=50, type=int)
+    return jsonify({'success': True, 'jobs': get_job_manager().list_jobs(kind=kind, limit=limit)})
+
+
+@jobs_bp.route('/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Скасувати задачу (зупиниться на найближчій перевірці, напр. після епохи)"""
+    manager = get_job_manager()
+    job = manager.cancel(job_id)
+
+    if job is None:
+        if manager.get(job_id) is None:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        return jsonify({'success': False, 'error': 'Job is already finished'}), 409
+
+    if job['status'] in JobManager.FINAL_STATUSES:
+        return jsonify({'success': False, 'error': 'Job is already finished', 'job': job}), 409
+
+    return jsonify({'success': True, 'job': job}), 202
+
+
+def format_event(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {serialization.dumps_response(data).decode()}')
+    return '\n'.join(lines) + '\n\n'
+
+
+@jobs_bp.route('/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Прогрес задачі як server-sent events
+
+    event: progress - кожна зміна стану (progress, message, details, eta_seconds) без результату
+    event: done     - фінальний стан разом з результатом; після нього потік закривається
+    """
+    manager = get_job_manager()
+
+    if manager.get(job_id) is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+
+    def stream():
+        version = -1
+
+        while True:
+            job = manager.wait_for_update(job_id, version, timeout=EVENTS_KEEPALIVE_SECONDS)
+
+            # Задачі вже немає в пам'яті - вона давно завершена, стан з диску
+            if job is None:
+                yield format_event('done', manager.get(job_id))
+                return
+
+            if job.version == version:
+                yield ': keep-alive\n\n'
+                continue
+
+            version = job.version
+            state = job.to_dict()
+
+            if state['status'] in JobManager.FINAL_STATUSES:
+                yield format_event('done', state, event_id=version)
+                return
+
+            state.pop('result', None)
+            yield format_event('progress', state, event_id=version)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
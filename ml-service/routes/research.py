@@ -1,27 +1,34 @@
 # ml-service/routes/research.py
 
+"""
+Дослідницькі ендпоінти (/api/research): навчання моделей на датасеті користувача
+
+Важкі бібліотеки (TensorFlow/Keras, XGBoost, scikit-learn, matplotlib)
+імпортуються при першому використанні, а не при імпорті модуля - інакше
+їх завантажував би кожен воркер прогнозного API ще до першого /health.
+
+Відповідь навчання містить LTTB-проріджені ряди для графіків (charts);
+PNG-графіки рендеряться у фоні й віддаються окремо: GET /plots/<job_id>/<name>.png
+
+Режим порівняння (config['algorithms']): дані готуються один раз, алгоритми
+навчаються паралельно в межах RESEARCH_COMPARE_CPUS і повертаються таблицею лідерів
+"""
 from flask import Blueprint, request, jsonify
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
+import threading
 import traceback
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import xgboost as xgb
-from tensorflow import keras  # type: ignore
-from tensorflow.keras import layers  # type: ignore
 import json
-import matplotlib
-matplotlib.use('Agg')  # Для серверного використання
-import matplotlib.pyplot as plt
-import seaborn as sns
-import io
-import base64
+from config import Config
+from utils.downsampling import lttb_indices
+from utils.plot_store import get_plot_store
 
 research_bp = Blueprint('research', __name__)
 
+RESEARCH_ALGORITHMS = ('xgboost', 'lstm', 'random_forest')
+
 def validate_dataset(df):
     """Перевірка обов'язкових колонок"""
     required_columns = [
@@ -36,56 +43,134 @@ def validate_dataset(df):
     return True
 
 def create_features(df, lag_hours=12, rolling_window=6):
-    """Створення lag та rolling features"""
-    feature_df = df.copy()
+    """
+    Створення lag та rolling features
     
+    Нові колонки збираються окремо (float32) і додаються одним concat -
+    без повної копії df та поколонкових вставок у великий DataFrame
+    """
     pollutants = ['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']
+    features = {}
     
     # Lag features
     for pollutant in pollutants:
         for lag in [1, 2, 3, 6, 12, 24]:
             if lag <= lag_hours:
-                feature_df[f'{pollutant}_lag_{lag}'] = feature_df[pollutant].shift(lag)
+                features[f'{pollutant}_lag_{lag}'] = df[pollutant].shift(lag).astype(np.float32)
     
     # Rolling features
     for pollutant in pollutants:
         for window in [3, 6, 12, 24]:
             if window <= rolling_window * 2:
-                feature_df[f'{pollutant}_rolling_{window}'] = (
-                    feature_df[pollutant].rolling(window=window).mean()
+                features[f'{pollutant}_rolling_{window}'] = (
+                    df[pollutant].rolling(window=window).mean().astype(np.float32)
                 )
     
     # Часові features
-    feature_df['hour'] = pd.to_datetime(feature_df['timestamp']).dt.hour
-    feature_df['day_of_week'] = pd.to_datetime(feature_df['timestamp']).dt.dayofweek
-    feature_df['month'] = pd.to_datetime(feature_df['timestamp']).dt.month
+    timestamps = pd.to_datetime(df['timestamp'])
+    features['hour'] = timestamps.dt.hour.astype(np.int8)
+    features['day_of_week'] = timestamps.dt.dayofweek.astype(np.int8)
+    features['month'] = timestamps.dt.month.astype(np.int8)
     
-    # Видаляємо рядки з NaN (через lag і rolling)
-    feature_df = feature_df.dropna()
+    feature_df = pd.concat([df, pd.DataFrame(features, index=df.index)], axis=1)
     
-    return feature_df
+    # Видаляємо рядки з NaN (через lag і rolling)
+    return feature_df.dropna()
+
+# Частка загального прогресу задачі, відведена на навчання моделі
+TRAINING_PROGRESS = (0.1, 0.85)
+
+def report_training_step(job, step, total, **details):
+    """
+    Прогрес навчання: крок step з total (епоха, дерево, параметр)
+    Перевіряє скасування на кожному кроці; job.update - не частіше ~100 разів за навчання
+    """
+    if job is None:
+        return
+    
+    job.check_cancelled()
+    
+    every = max(1, total // 100)
+    if step % every and step != total:
+        return
+    
+    start, end = TRAINING_PROGRESS
+    job.update(
+        progress=start + (end - start) * step / total,
+        message=f'Навчання: {step}/{total}',
+        step=step, total=total,
+        **{name: round(float(value), 6) for name, value in details.items() if value is not None}
+    )
+
+class AlgorithmProgress:
+    """
+    Прогрес одного з алгоритмів, що навчаються паралельно (режим порівняння)
+    
+    Підставляється замість job у train_*_model: той самий check_cancelled/update,
+    але загальний прогрес задачі - середнє по всіх алгоритмах порівняння
+    """
+    
+    def __init__(self, job, algorithm, progress, lock):
+        self.job = job
+        self.algorithm = algorithm
+        self._progress = progress  # спільний dict: алгоритм -> прогрес
+        self._lock = lock
+    
+    def check_cancelled(self):
+        self.job.check_cancelled()
+    
+    def update(self, progress=None, message=None, **details):
+        with self._lock:
+            if progress is not None:
+                self._progress[self.algorithm] = progress
+            self.job.update(
+                progress=sum(self._progress.values()) / len(self._progress),
+                message=f'{self.algorithm}: {message}' if message else None,
+                algorithm=self.algorithm,
+                **details
+            )
 
-def train_xgboost_model(X_train, y_train, X_test, y_test, config):
-    """Тренування XGBoost моделі"""
+def train_xgboost_model(X_train, y_train, X_test, y_test, config, job=None, n_jobs=None):
+    """Тренування XGBoost моделі (прогрес - після кожного boosting-раунду; n_jobs=None - усі CPU)"""
     print("🚀 Тренування XGBoost...")
     
+    import xgboost as xgb
+    
+    n_estimators = config.get('epochs', 100)
+    
+    class ProgressCallback(xgb.callback.TrainingCallback):
+        def after_iteration(self, model, epoch, evals_log):
+            report_training_step(
+                job, epoch + 1, n_estimators,
+                loss=evals_log['validation_0']['rmse'][-1],
+                val_loss=evals_log['validation_1']['rmse'][-1]
+            )
+            return False
+    
     model = xgb.XGBRegressor(
-        n_estimators=config.get('epochs', 100),
+        n_estimators=n_estimators,
         learning_rate=config.get('learningRate', 0.001),
         max_depth=6,
-        random_state=42
+        random_state=42,
+        n_jobs=n_jobs,
+        callbacks=[ProgressCallback()] if job is not None else None
     )
     
-    model.fit(X_train, y_train)
+    if job is not None:
+        # eval_set лише для звіту loss по раундах (без early stopping - на модель не впливає)
+        model.fit(X_train, y_train, eval_set=[(X_train, y_train), (X_test, y_test)], verbose=False)
+    else:
+        model.fit(X_train, y_train)
     
     predictions = model.predict(X_test)
     
     return model, predictions
 
-def train_random_forest_model(X_train, y_train, X_test, y_test, config):
-    """Тренування Random Forest моделі"""
+def train_random_forest_model(X_train, y_train, X_test, y_test, config, job=None, n_jobs=None):
+    """Тренування Random Forest моделі (прогрес - після кожного параметру; n_jobs=None - усі CPU)"""
     print("🚀 Тренування Random Forest...")
     
+    from sklearn.base import clone
     from sklearn.ensemble import RandomForestRegressor
     from sklearn.multioutput import MultiOutputRegressor
     
@@ -96,26 +181,61 @@ def train_random_forest_model(X_train, y_train, X_test, y_test, config):
         min_samples_split=5,
         min_samples_leaf=2,
         random_state=42,
-        n_jobs=-1,  # Використовувати всі CPU
+        n_jobs=n_jobs or -1,
         verbose=0
     )
     
-    # MultiOutput для багатьох параметрів
+    # MultiOutput для багатьох параметрів: по одному лісу на параметр, як у
+    # MultiOutputRegressor.fit, але з прогресом і скасуванням між ними
     model = MultiOutputRegressor(base_model)
+    model.estimators_ = []
     
-    model.fit(X_train, y_train)
+    n_targets = y_train.shape[1]
+    for i in range(n_targets):
+        model.estimators_.append(clone(base_model).fit(X_train, y_train[:, i]))
+        report_training_step(job, i + 1, n_targets)
     
     predictions = model.predict(X_test)
     
     return model, predictions
 
-def train_lstm_model(X_train, y_train, X_test, y_test, config):
-    """Тренування LSTM моделі"""
+def train_lstm_model(X_train, y_train, X_test, y_test, config, job=None, n_jobs=None):
+    """
+    Тренування LSTM моделі на послідовностях (прогрес - після кожної епохи)
+    
+    Вхід - вікна останніх lookback годин (config['lookback'], за замовчуванням 24).
+    Вікна - view над одним масивом X (data.sequence_windows), батчі збирає tf.data.
+    Перші тестові вікна беруть історію з кінця train, тож прогноз є для кожного рядка y_test.
+    n_jobs обмежує лише потоки tf.data: пул операцій TensorFlow спільний для процесу.
+    """
     print("🚀 Тренування LSTM...")
     
-    # Решейпимо для LSTM (samples, timesteps, features)
-    X_train_reshaped = X_train.reshape((X_train.shape[0], 1, X_train.shape[1]))
-    X_test_reshaped = X_test.reshape((X_test.shape[0], 1, X_test.shape[1]))
+    from tensorflow import keras  # type: ignore
+    from tensorflow.keras import layers  # type: ignore
+    from data.sequence_windows import SequenceWindows
+    
+    n_train = len(X_train)
+    requested_lookback = int(config.get('lookback', Config.RESEARCH_LSTM_LOOKBACK))
+    # Вікно не довше половини train - інакше прикладів для навчання майже не лишиться
+    lookback = max(1, min(requested_lookback, Config.RESEARCH_LSTM_MAX_LOOKBACK, n_train // 2))
+    if lookback != requested_lookback:
+        print(f"⚠️ lookback обмежено: {requested_lookback} → {lookback}")
+    
+    # Одна суцільна копія train+test; усі вікна нижче - її view
+    X_all = np.concatenate([X_train, X_test]).astype(np.float32, copy=False)
+    y_all = np.concatenate([y_train, y_test]).astype(np.float32, copy=False)
+    
+    # Останні 20% train-прикладів - валідація (як validation_split у Keras)
+    train_targets = np.arange(lookback - 1, n_train)
+    n_val = max(1, int(len(train_targets) * 0.2))
+    batch_size = config.get('batchSize', 32)
+    
+    train_windows = SequenceWindows(X_all, y_all, lookback, targets=train_targets[:-n_val])
+    val_windows = SequenceWindows(X_all, y_all, lookback, targets=train_targets[-n_val:])
+    test_windows = SequenceWindows(X_all, y_all, lookback, targets=np.arange(n_train, len(X_all)))
+    
+    print(f"🪟 Вікна: lookback={lookback}, train/val/test = "
+          f"{len(train_windows)}/{len(val_windows)}/{len(test_windows)}")
     
     # Будуємо модель
     model = keras.Sequential()
@@ -128,7 +248,7 @@ def train_lstm_model(X_train, y_train, X_test, y_test, config):
     model.add(layers.LSTM(
         neurons[0] if len(neurons) > 0 else 128,
         return_sequences=(hidden_layers > 1),
-        input_shape=(1, X_train.shape[1])
+        input_shape=(lookback, X_train.shape[1])
     ))
     model.add(layers.Dropout(dropout))
     
@@ -151,21 +271,34 @@ def train_lstm_model(X_train, y_train, X_test, y_test, config):
         metrics=['mae']
     )
     
+    epochs = config.get('epochs', 100)
+    
+    class ProgressCallback(keras.callbacks.Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            logs = logs or {}
+            report_training_step(
+                job, epoch + 1, epochs,
+                loss=logs.get('loss'), val_loss=logs.get('val_loss'),
+                mae=logs.get('mae'), val_mae=logs.get('val_mae')
+            )
+    
     # Тренування
     history = model.fit(
-        X_train_reshaped, y_train,
-        epochs=config.get('epochs', 100),
-        batch_size=config.get('batchSize', 32),
-        validation_split=0.2,
-        verbose=0
+        train_windows.to_dataset(batch_size, shuffle=True, threads=n_jobs),
+        validation_data=val_windows.to_dataset(batch_size, threads=n_jobs),
+        epochs=epochs,
+        verbose=0,
+        callbacks=[ProgressCallback()] if job is not None else None
     )
     
-    predictions = model.predict(X_test_reshaped, verbose=0)
+    predictions = model.predict(test_windows.to_dataset(batch_size, threads=n_jobs), verbose=0)
     
     return model, predictions, history.history
 
 def calculate_metrics(y_true, y_pred, pollutants):
     """Обчислення метрик для кожного параметру"""
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+    
     metrics = {}
     
     for i, pollutant in enumerate(pollutants):
@@ -184,125 +317,385 @@ def calculate_metrics(y_true, y_pred, pollutants):
     
     return metrics
 
-def generate_plots(y_test, predictions, pollutants, training_history=None):
-    """Генерація графіків як base64"""
-    plots = {}
+def build_chart_series(y_test, predictions, pollutants, training_history=None, points=None):
+    """
+    Дані для графіків: LTTB-проріджені ряди (не більше points точок на ряд)
+    
+    Фронтенд малює з них графіки сам; з них же рендеряться PNG (utils.plot_store).
+    Гістограма залишків рахується з усіх точок тестового набору.
+    """
+    points = points or Config.RESEARCH_CHART_POINTS
+    series = {}
+    
+    for idx, param in enumerate(pollutants):
+        actual = y_test[:, idx]
+        predicted = predictions[:, idx]
+        keep = lttb_indices(actual, points)
+        
+        residuals = actual - predicted
+        counts, edges = np.histogram(residuals[np.isfinite(residuals)], bins=20)
+        
+        series[param] = {
+            'index': keep,
+            'actual': np.round(actual[keep], 3),
+            'predicted': np.round(predicted[keep], 3),
+            'residual_histogram': {'counts': counts, 'edges': np.round(edges, 3)}
+        }
     
-    try:
-        # 1. Actual vs Predicted для кожного параметру
-        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
-        fig.suptitle('Actual vs Predicted Values', fontsize=16, fontweight='bold')
-        
-        for idx, param in enumerate(pollutants):
-            ax = axes[idx // 3, idx % 3]
-            
-            y_true = y_test[:, idx]
-            y_pred = predictions[:, idx]
-            
-            ax.plot(y_true, label='Actual', linewidth=2, alpha=0.7)
-            ax.plot(y_pred, label='Predicted', linewidth=2, alpha=0.7)
-            ax.set_title(f'{param.upper()}', fontweight='bold')
-            ax.set_xlabel('Sample')
-            ax.set_ylabel('Value')
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        
-        # Конвертація в base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-        buffer.seek(0)
-        plots['actual_vs_predicted'] = base64.b64encode(buffer.read()).decode()
-        plt.close()
-        
-        # 2. Scatter plots (кореляція)
-        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
-        fig.suptitle('Correlation: Actual vs Predicted', fontsize=16, fontweight='bold')
-        
-        for idx, param in enumerate(pollutants):
-            ax = axes[idx // 3, idx % 3]
-            
-            y_true = y_test[:, idx]
-            y_pred = predictions[:, idx]
-            
-            ax.scatter(y_true, y_pred, alpha=0.5, s=30)
-            
-            # Лінія ідеальної кореляції
-            min_val = min(y_true.min(), y_pred.min())
-            max_val = max(y_true.max(), y_pred.max())
-            ax.plot([min_val, max_val], [min_val, max_val], 'r--', linewidth=2, label='Perfect correlation')
-            
-            ax.set_title(f'{param.upper()}', fontweight='bold')
-            ax.set_xlabel('Actual')
-            ax.set_ylabel('Predicted')
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-        buffer.seek(0)
-        plots['scatter_plots'] = base64.b64encode(buffer.read()).decode()
-        plt.close()
-        
-        # 3. Loss curve (якщо є історія тренування)
-        if training_history and 'loss' in training_history:
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            ax.plot(training_history['loss'], label='Training Loss', linewidth=2)
-            if 'val_loss' in training_history:
-                ax.plot(training_history['val_loss'], label='Validation Loss', linewidth=2)
-            
-            ax.set_title('Training History', fontsize=14, fontweight='bold')
-            ax.set_xlabel('Epoch')
-            ax.set_ylabel('Loss')
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-            
-            plt.tight_layout()
-            
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-            buffer.seek(0)
-            plots['loss_curve'] = base64.b64encode(buffer.read()).decode()
-            plt.close()
-        
-        # 4. Residuals (помилки)
-        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
-        fig.suptitle('Prediction Residuals', fontsize=16, fontweight='bold')
+    charts = {'points': len(y_test), 'series': series}
+    
+    if training_history and 'loss' in training_history:
+        loss = np.asarray(training_history['loss'], dtype=np.float64)
+        keep = lttb_indices(loss, points)
+        charts['loss'] = {'epoch': keep + 1, 'loss': np.round(loss[keep], 6)}
+        if 'val_loss' in training_history:
+            charts['loss']['val_loss'] = np.round(
+                np.asarray(training_history['val_loss'], dtype=np.float64)[keep], 6
+            )
+    
+    return charts
+
+# Версія підготовки даних (create_features + split + scaler) у ключі кешу;
+# збільшити при зміні набору features, щоб не брати застарілі матриці
+FEATURES_VERSION = 1
+
+def prepared_data_key(file_hash, config):
+    """Ключ кешу підготовлених матриць: вміст файлу + параметри, від яких вони залежать"""
+    return {
+        'file': file_hash,
+        'lagHours': float(config.get('lagHours', 12)),
+        'rollingWindow': float(config.get('rollingWindow', 6)),
+        'trainSplit': float(config.get('trainSplit', 80)),
+        'features': FEATURES_VERSION
+    }
+
+def prepare_training_data(df, config):
+    """
+    Feature engineering + train/test split + нормалізація
+    
+    Returns:
+        dict: X_train, X_test, y_train, y_test (float32), feature_cols, total_rows;
+        або {'success': False, 'error': ...}
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    
+    # Feature engineering
+    print("\n🔧 Feature Engineering...")
+    df_features = create_features(
+        df,
+        lag_hours=config.get('lagHours', 12),
+        rolling_window=config.get('rollingWindow', 6)
+    )
+    print(f"✅ Features створено: {len(df_features)} рядків, {len(df_features.columns)} колонок")
+
+    if len(df_features) < 30:
+        return {
+            'success': False,
+            'error': f'Після feature engineering залишилось {len(df_features)} рядків (потрібно мінімум 30). '
+                    f'Спробуйте: 1) Завантажити більше даних (100+ рядків), '
+                    f'2) Зменшити lag_hours та rolling_window у налаштуваннях.'
+        }
+    
+    # Підготовка даних
+    pollutants = ['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']
+    
+    # X - всі фічі крім target і timestamp
+    feature_cols = [col for col in df_features.columns 
+                   if col not in pollutants + ['timestamp']]
+    X = df_features[feature_cols].to_numpy(dtype=np.float32)
+    y = df_features[pollutants].to_numpy(dtype=np.float32)
+    del df_features
+    
+    print(f"📐 X shape: {X.shape}, y shape: {y.shape}")
+    
+    # Train/Test split
+    train_split = config.get('trainSplit', 80) / 100
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, train_size=train_split, shuffle=False
+    )
+    
+    print(f"✅ Train/Test split: {len(X_train)}/{len(X_test)}")
+    
+    # Нормалізація
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train).astype(np.float32, copy=False)
+    X_test = scaler.transform(X_test).astype(np.float32, copy=False)
+    
+    print("✅ Дані нормалізовано")
+    
+    return {
+        'X_train': X_train,
+        'X_test': X_test,
+        'y_train': y_train,
+        'y_test': y_test,
+        'feature_cols': feature_cols,
+        'total_rows': len(df)
+    }
+
+def load_prepared_data(job, file_hash, config, df=None):
+    """
+    Підготовлені матриці з кешу за (file_hash, lagHours, rollingWindow, trainSplit);
+    якщо їх немає - розібраний датасет (df або кеш) проходить prepare_training_data
+    """
+    from data.dataset_cache import get_dataset_cache
+    
+    cache = get_dataset_cache()
+    key = prepared_data_key(file_hash, config)
+    
+    prepared = cache.load_prepared(key)
+    if prepared is not None:
+        print(f"⚡ Підготовлені дані з кешу: {file_hash[:12]}")
+        return prepared
+    
+    job.update(progress=0.02, message='Feature engineering')
+    
+    if df is None:
+        df = cache.load_parsed(file_hash)
+        if df is None:
+            return {'success': False, 'error': 'Датасет більше недоступний у кеші, завантажте файл повторно'}
+    
+    prepared = prepare_training_data(df, config)
+    if prepared.get('success') is False:
+        return prepared
+    
+    cache.save_prepared(key, prepared)
+    return prepared
+
+def format_training_time(seconds):
+    return f"{int(seconds // 60)} хв {int(seconds % 60)} сек"
+
+def train_algorithm(algorithm, prepared, config, job=None, n_jobs=None):
+    """
+    Навчання одного алгоритму на підготовлених даних
+    
+    Returns:
+        tuple: (predictions, training_history або None, час навчання в секундах)
+    """
+    X_train, X_test = prepared['X_train'], prepared['X_test']
+    y_train, y_test = prepared['y_train'], prepared['y_test']
+    
+    start_time = datetime.now()
+    training_history = None
+
+    if algorithm == 'xgboost':
+        model, predictions = train_xgboost_model(X_train, y_train, X_test, y_test, config, job=job, n_jobs=n_jobs)
+    elif algorithm == 'lstm':
+        model, predictions, training_history = train_lstm_model(
+            X_train, y_train, X_test, y_test, config, job=job, n_jobs=n_jobs
+        )
+    elif algorithm == 'random_forest':
+        model, predictions = train_random_forest_model(X_train, y_train, X_test, y_test, config, job=job, n_jobs=n_jobs)
+    else:
+        raise ValueError(f'Невідомий алгоритм: {algorithm}')
+    
+    training_time = (datetime.now() - start_time).total_seconds()
+    print(f"✅ {algorithm}: модель натренована за {training_time:.1f} секунд")
+    
+    return predictions, training_history, training_time
+
+def compare_algorithms(job, prepared, config, algorithms):
+    """
+    Паралельне навчання кількох алгоритмів на одних підготовлених даних
+    
+    CPU-бюджет RESEARCH_COMPARE_CPUS ділиться порівну між алгоритмами (n_jobs
+    для XGBoost/Random Forest, потоки tf.data для LSTM). Помилка одного
+    алгоритму не зупиняє інших - він потрапляє в кінець таблиці з error.
+    
+    Returns:
+        tuple: (leaderboard - за зростанням середнього MAE, {алгоритм: (predictions, history)})
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from utils.job_manager import JobCancelled
+    
+    pollutants = ['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']
+    n_jobs = max(1, Config.RESEARCH_COMPARE_CPUS // len(algorithms))
+    print(f"🏁 Порівняння {', '.join(algorithms)}: по {n_jobs} CPU на алгоритм")
+    
+    progress = {algorithm: TRAINING_PROGRESS[0] for algorithm in algorithms}
+    progress_lock = threading.Lock()
+    
+    entries = []
+    outputs = {}
+    
+    with ThreadPoolExecutor(max_workers=len(algorithms), thread_name_prefix='compare') as executor:
+        futures = {
+            executor.submit(
+                train_algorithm, algorithm, prepared, config,
+                job=AlgorithmProgress(job, algorithm, progress, progress_lock),
+                n_jobs=n_jobs
+            ): algorithm
+            for algorithm in algorithms
+        }
         
-        for idx, param in enumerate(pollutants):
-            ax = axes[idx // 3, idx % 3]
+        for future in as_completed(futures):
+            algorithm = futures[future]
             
-            y_true = y_test[:, idx]
-            y_pred = predictions[:, idx]
-            residuals = y_true - y_pred
+            try:
+                predictions, training_history, training_time = future.result()
+            except JobCancelled:
+                # Решта алгоритмів перевіряють той самий прапорець і зупиняться на наступному кроці
+                raise
+            except Exception as e:
+                print(f"❌ {algorithm}: {e}")
+                entries.append({'algorithm': algorithm, 'success': False, 'error': str(e)})
+                continue
             
-            ax.hist(residuals, bins=20, edgecolor='black', alpha=0.7)
-            ax.axvline(0, color='red', linestyle='--', linewidth=2)
-            ax.set_title(f'{param.upper()}', fontweight='bold')
-            ax.set_xlabel('Residual (Actual - Predicted)')
-            ax.set_ylabel('Frequency')
-            ax.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
+            metrics = calculate_metrics(prepared['y_test'], predictions, pollutants)
+            outputs[algorithm] = (predictions, training_history)
+            entries.append({
+                'algorithm': algorithm,
+                'success': True,
+                'metrics': metrics,
+                'mae': round(float(np.mean([m['mae'] for m in metrics.values()])), 2),
+                'rmse': round(float(np.mean([m['rmse'] for m in metrics.values()])), 2),
+                'r2': round(float(np.mean([m['r2'] for m in metrics.values()])), 4),
+                'trainingTime': format_training_time(training_time),
+                'trainingSeconds': round(training_time, 1)
+            })
+    
+    leaderboard = sorted(entries, key=lambda entry: (not entry['success'], entry.get('mae', 0)))
+    for rank, entry in enumerate(leaderboard, start=1):
+        entry['rank'] = rank
+    
+    return leaderboard, outputs
+
+def run_custom_training(job, file_hash, config, df=None):
+    """
+    Навчання custom моделі на датасеті користувача
+    Виконується як фонова задача (див. POST /train-custom)
+    
+    Повторний запуск на тому самому файлі з тими ж lagHours/rollingWindow/trainSplit
+    бере матриці з кешу - перезапускається лише навчання моделі.
+    
+    config['algorithms'] (список) - режим порівняння: відповідь містить leaderboard,
+    а метрики, графіки й поля верхнього рівня - найкращого алгоритму
+    """
+    prepared = load_prepared_data(job, file_hash, config, df)
+    if prepared.get('success') is False:
+        return prepared
+    del df
+    
+    pollutants = ['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']
+    algorithms = config.get('algorithms')
+    leaderboard = None
+    
+    # Тренування моделі
+    if algorithms:
+        job.update(progress=TRAINING_PROGRESS[0], message=f'Навчання: {", ".join(algorithms)}')
+        leaderboard, outputs = compare_algorithms(job, prepared, config, algorithms)
         
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
-        buffer.seek(0)
-        plots['residuals'] = base64.b64encode(buffer.read()).decode()
-        plt.close()
+        if not outputs:
+            return {
+                'success': False,
+                'error': 'Жоден алгоритм не навчився: ' + '; '.join(
+                    f"{entry['algorithm']}: {entry['error']}" for entry in leaderboard
+                ),
+                'leaderboard': leaderboard
+            }
+        
+        best = leaderboard[0]
+        algorithm = best['algorithm']
+        predictions, training_history = outputs[algorithm]
+        training_time = best['trainingSeconds']
+        metrics = best['metrics']
+    else:
+        algorithm = config.get('algorithm', 'xgboost')
+        job.update(progress=TRAINING_PROGRESS[0], message=f'Навчання {algorithm}')
+        predictions, training_history, training_time = train_algorithm(algorithm, prepared, config, job=job)
         
-    except Exception as e:
-        print(f"⚠️ Помилка генерації графіків: {str(e)}")
+        # Обчислення метрик
+        job.update(progress=0.88, message='Обчислення метрик')
+        metrics = calculate_metrics(prepared['y_test'], predictions, pollutants)
+    
+    print("\n📊 МЕТРИКИ:")
+    for param, m in metrics.items():
+        print(f"   {param.upper()}: MAE={m['mae']}, RMSE={m['rmse']}, R²={m['r2']}")
+    
+    # Ряди для графіків; PNG рендеряться у фоні, задача їх не чекає
+    job.check_cancelled()
+    job.update(progress=0.9, message='Підготовка графіків')
+    charts = build_chart_series(prepared['y_test'], predictions, pollutants, training_history)
+    plot_names = get_plot_store().submit(job.id, charts)
+    print(f"📈 Графіки ({len(plot_names)}) поставлено на рендер")
+    
+    # Формуємо відповідь
+    response = {
+        'success': True,
+        'algorithm': algorithm,
+        'metrics': metrics,
+        'trainingTime': format_training_time(training_time),
+        'finalLoss': round(float(np.mean([m['mae'] for m in metrics.values()])), 2),
+        'finalValLoss': round(float(np.mean([m['rmse'] for m in metrics.values()])), 2),
+        'charts': charts,
+        # Шляхи відносно /api/research
+        'plots': {name: f'plots/{job.id}/{name}.png' for name in plot_names},
+        'datasetInfo': {
+            'totalRows': prepared['total_rows'],
+            'trainRows': len(prepared['X_train']),
+            'testRows': len(prepared['X_test']),
+            'features': len(prepared['feature_cols'])
+        },
+        'config': config
+    }
+    if leaderboard is not None:
+        response['leaderboard'] = leaderboard
+    
+    print("\n✅ TRAINING COMPLETED SUCCESSFULLY")
+    print("="*70 + "\n")
+    
+    return response
+
+def load_uploaded_dataset(file):
+    """
+    Розбір і валідація завантаженого файлу
     
-    return plots
+    Returns:
+        DataFrame або (response, status) з помилкою
+    """
+    # Читаємо CSV (частинами) / Parquet / Feather з float32-схемою та лімітами
+    from data.dataset_loader import DatasetInvalid, DatasetLoader, DatasetTooLarge
+    
+    try:
+        df = DatasetLoader().load(file.stream, file.filename)
+    except DatasetTooLarge as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
+    except DatasetInvalid as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    memory_mb = df.memory_usage(deep=True).sum() / (1024 * 1024)
+    print(f"✅ Датасет завантажено: {len(df)} рядків, {len(df.columns)} колонок, {memory_mb:.1f} MB")
+    print(f"📊 Колонки: {list(df.columns)}")
+    
+    # Валідація
+    validate_dataset(df)
+    print("✅ Валідація пройдена")
+
+    # Перевірка мінімальної кількості даних
+    if len(df) < 50:
+        return jsonify({
+            'success': False,
+            'error': f'Недостатньо даних: {len(df)} рядків. Потрібно мінімум 50 рядків для тренування моделі.'
+        }), 400
+
+    print(f"✅ Достатньо даних для тренування")
+    return df
 
 @research_bp.route('/train-custom', methods=['POST'])
 def train_custom_model():
-    """Тренування custom моделі на user's датасеті"""
+    """
+    Тренування custom моделі на user's датасеті (фонова задача)
+    
+    Датасет читається і валідується в запиті, навчання - у фоні.
+    Файл ідентифікується за sha256 вмісту: вже відомий датасет не розбирається
+    повторно, а за тих самих lagHours/rollingWindow/trainSplit береться з кешу
+    разом із підготовленими матрицями.
+    Прогрес (епоха, loss, ETA): GET /api/jobs/<job_id> або /api/jobs/<job_id>/events (SSE),
+    скасування: POST /api/jobs/<job_id>/cancel
+    """
+    from routes.jobs import job_accepted
+    from utils.job_manager import get_job_manager
+    
     try:
         print("\n" + "="*70)
         print("🔬 CUSTOM MODEL TRAINING STARTED")
@@ -318,118 +711,44 @@ def train_custom_model():
         print(f"📁 Файл: {file.filename}")
         print(f"⚙️ Конфігурація: {json.dumps(config, indent=2)}")
         
-        # Читаємо CSV
-        df = pd.read_csv(file)
-        print(f"✅ Датасет завантажено: {len(df)} рядків, {len(df.columns)} колонок")
-        print(f"📊 Колонки: {list(df.columns)}")
-        
-        # Валідація
-        validate_dataset(df)
-        print("✅ Валідація пройдена")
-
-        # Перевірка мінімальної кількості даних
-        if len(df) < 50:
-            return jsonify({
-                'success': False,
-                'error': f'Недостатньо даних: {len(df)} рядків. Потрібно мінімум 50 рядків для тренування моделі.'
-            }), 400
-
-        print(f"✅ Достатньо даних для тренування")
-        
-        # Feature engineering
-        print("\n🔧 Feature Engineering...")
-        df_features = create_features(
-            df,
-            lag_hours=config.get('lagHours', 12),
-            rolling_window=config.get('rollingWindow', 6)
-        )
-        print(f"✅ Features створено: {len(df_features)} рядків, {len(df_features.columns)} колонок")
-
-        if len(df_features) < 30:
-            return jsonify({
-                'success': False,
-                'error': f'Після feature engineering залишилось {len(df_features)} рядків (потрібно мінімум 30). '
-                        f'Спробуйте: 1) Завантажити більше даних (100+ рядків), '
-                        f'2) Зменшити lag_hours та rolling_window у налаштуваннях.'
-            }), 40
-        
-        # Підготовка даних
-        pollutants = ['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']
-        
-        # X - всі фічі крім target і timestamp
-        feature_cols = [col for col in df_features.columns 
-                       if col not in pollutants + ['timestamp']]
-        X = df_features[feature_cols].values
-        y = df_features[pollutants].values
-        
-        print(f"📐 X shape: {X.shape}, y shape: {y.shape}")
-        
-        # Train/Test split
-        train_split = config.get('trainSplit', 80) / 100
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, train_size=train_split, shuffle=False
-        )
-        
-        print(f"✅ Train/Test split: {len(X_train)}/{len(X_test)}")
-        
-        # Нормалізація
-        scaler = StandardScaler()
-        X_train = scaler.fit_transform(X_train)
-        X_test = scaler.transform(X_test)
-        
-        print("✅ Дані нормалізовано")
-        
-        # Тренування моделі
-        start_time = datetime.now()
-        algorithm = config.get('algorithm', 'xgboost')
-
-        if algorithm == 'xgboost':
-            model, predictions = train_xgboost_model(X_train, y_train, X_test, y_test, config)
-            training_history = None
-        elif algorithm == 'lstm':
-            model, predictions, training_history = train_lstm_model(X_train, y_train, X_test, y_test, config)
-        elif algorithm == 'random_forest':  # 🆕 ДОДАЙ ЦЕ
-            model, predictions = train_random_forest_model(X_train, y_train, X_test, y_test, config)
-            training_history = None
+        algorithms = config.get('algorithms')
+        if algorithms is not None:
+            if not isinstance(algorithms, list) or not algorithms:
+                return jsonify({'success': False, 'error': 'algorithms має бути непорожнім списком'}), 400
+            # Порядок користувача, без повторів
+            config['algorithms'] = algorithms = list(dict.fromkeys(algorithms))
         else:
-            return jsonify({'success': False, 'error': f'Невідомий алгоритм: {algorithm}'}), 400
-        
-        training_time = (datetime.now() - start_time).total_seconds()
-        print(f"✅ Модель натренована за {training_time:.1f} секунд")
+            algorithms = [config.get('algorithm', 'xgboost')]
         
-        # Обчислення метрик
-        metrics = calculate_metrics(y_test, predictions, pollutants)
-        
-        print("\n📊 МЕТРИКИ:")
-        for param, m in metrics.items():
-            print(f"   {param.upper()}: MAE={m['mae']}, RMSE={m['rmse']}, R²={m['r2']}")
+        unknown = [algorithm for algorithm in algorithms if algorithm not in RESEARCH_ALGORITHMS]
+        if unknown:
+            return jsonify({'success': False, 'error': f'Невідомий алгоритм: {", ".join(map(str, unknown))}'}), 400
         
-        # Генерація графіків
-        print("\n📈 Генерація візуалізацій...")
-        plots = generate_plots(y_test, predictions, pollutants, training_history)
-        print(f"✅ Створено {len(plots)} графіків")
-        
-        # Формуємо відповідь
-        response = {
-            'success': True,
-            'metrics': metrics,
-            'trainingTime': f"{int(training_time // 60)} хв {int(training_time % 60)} сек",
-            'finalLoss': round(float(np.mean([m['mae'] for m in metrics.values()])), 2),
-            'finalValLoss': round(float(np.mean([m['rmse'] for m in metrics.values()])), 2),
-            'plots': plots,  # 🆕 ДОДАЙ ЦЕ
-            'datasetInfo': {
-                'totalRows': len(df),
-                'trainRows': len(X_train),
-                'testRows': len(X_test),
-                'features': len(feature_cols)
-            },
-            'config': config
-        }
+        # Відбиток вмісту: повторне завантаження того самого файлу не розбирається заново
+        from data.dataset_cache import fingerprint, get_dataset_cache
         
-        print("\n✅ TRAINING COMPLETED SUCCESSFULLY")
-        print("="*70 + "\n")
+        cache = get_dataset_cache()
+        file_hash = fingerprint(file.stream)
+        print(f"🔑 Відбиток файлу: {file_hash[:12]}")
         
-        return jsonify(response)
+        df = None
+        if cache.has_prepared(prepared_data_key(file_hash, config)):
+            print("⚡ Підготовлені дані вже в кеші - розбір файлу пропущено")
+        else:
+            df = cache.load_parsed(file_hash)
+            if df is not None:
+                print(f"⚡ Датасет з кешу: {len(df)} рядків")
+            else:
+                df = load_uploaded_dataset(file)
+                if isinstance(df, tuple):
+                    return df
+                cache.save_parsed(file_hash, df)
+        
+        job, created = get_job_manager().submit(
+            'train_custom', run_custom_training, file_hash, config, df=df,
+            params={'filename': file.filename, 'fileHash': file_hash, 'algorithm': ', '.join(algorithms)}
+        )
+        return job_accepted(job, created)
         
     except Exception as e:
         print(f"\n❌ ERROR: {str(e)}")
@@ -438,4 +757,22 @@ def train_custom_model():
             'success': False,
             'error': str(e),
             'traceback': traceback.format_exc()
-        }), 500
\ No newline at end of file
+        }), 500
+
+@research_bp.route('/plots/<job_id>/<name>.png', methods=['GET'])
+def get_plot(job_id, name):
+    """PNG-графік задачі навчання (якщо рендер ще триває - чекає до PLOT_WAIT_SECONDS)"""
+    from concurrent.futures import TimeoutError as FutureTimeoutError
+    from flask import send_file
+    
+    try:
+        path = get_plot_store().get_png(job_id, name, timeout=Config.PLOT_WAIT_SECONDS)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid job_id'}), 400
+    except FutureTimeoutError:
+        return jsonify({'success': False, 'error': 'Plot is still rendering'}), 503
+    
+    if path is None:
+        return jsonify({'success': False, 'error': 'Plot not found'}), 404
+    
+    return send_file(path, mimetype='image/png', max_age=3600)
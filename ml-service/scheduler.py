@@ -1,43 +1,26 @@
 # ml-service/scheduler.py
-import schedule
-import time
-import requests
-from datetime import datetime
-
-def check_and_retrain_all():
-    """Перевірити всі моделі та перенавчити якщо потрібно"""
-    print(f"\n{'='*70}")
-    print(f"⏰ AUTO-CHECK: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"{'='*70}")
-    
-    try:
-        response = requests.post('http://localhost:5001/api/monitor/all')
-        data = response.json()
-        
-        if data.get('success'):
-            for result in data.get('results', []):
-                district_id = result.get('district_id')
-                retrained = result.get('retrained')
-                
-                if retrained:
-                    print(f"🔄 Район {district_id}: Модель перенавчена (виявлено drift)")
-                else:
-                    print(f"✅ Район {district_id}: Модель працює нормально")
-        
-    except Exception as e:
-        print(f"❌ Помилка: {e}")
-    
-    print(f"{'='*70}\n")
+"""
+Окремий запуск конвеєра ingest → features → forecast → monitor
 
-schedule.every(1).hour.do(check_and_retrain_all)
+Зазвичай планувальник працює всередині app.py (SCHEDULER_ENABLED=True).
+Цей скрипт - для розгортання, де ML API запущено з SCHEDULER_ENABLED=False,
+а конвеєр - окремим процесом. Працює напряму з БД, без HTTP до /api/monitor/all.
+"""
+import time
+from utils.db_helper import DatabaseHelper
+from utils.pipeline import build_scheduler
 
-check_and_retrain_all()
+if __name__ == "__main__":
+    scheduler = build_scheduler(DatabaseHelper())
+    scheduler.start()
 
-print("🤖 Real-time Model Monitor запущено!")
-print("🔄 Перевірка моделей КОЖНУ ГОДИНУ")
-print("🎯 Автоматичне перенавчання при виявленні drift")
-print("⏰ Наступна перевірка через 1 годину...\n")
+    print("🤖 Real-time Model Monitor запущено!")
+    print("🔄 Конвеєр ingest → features → forecast → monitor КОЖНУ ГОДИНУ")
+    print("🎯 Автоматичне перенавчання при виявленні drift\n")
 
-while True:
-    schedule.run_pending()
-    time.sleep(60)  # Перевірка кожну хвилину
\ No newline at end of file
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print("\n⏹️ Зупинка планувальника...")
+        scheduler.stop()
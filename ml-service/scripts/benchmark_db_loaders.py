@@ -0,0 +1,146 @@
+# ml-service/scripts/benchmark_db_loaders.py
+"""
+Порівняння завантаження: pd.read_sql_query vs COPY ... TO STDOUT
+
+Створює тимчасову UNLOGGED таблицю з синтетичними даними, вимірює обидва
+завантажувачі на 10k, 100k і 1M рядків (час і пік пам'яті Python/numpy за
+tracemalloc - окремим запуском, бо трасування сповільнює) і видаляє таблицю.
+
+Запуск: python scripts/benchmark_db_loaders.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from utils.db_helper import DatabaseHelper
+
+BENCH_TABLE = 'benchmark_air_quality_history'
+ROW_COUNTS = [10_000, 100_000, 1_000_000]
+REPEATS = 3
+
+SELECT_SQL = f"""
+    SELECT
+        measured_at,
+        pm25, pm10, no2, so2, co, o3,
+        temperature, humidity, pressure, wind_speed
+    FROM {BENCH_TABLE}
+    WHERE id <= %s
+    ORDER BY measured_at ASC
+"""
+
+
+def create_bench_table(db, rows):
+    """Створити таблицю з тими ж типами колонок, що й air_quality_history"""
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+    cursor.execute(f"""
+        CREATE UNLOGGED TABLE {BENCH_TABLE} (
+            id INTEGER PRIMARY KEY,
+            measured_at TIMESTAMP NOT NULL,
+            pm25 DECIMAL(10, 2), pm10 DECIMAL(10, 2), no2 DECIMAL(10, 2),
+            so2 DECIMAL(10, 2), co DECIMAL(10, 2), o3 DECIMAL(10, 2),
+            temperature DECIMAL(5, 2), humidity INTEGER,
+            pressure INTEGER, wind_speed DECIMAL(5, 2)
+        )
+    """)
+    cursor.execute(f"""
+        INSERT INTO {BENCH_TABLE}
+        SELECT
+            g,
+            TIMESTAMP '2020-01-01' + g * INTERVAL '1 hour',
+            round((random() * 100)::numeric, 2), round((random() * 150)::numeric, 2),
+            round((random() * 80)::numeric, 2), round((random() * 40)::numeric, 2),
+            round((random() * 2000)::numeric, 2), round((random() * 120)::numeric, 2),
+            round((random() * 40 - 10)::numeric, 2), (random() * 100)::int,
+            1000 + (random() * 30)::int, round((random() * 15)::numeric, 2)
+        FROM generate_series(1, %s) AS g
+    """, (rows,))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def drop_bench_table(db):
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def load_read_sql(db, rows):
+    conn = db.get_connection()
+    try:
+        return pd.read_sql_query(SELECT_SQL, conn, params=(rows,))
+    finally:
+        conn.close()
+
+
+def load_copy(db, rows):
+    return db.copy_query_to_dataframe(SELECT_SQL, (rows,), parse_dates=['measured_at'])
+
+
+def best_time(loader, db, rows):
+    """Найкращий час з REPEATS запусків"""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        df = loader(db, rows)
+        timings.append(time.perf_counter() - start)
+    return min(timings), df
+
+
+def peak_memory_mb(loader, db, rows):
+    """Пік виділеної пам'яті під час завантаження (MB)"""
+    tracemalloc.start()
+    try:
+        loader(db, rows)
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    db = DatabaseHelper()
+    
+    print("=" * 70)
+    print("⏱️ BENCHMARK: read_sql_query vs COPY TO STDOUT")
+    print("=" * 70)
+    
+    create_bench_table(db, max(ROW_COUNTS))
+    
+    try:
+        print(f"\n{'Рядків':>10} | {'read_sql_query':>15} | {'COPY':>10} | {'Прискорення':>12} | "
+              f"{'рядків/с (COPY)':>16} | {'пік MB (sql/COPY)':>18}")
+        print("-" * 97)
+        
+        for rows in ROW_COUNTS:
+            t_sql, df_sql = best_time(load_read_sql, db, rows)
+            t_copy, df_copy = best_time(load_copy, db, rows)
+            
+            assert len(df_sql) == len(df_copy) == rows
+            
+            mem_sql = peak_memory_mb(load_read_sql, db, rows)
+            mem_copy = peak_memory_mb(load_copy, db, rows)
+            
+            print(f"{rows:>10,} | {t_sql:>14.3f}s | {t_copy:>9.3f}s | "
+                  f"{t_sql / t_copy:>11.1f}x | {rows / t_copy:>16,.0f} | "
+                  f"{mem_sql:>8.1f} / {mem_copy:>7.1f}")
+        
+        print("\nТипи колонок:")
+        print(f"   read_sql_query: pm25 → {df_sql['pm25'].dtype}")
+        print(f"   COPY:           pm25 → {df_copy['pm25'].dtype}")
+    finally:
+        drop_bench_table(db)
+    
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# ml-service/scripts/benchmark_startup.py
+"""
+Час холодного старту та пам'ять воркера ML API
+
+Кожен замір - окремий процес Python (холодний старт, порожній sys.modules):
+    1. import app                   - скільки коштує старт прогнозного API
+    2. перший GET /health           - через Flask test client
+    3. backend-и research           - що доплачує перший /api/research/train-custom
+
+Для кожного кроку: час, пік RSS процесу і які важкі бібліотеки вже завантажені.
+
+Запуск: python scripts/benchmark_startup.py [repeats]
+"""
+import json
+import os
+import subprocess
+import sys
+
+ML_SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['tensorflow', 'keras', 'matplotlib', 'seaborn', 'xgboost', 'sklearn']
+
+PROBE = r"""
+import json, resource, sys, time
+
+def rss_mb():
+    # ru_maxrss: КБ на Linux, байти на macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def loaded():
+    return [name for name in HEAVY if name in sys.modules]
+
+HEAVY = json.loads(sys.argv[1])
+steps = []
+
+started = time.perf_counter()
+import app
+steps.append({'step': 'import app', 'seconds': time.perf_counter() - started,
+              'rss_mb': rss_mb(), 'heavy_loaded': loaded()})
+
+started = time.perf_counter()
+response = app.app.test_client().get('/health')
+steps.append({'step': 'first /health', 'seconds': time.perf_counter() - started,
+              'rss_mb': rss_mb(), 'heavy_loaded': loaded(), 'status': response.status_code})
+
+started = time.perf_counter()
+import matplotlib.figure, xgboost, sklearn.metrics
+try:
+    from tensorflow import keras
+except ImportError:
+    pass
+steps.append({'step': 'research backends', 'seconds': time.perf_counter() - started,
+              'rss_mb': rss_mb(), 'heavy_loaded': loaded()})
+
+print(json.dumps(steps))
+"""
+
+
+def run_probe():
+    env = dict(os.environ, SCHEDULER_ENABLED='False', PYTHONDONTWRITEBYTECODE='1')
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, json.dumps(HEAVY_MODULES)],
+        cwd=ML_SERVICE_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+
+    # Останній рядок - JSON; решта - print-и сервісу при імпорті
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    runs = [run_probe() for _ in range(repeats)]
+
+    print(f"\n⏱️ Холодний старт ML API ({repeats} запусків, медіана)\n")
+    print(f"{'Крок':<20} {'Час, с':>8} {'Пік RSS, МБ':>12}   Завантажені важкі модулі")
+    print('-' * 80)
+
+    for idx, step in enumerate(runs[0]):
+        seconds = sorted(run[idx]['seconds'] for run in runs)[repeats // 2]
+        rss = sorted(run[idx]['rss_mb'] for run in runs)[repeats // 2]
+        heavy = ', '.join(step['heavy_loaded']) or '-'
+        print(f"{step['step']:<20} {seconds:>8.3f} {rss:>12.1f}   {heavy}")
+
+    print()
+
+
+if __name__ == '__main__':
+    main()
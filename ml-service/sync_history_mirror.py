@@ -0,0 +1,15 @@
+# ml-service/sync_history_mirror.py
+"""
+Синхронізація Parquet-дзеркала air_quality_history
+
+Запуск: python sync_history_mirror.py
+(можна ставити в cron - дописуються лише нові/змінені партиції)
+"""
+from data.history_mirror import HistoryMirror
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("🪞 СИНХРОНІЗАЦІЯ PARQUET-ДЗЕРКАЛА ІСТОРІЇ")
+    print("=" * 70)
+    
+    HistoryMirror().sync()
@@ -0,0 +1,45 @@
+# ml-service/tests/test_dataset_loader.py
+# Запуск з ml-service/: python -m pytest tests (або python -m unittest discover tests)
+import io
+import os
+import sys
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.dataset_loader import DatasetInvalid, DatasetLoader
+
+HEADER = 'timestamp,pm25,pm10,no2,so2,co,o3,temperature,humidity,pressure,wind_speed'
+ROW = '2026-01-01 00:00,10,20,30,4,0.5,60,1.5,80,1010,3'
+
+
+def csv_source(header, rows):
+    return io.BytesIO('\n'.join([header] + rows).encode())
+
+
+class DatasetLoaderTest(unittest.TestCase):
+    def test_extra_numeric_columns_are_kept_as_float32(self):
+        df = DatasetLoader(chunk_rows=2).load(
+            csv_source(HEADER + ',traffic', [ROW + ',120'] * 3 + [ROW + ',7.5']), 'data.csv'
+        )
+
+        self.assertIn('traffic', df.columns)
+        self.assertEqual(df['traffic'].dtype, np.float32)
+        self.assertEqual(df['traffic'].tolist(), [120, 120, 120, 7.5])
+
+    def test_non_numeric_extra_column_is_rejected_by_name(self):
+        with self.assertRaises(DatasetInvalid) as ctx:
+            DatasetLoader().load(csv_source(HEADER + ',station', [ROW + ',north'] * 3), 'data.csv')
+
+        self.assertIn('station', str(ctx.exception))
+
+    def test_non_numeric_cell_in_schema_column_is_invalid(self):
+        bad_row = ROW.replace(',10,', ',n/a?,', 1)
+
+        with self.assertRaises(DatasetInvalid):
+            DatasetLoader().load(csv_source(HEADER, [ROW, bad_row]), 'data.csv')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# ml-service/tests/test_disk_cache.py
+# Запуск з ml-service/: python -m pytest tests (або python -m unittest discover tests)
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.disk_cache import LRUDirectory, atomic_write, atomic_write_dir, touch
+
+
+def write_bytes(size):
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as f:
+            f.write(b'x' * size)
+    return write
+
+
+class DiskCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def test_failed_write_leaves_no_entry(self):
+        def fail(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                f.write(b'partial')
+            raise RuntimeError('disk full')
+
+        with self.assertRaises(RuntimeError):
+            atomic_write(self.path('entry.json'), fail)
+        with self.assertRaises(RuntimeError):
+            atomic_write_dir(self.path('entry'), lambda tmp_dir: fail(os.path.join(tmp_dir, 'a')))
+
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_evict_by_size_removes_least_recently_used(self):
+        entries = LRUDirectory(self.root, max_bytes=250)
+        for i, name in enumerate(['a', 'b', 'c']):
+            atomic_write(self.path(name), write_bytes(100))
+            os.utime(self.path(name), (1000 + i, 1000 + i))
+
+        touch(self.path('a'))
+        entries.evict()
+
+        self.assertEqual(sorted(os.listdir(self.root)), ['a', 'c'])
+
+    def test_evict_by_count_counts_directories(self):
+        entries = LRUDirectory(self.root, max_entries=2)
+        for i, name in enumerate(['job1', 'job2', 'job3']):
+            atomic_write_dir(self.path(name), lambda tmp_dir: write_bytes(10)(os.path.join(tmp_dir, 'plot.png')))
+            os.utime(self.path(name), (1000 + i, 1000 + i))
+        os.makedirs(self.path('.tmp-inflight'))
+
+        entries.evict()
+
+        self.assertEqual(sorted(os.listdir(self.root)), ['.tmp-inflight', 'job2', 'job3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# ml-service/tests/test_drift_detectors.py
+# Запуск з ml-service/: python -m pytest tests (або python -m unittest discover tests)
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.drift_detectors import DriftMonitor
+
+
+def make_rows(district_id, ids, hours):
+    rows = []
+    for row_id, hour in zip(ids, hours):
+        row = {param: 10.0 for param in Config.TARGET_FEATURES + Config.WEATHER_FEATURES}
+        row.update({f'{param}_forecast': np.nan for param in Config.TARGET_FEATURES})
+        row.update({'id': row_id, 'district_id': district_id, 'measured_at': pd.Timestamp(hour)})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+class FakeDB:
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.calls = []
+
+    def get_measurements_with_forecasts_since(self, watermarks):
+        self.calls.append(dict(watermarks))
+        return self.batches.pop(0) if self.batches else pd.DataFrame()
+
+
+class WatermarkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.state_path = os.path.join(self.tmp.name, 'drift_state.json')
+
+    def test_backfilled_rows_are_read_by_id(self):
+        db = FakeDB([
+            make_rows(1, [10, 11], ['2026-03-01 10:00', '2026-03-01 12:00']),
+            # Пропуск о 11:00 дозаповнено пізніше - новий id, старіша година
+            make_rows(1, [12], ['2026-03-01 11:00'])
+        ])
+        monitor = DriftMonitor(state_path=self.state_path)
+
+        monitor.update_from_db(db, [1])
+        summary = monitor.update_from_db(db, [1])
+
+        self.assertEqual(db.calls[1][1], (11, None))
+        self.assertEqual(summary[1]['processed'], 1)
+        status = monitor.status(1)
+        self.assertEqual(status['watermark_id'], 12)
+        self.assertEqual(status['watermark'], '2026-03-01T12:00:00')
+
+    def test_legacy_state_without_id_uses_measured_at(self):
+        monitor = DriftMonitor(state_path=self.state_path)
+        monitor._district(1)['watermark'] = '2026-03-01T12:00:00'
+        monitor.save()
+
+        db = FakeDB([])
+        DriftMonitor(state_path=self.state_path).update_from_db(db, [1])
+
+        self.assertEqual(db.calls[0][1], (None, datetime(2026, 3, 1, 12)))
+
+    def test_aware_measured_at_compares_with_naive_watermark(self):
+        monitor = DriftMonitor(state_path=self.state_path)
+        monitor._district(1)['watermark'] = '2026-03-01T12:00:00'
+
+        measurement = {'id': 5, 'measured_at': datetime(2030, 1, 1, tzinfo=timezone.utc)}
+        monitor.update(1, measurement)
+
+        watermark = datetime.fromisoformat(monitor.status(1)['watermark'])
+        self.assertIsNone(watermark.tzinfo)
+        self.assertGreater(watermark, datetime(2026, 3, 1, 12))
+        self.assertEqual(monitor.status(1)['watermark_id'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# ml-service/tests/test_model_monitor.py
+# Запуск з ml-service/: python -m pytest tests (або python -m unittest discover tests)
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils import model_monitor
+from utils.drift_detectors import DriftMonitor
+
+
+def make_history(rows=120):
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        param: rng.uniform(1, 50, rows)
+        for param in Config.TARGET_FEATURES + Config.WEATHER_FEATURES
+    })
+    df['measured_at'] = pd.date_range('2026-01-01', periods=rows, freq='h')
+    return df
+
+
+class FakePreprocessor:
+    def __init__(self, district_id):
+        self.scaler = None
+
+    def prepare_training_data(self, df):
+        X = df[Config.WEATHER_FEATURES].to_numpy()
+        y = df[Config.TARGET_FEATURES].to_numpy()
+        return X, y, df
+
+
+class FakeModel:
+    fail_evaluate = False
+    published = []
+
+    def __init__(self, district_id, model_type='xgboost'):
+        self.model_type = model_type
+
+    def train(self, X_train, y_train, X_val=None, y_val=None, scaler=None, save=True):
+        return 0.9, 0.8
+
+    def evaluate(self, X, y):
+        if FakeModel.fail_evaluate:
+            raise RuntimeError('evaluate failed')
+        return {param: {'mae': 1.0, 'rmse': 1.5, 'r2': 0.8} for param in Config.TARGET_FEATURES}
+
+    def save_model(self, metrics=None):
+        self.published.append(metrics)
+
+
+class RetrainResetsDriftTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.drift = DriftMonitor(state_path=os.path.join(self.tmp.name, 'drift_state.json'))
+        self.drift._district(1)['alerts'] = [{
+            'type': 'residual', 'param': 'pm25',
+            'measured_at': '2026-01-05T00:00:00', 'statistic': 3.1
+        }]
+        FakeModel.fail_evaluate = False
+        FakeModel.published = []
+
+        patches = [
+            mock.patch.object(model_monitor, 'DatabaseHelper'),
+            mock.patch.object(model_monitor, 'get_drift_monitor', return_value=self.drift),
+            mock.patch.object(model_monitor, 'DataPreprocessor', FakePreprocessor),
+            mock.patch.object(model_monitor, 'AirQualityModel', FakeModel)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_successful_retrain_clears_alerts(self):
+        self.assertTrue(self.drift.status(1)['drift_detected'])
+
+        result = model_monitor.ModelMonitor().retrain_model(1, df=make_history())
+
+        self.assertTrue(result['success'], result)
+        status = self.drift.status(1)
+        self.assertFalse(status['drift_detected'])
+        self.assertEqual(status['alerts'], [])
+        self.assertEqual(len(FakeModel.published), 1)
+
+    def test_failed_retrain_keeps_alerts(self):
+        FakeModel.fail_evaluate = True
+
+        result = model_monitor.ModelMonitor().retrain_model(1, df=make_history())
+
+        self.assertFalse(result['success'])
+        self.assertTrue(self.drift.status(1)['drift_detected'])
+        # Невдале перенавчання не змінює активну модель
+        self.assertEqual(FakeModel.published, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
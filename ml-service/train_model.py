@@ -6,14 +6,16 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from data.preprocessor import DataPreprocessor
+from data.history_mirror import HistoryMirror
 from models.air_quality_model import AirQualityModel
 from utils.db_helper import DatabaseHelper
 from config import Config
 from sklearn.model_selection import train_test_split
 
-def train_district_model(district_id):
+def train_district_model(district_id, df=None):
     """
     Навчити модель для одного району
+    df - вже завантажені дані (якщо None, завантажуються з БД)
     """
     db = DatabaseHelper()
     
@@ -22,8 +24,9 @@ def train_district_model(district_id):
     print("="*70)
     
     # 1. Завантажити дані
-    print("\n1️⃣ Завантаження даних з БД...")
-    df = db.get_training_data(district_id, days=30)
+    if df is None:
+        print("\n1️⃣ Завантаження даних з БД...")
+        df = db.get_training_data(district_id, days=30)
     
     if len(df) < 50:
         print(f"❌ Недостатньо даних для навчання: {len(df)} записів")
@@ -96,10 +99,31 @@ def train_all_districts():
     print("🚀 НАВЧАННЯ МОДЕЛЕЙ ДЛЯ ВСІХ РАЙОНІВ")
     print("="*70)
     
+    district_ids = [district['id'] for district in Config.DISTRICTS]
+    mirror = HistoryMirror()
+    use_mirror = Config.TRAINING_DATA_SOURCE == 'parquet' and mirror.exists()
+    
+    if use_mirror:
+        try:
+            mirror.refresh_if_stale(district_ids)
+        except Exception as e:
+            print(f"⚠️ Не вдалося оновити Parquet-дзеркало ({e}) - дані з БД")
+            use_mirror = False
+    
+    if use_mirror:
+        # Офлайн-навчання з Parquet-дзеркала, без навантаження на БД
+        windows = {
+            district_id: mirror.get_training_data(district_id, days=30)
+            for district_id in district_ids
+        }
+    else:
+        # Один запит до БД для всіх районів
+        windows = DatabaseHelper().get_recent_windows(district_ids, hours=30 * 24)
+    
     results = []
     
     for district in Config.DISTRICTS:
-        success = train_district_model(district['id'])
+        success = train_district_model(district['id'], df=windows[district['id']])
         results.append({
             'id': district['id'],
             'name': district['name'],
@@ -0,0 +1,128 @@
+# ml-service/utils/aqi.py
+
+def linear_interpolation(value, c_low, c_high, aqi_low, aqi_high):
+    """Лінійна інтерполяція для розрахунку AQI"""
+    return ((aqi_high - aqi_low) / (c_high - c_low)) * (value - c_low) + aqi_low
+
+def calculate_aqi_from_pm25(pm25):
+    """Розрахунок AQI з PM2.5 (μg/m³)"""
+    if pm25 <= 12.0:
+        return linear_interpolation(pm25, 0, 12.0, 0, 50)
+    elif pm25 <= 35.4:
+        return linear_interpolation(pm25, 12.1, 35.4, 51, 100)
+    elif pm25 <= 55.4:
+        return linear_interpolation(pm25, 35.5, 55.4, 101, 150)
+    elif pm25 <= 150.4:
+        return linear_interpolation(pm25, 55.5, 150.4, 151, 200)
+    elif pm25 <= 250.4:
+        return linear_interpolation(pm25, 150.5, 250.4, 201, 300)
+    else:
+        return linear_interpolation(pm25, 250.5, 500.4, 301, 500)
+
+def calculate_aqi_from_pm10(pm10):
+    """Розрахунок AQI з PM10 (μg/m³)"""
+    if pm10 <= 54:
+        return linear_interpolation(pm10, 0, 54, 0, 50)
+    elif pm10 <= 154:
+        return linear_interpolation(pm10, 55, 154, 51, 100)
+    elif pm10 <= 254:
+        return linear_interpolation(pm10, 155, 254, 101, 150)
+    elif pm10 <= 354:
+        return linear_interpolation(pm10, 255, 354, 151, 200)
+    elif pm10 <= 424:
+        return linear_interpolation(pm10, 355, 424, 201, 300)
+    else:
+        return linear_interpolation(pm10, 425, 604, 301, 500)
+
+def calculate_aqi_from_no2(no2):
+    """Розрахунок AQI з NO2 (μg/m³)"""
+    no2_ppb = no2 / 1.88
+    
+    if no2_ppb <= 53:
+        return linear_interpolation(no2_ppb, 0, 53, 0, 50)
+    elif no2_ppb <= 100:
+        return linear_interpolation(no2_ppb, 54, 100, 51, 100)
+    elif no2_ppb <= 360:
+        return linear_interpolation(no2_ppb, 101, 360, 101, 150)
+    elif no2_ppb <= 649:
+        return linear_interpolation(no2_ppb, 361, 649, 151, 200)
+    elif no2_ppb <= 1249:
+        return linear_interpolation(no2_ppb, 650, 1249, 201, 300)
+    else:
+        return linear_interpolation(no2_ppb, 1250, 2049, 301, 500)
+
+def calculate_aqi_from_so2(so2):
+    """Розрахунок AQI з SO2 (μg/m³)"""
+    so2_ppb = so2 / 2.62
+    
+    if so2_ppb <= 35:
+        return linear_interpolation(so2_ppb, 0, 35, 0, 50)
+    elif so2_ppb <= 75:
+        return linear_interpolation(so2_ppb, 36, 75, 51, 100)
+    elif so2_ppb <= 185:
+        return linear_interpolation(so2_ppb, 76, 185, 101, 150)
+    elif so2_ppb <= 304:
+        return linear_interpolation(so2_ppb, 186, 304, 151, 200)
+    elif so2_ppb <= 604:
+        return linear_interpolation(so2_ppb, 305, 604, 201, 300)
+    else:
+        return linear_interpolation(so2_ppb, 605, 1004, 301, 500)
+
+def calculate_aqi_from_co(co):
+    """Розрахунок AQI з CO (μg/m³)"""
+    co_ppm = co / 1150
+    
+    if co_ppm <= 4.4:
+        return linear_interpolation(co_ppm, 0, 4.4, 0, 50)
+    elif co_ppm <= 9.4:
+        return linear_interpolation(co_ppm, 4.5, 9.4, 51, 100)
+    elif co_ppm <= 12.4:
+        return linear_interpolation(co_ppm, 9.5, 12.4, 101, 150)
+    elif co_ppm <= 15.4:
+        return linear_interpolation(co_ppm, 12.5, 15.4, 151, 200)
+    elif co_ppm <= 30.4:
+        return linear_interpolation(co_ppm, 15.5, 30.4, 201, 300)
+    else:
+        return linear_interpolation(co_ppm, 30.5, 50.4, 301, 500)
+
+def calculate_aqi_from_o3(o3):
+    """Розрахунок AQI з O3 (μg/m³)"""
+    o3_ppb = o3 / 2.0
+    
+    if o3_ppb <= 54:
+        return linear_interpolation(o3_ppb, 0, 54, 0, 50)
+    elif o3_ppb <= 70:
+        return linear_interpolation(o3_ppb, 55, 70, 51, 100)
+    elif o3_ppb <= 85:
+        return linear_interpolation(o3_ppb, 71, 85, 101, 150)
+    elif o3_ppb <= 105:
+        return linear_interpolation(o3_ppb, 86, 105, 151, 200)
+    elif o3_ppb <= 200:
+        return linear_interpolation(o3_ppb, 106, 200, 201, 300)
+    else:
+        return 301
+
+def calculate_overall_aqi(pm25, pm10, no2, so2, co, o3):
+    """Розрахувати загальний AQI як максимум з усіх параметрів"""
+    aqis = {
+        'pm25': calculate_aqi_from_pm25(pm25),
+        'pm10': calculate_aqi_from_pm10(pm10),
+        'no2': calculate_aqi_from_no2(no2),
+        'so2': calculate_aqi_from_so2(so2),
+        'co': calculate_aqi_from_co(co),
+        'o3': calculate_aqi_from_o3(o3)
+    }
+    
+    max_aqi = max(aqis.values())
+    dominant = max(aqis, key=aqis.get)
+    
+    return int(max_aqi), dominant, aqis
+
+def get_aqi_status(aqi):
+    """Отримати статус якості повітря"""
+    if aqi <= 50: return 'Good'
+    elif aqi <= 100: return 'Moderate'
+    elif aqi <= 150: return 'Unhealthy for Sensitive'
+    elif aqi <= 200: return 'Unhealthy'
+    elif aqi <= 300: return 'Very Unhealthy'
+    else: return 'Hazardous'
@@ -0,0 +1,323 @@
+# ml-service/utils/async_db_helper.py
+import asyncio
+import threading
+import asyncpg
+import pandas as pd
+from datetime import datetime, timedelta
+from config import Config
+
+
+class AsyncDatabaseHelper:
+    """
+    Асинхронна робота з PostgreSQL (asyncpg) - дзеркало DatabaseHelper
+
+    Пул з'єднань живе у власному event loop у фоновому потоці, тому
+    методи можна await-ити з будь-якого loop - з ASGI-застосунку
+    (asgi_app.py) і з asyncio.run() у скриптах.
+    """
+
+    def __init__(self, min_size=None, max_size=None):
+        self.connection_params = {
+            'host': Config.DB_HOST,
+            'port': Config.DB_PORT,
+            'database': Config.DB_NAME,
+            'user': Config.DB_USER,
+            'password': Config.DB_PASSWORD
+        }
+        self.min_size = min_size or Config.ASYNC_DB_POOL_MIN_SIZE
+        self.max_size = max_size or Config.ASYNC_DB_POOL_MAX_SIZE
+
+        self._loop = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    # ==================== LOOP / POOL ====================
+
+    def _ensure_loop(self):
+        """Запустити фоновий loop і створити пул (один раз)"""
+        if self._pool is not None:
+            return self._loop
+
+        with self._lock:
+            if self._pool is not None:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name='async-db-loop', daemon=True
+            )
+            thread.start()
+
+            try:
+                self._pool = asyncio.run_coroutine_threadsafe(
+                    self._create_pool(), loop
+                ).result()
+            except Exception as e:
+                print(f"❌ Помилка підключення до БД: {e}")
+                loop.call_soon_threadsafe(loop.stop)
+                raise
+
+            self._loop = loop
+            print(f"✅ Async пул з'єднань створено ({self.min_size}-{self.max_size})")
+            return self._loop
+
+    async def _create_pool(self):
+        return await asyncpg.create_pool(
+            min_size=self.min_size,
+            max_size=self.max_size,
+            init=self._init_connection,
+            **self.connection_params
+        )
+
+    @staticmethod
+    async def _init_connection(conn):
+        """NUMERIC → float замість decimal.Decimal (як DECIMAL_AS_FLOAT у DatabaseHelper)"""
+        await conn.set_type_codec(
+            'numeric', encoder=str, decoder=float,
+            schema='pg_catalog', format='text'
+        )
+
+    async def _run(self, coro):
+        """Виконати корутину в loop пулу і дочекатись її з поточного loop"""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        """Закрити пул і зупинити фоновий loop"""
+        with self._lock:
+            if self._pool is None:
+                return
+
+            asyncio.run_coroutine_threadsafe(self._pool.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._pool = None
+            self._loop = None
+
+    # ==================== BASE QUERIES ====================
+
+    async def fetch(self, sql, *args):
+        """Виконати запит і повернути список asyncpg.Record"""
+        async def _fetch():
+            async with self._pool.acquire() as conn:
+                return await conn.fetch(sql, *args)
+
+        return await self._run(_fetch())
+
+    async def fetch_dataframe(self, sql, *args):
+        """Запит → DataFrame з типами з Config.MEASUREMENT_DTYPES"""
+        async def _fetch():
+            async with self._pool.acquire() as conn:
+                stmt = await conn.prepare(sql)
+                columns = [attr.name for attr in stmt.get_attributes()]
+                rows = await stmt.fetch(*args)
+                return columns, rows
+
+        columns, rows = await self._run(_fetch())
+        df = pd.DataFrame.from_records(rows, columns=columns)
+
+        dtypes = {
+            col: dtype for col, dtype in Config.MEASUREMENT_DTYPES.items()
+            if col in df.columns
+        }
+        df = df.astype(dtypes)
+
+        if 'measured_at' in df.columns:
+            df['measured_at'] = pd.to_datetime(df['measured_at'])
+
+        return df
+
+    # ==================== DATA ACCESS ====================
+
+    async def get_training_data(self, district_id, days=30):
+        """
+        Отримати дані для навчання (тільки реальні, без прогнозів)
+        """
+        try:
+            query = """
+                SELECT
+                    measured_at,
+                    pm25, pm10, no2, so2, co, o3,
+                    temperature, humidity, pressure, wind_speed
+                FROM air_quality_history
+                WHERE district_id = $1
+                    AND is_forecast = FALSE
+                    AND measured_at >= NOW() - make_interval(days => $2)
+                ORDER BY measured_at ASC
+            """
+
+            df = await self.fetch_dataframe(query, district_id, days)
+
+            print(f"✅ Завантажено {len(df)} записів для району {district_id}")
+            return df
+
+        except Exception as e:
+            print(f"❌ Помилка: {e}")
+            return pd.DataFrame()
+
+    async def get_latest_data(self, district_id, hours=48):
+        """
+        Отримати останні дані для прогнозу
+        """
+        try:
+            query = """
+                SELECT
+                    measured_at,
+                    pm25, pm10, no2, so2, co, o3,
+                    temperature, humidity, pressure, wind_speed
+                FROM air_quality_history
+                WHERE district_id = $1
+                    AND is_forecast = FALSE
+                    AND measured_at >= NOW() - make_interval(hours => $2)
+                ORDER BY measured_at ASC
+            """
+
+            return await self.fetch_dataframe(query, district_id, hours)
+
+        except Exception as e:
+            print(f"❌ Помилка: {e}")
+            return pd.DataFrame()
+
+    async def get_recent_windows(self, district_ids, hours=48, limit_per_district=None):
+        """
+        Отримати останні дані для кількох районів одним запитом
+        Повертає dict {district_id: DataFrame} з тими ж колонками, що й get_training_data
+        """
+        district_ids = [int(d) for d in district_ids]
+        windows = {district_id: pd.DataFrame() for district_id in district_ids}
+
+        if not district_ids:
+            return windows
+
+        try:
+            query = """
+                SELECT
+                    district_id,
+                    measured_at,
+                    pm25, pm10, no2, so2, co, o3,
+                    temperature, humidity, pressure, wind_speed
+                FROM (
+                    SELECT
+                        district_id,
+                        measured_at,
+                        pm25, pm10, no2, so2, co, o3,
+                        temperature, humidity, pressure, wind_speed,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY district_id
+                            ORDER BY measured_at DESC
+                        ) AS rn
+                    FROM air_quality_history
+                    WHERE district_id = ANY($1::int[])
+                        AND is_forecast = FALSE
+                        AND measured_at >= NOW() - make_interval(hours => $2)
+                ) recent
+                WHERE $3::int IS NULL OR rn <= $3::int
+                ORDER BY district_id, measured_at ASC
+            """
+
+            df = await self.fetch_dataframe(query, district_ids, hours, limit_per_district)
+
+            for district_id, group in df.groupby('district_id'):
+                windows[int(district_id)] = group.drop(columns='district_id').reset_index(drop=True)
+
+            print(f"✅ Завантажено {len(df)} записів для {len(district_ids)} районів одним запитом")
+            return windows
+
+        except Exception as e:
+            print(f"❌ Помилка: {e}")
+            return windows
+
+    async def get_data_stats(self, district_id):
+        """
+        Статистика по даних (з щоденних агрегатів air_quality_daily_stats)
+        """
+        try:
+            rows = await self.fetch("""
+                SELECT
+                    COALESCE(SUM(record_count), 0) as total,
+                    MIN(first_measured_at) as first_date,
+                    MAX(last_measured_at) as last_date,
+                    SUM(pm25_sum) / NULLIF(SUM(pm25_count), 0) as avg_pm25,
+                    SUM(aqi_sum)::float / NULLIF(SUM(record_count), 0) as avg_aqi,
+                    COUNT(*) FILTER (WHERE record_count > 0) as days_with_data,
+                    COALESCE(SUM(hours_covered), 0) as hours_covered
+                FROM air_quality_daily_stats
+                WHERE district_id = $1
+            """, district_id)
+
+            row = rows[0]
+            days_with_data = row['days_with_data']
+
+            return {
+                'total_records': row['total'],
+                'first_date': row['first_date'],
+                'last_date': row['last_date'],
+                'avg_pm25': float(row['avg_pm25']) if row['avg_pm25'] else 0,
+                'avg_aqi': float(row['avg_aqi']) if row['avg_aqi'] else 0,
+                'days_with_data': days_with_data,
+                'hours_covered': row['hours_covered'],
+                'coverage': round(row['hours_covered'] / (days_with_data * 24), 3) if days_with_data else 0
+            }
+
+        except Exception as e:
+            print(f"❌ Помилка: {e}")
+            return None
+
+    async def get_data_stats_for_districts(self, district_ids):
+        """Статистика для кількох районів паралельно → {district_id: stats}"""
+        district_ids = [int(d) for d in district_ids]
+
+        stats = await asyncio.gather(*[
+            self.get_data_stats(district_id) for district_id in district_ids
+        ])
+
+        return dict(zip(district_ids, stats))
+
+    async def save_forecasts_for_districts(self, forecasts_by_district, model_type='persistence_trend'):
+        """
+        Зберегти прогнози для кількох районів (по рядку forecast_runs на район)
+        """
+        forecasts_by_district = {
+            district_id: forecasts_df
+            for district_id, forecasts_df in forecasts_by_district.items()
+            if forecasts_df is not None and len(forecasts_df) > 0
+        }
+
+        if not forecasts_by_district:
+            return True
+
+        issued_at = datetime.now()
+        rows = []
+
+        for district_id, forecasts_df in forecasts_by_district.items():
+            measured_at = pd.to_datetime(forecasts_df['measured_at'])
+            base_time = measured_at.iloc[0] - timedelta(hours=1)
+
+            rows.append((
+                int(district_id),
+                issued_at,
+                base_time.to_pydatetime(),
+                len(forecasts_df),
+                model_type,
+                *[forecasts_df[param].astype(float).tolist() for param in Config.TARGET_FEATURES],
+                forecasts_df['aqi'].astype(int).tolist()
+            ))
+
+        async def _insert():
+            async with self._pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.executemany("""
+                        INSERT INTO forecast_runs (
+                            district_id, issued_at, base_time, horizon_hours, model_type,
+                            pm25, pm10, no2, so2, co, o3, aqi
+                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+                    """, rows)
+
+        try:
+            await self._run(_insert())
+            print(f"✅ Збережено {len(rows)} запусків прогнозів (issued_at={issued_at.isoformat()})")
+            return True
+
+        except Exception as e:
+            print(f"❌ Помилка збереження: {e}")
+            return False
@@ -1,9 +1,19 @@
 # ml-service/utils/db_helper.py
+import os
+import threading
 import psycopg2
+from psycopg2.extras import execute_values
 import pandas as pd
 from datetime import datetime, timedelta
 from config import Config
 
+# DECIMAL/NUMERIC → float замість decimal.Decimal
+DECIMAL_AS_FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    'DECIMAL_AS_FLOAT',
+    lambda value, cursor: float(value) if value is not None else None
+)
+
 class DatabaseHelper:
     """Робота з PostgreSQL"""
     
@@ -19,7 +29,9 @@ class DatabaseHelper:
     def get_connection(self):
         """Створити з'єднання"""
         try:
-            return psycopg2.connect(**self.connection_params)
+            conn = psycopg2.connect(**self.connection_params)
+            psycopg2.extensions.register_type(DECIMAL_AS_FLOAT, conn)
+            return conn
         except Exception as e:
             print(f"❌ Помилка підключення до БД: {e}")
             raise
@@ -46,6 +58,82 @@ class DatabaseHelper:
             print(f"❌ Помилка виконання запиту: {e}")
             return []
     
+    def apply_measurement_dtypes(self, df):
+        """Привести числові колонки до типів з Config.MEASUREMENT_DTYPES"""
+        dtypes = {
+            col: dtype for col, dtype in Config.MEASUREMENT_DTYPES.items()
+            if col in df.columns
+        }
+        return df.astype(dtypes)
+    
+    def read_dataframe(self, query, params=None):
+        """
+        pd.read_sql_query з типізованими колонками
+        Для невеликих вибірок; великі - через copy_query_to_dataframe
+        """
+        conn = self.get_connection()
+        try:
+            df = pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+        
+        return self.apply_measurement_dtypes(df)
+    
+    def copy_query_to_dataframe(self, query, params=None, dtype=None, parse_dates=None):
+        """
+        Швидке завантаження через COPY (SELECT ...) TO STDOUT у форматі CSV
+        
+        COPY пише в pipe у фоновому потоці, pandas одночасно читає з іншого кінця
+        і розбирає CSV колонками в C-парсері. Повний CSV-текст ніде не накопичується:
+        у пам'яті лише буфер pipe і частина, яку парсер обробляє, плюс сам DataFrame.
+        Без Python-кортежів на кожен рядок, як у read_sql_query.
+        """
+        if dtype is None:
+            dtype = Config.MEASUREMENT_DTYPES
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            # COPY не підтримує параметри, тому підставляємо їх безпечно через mogrify
+            select_sql = cursor.mogrify(query, params).decode()
+            copy_sql = f"COPY ({select_sql.strip().rstrip(';')}) TO STDOUT WITH (FORMAT CSV, HEADER TRUE)"
+            
+            read_fd, write_fd = os.pipe()
+            copy_errors = []
+            
+            def copy_to_pipe():
+                try:
+                    with os.fdopen(write_fd, 'wb') as writer:
+                        cursor.copy_expert(copy_sql, writer)
+                except Exception as e:
+                    copy_errors.append(e)
+            
+            producer = threading.Thread(target=copy_to_pipe, name='copy-to-stdout', daemon=True)
+            producer.start()
+            
+            try:
+                with os.fdopen(read_fd, 'rb') as reader:
+                    df = pd.read_csv(reader, dtype=dtype, parse_dates=parse_dates)
+            except Exception:
+                # Закритий reader обриває COPY (BrokenPipeError) - чекаємо завершення потоку;
+                # якщо впав сам COPY, парсер отримав обрізаний потік - причина в COPY
+                producer.join()
+                if copy_errors and not isinstance(copy_errors[0], BrokenPipeError):
+                    raise copy_errors[0]
+                raise
+            
+            producer.join()
+            cursor.close()
+        finally:
+            conn.close()
+        
+        # COPY впав після заголовка: read_csv міг розібрати лише частину рядків
+        if copy_errors:
+            raise copy_errors[0]
+        
+        return df
+    
     def test_connection(self):
         """Перевірити підключення"""
         try:
@@ -61,13 +149,71 @@ class DatabaseHelper:
             print(f"❌ Помилка: {e}")
             return False
     
-    def get_training_data(self, district_id, days=30):
+    def ensure_history_partitions(self, months_ahead=None):
         """
-        Отримати дані для навчання (тільки реальні, без прогнозів)
+        Створити місячні партиції air_quality_history наперед
+        (прогнози пишуться в майбутнє, тож партиція має існувати до вставки)
         """
+        if months_ahead is None:
+            months_ahead = Config.HISTORY_PARTITIONS_AHEAD_MONTHS
+        
         try:
             conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT create_air_quality_history_partitions(
+                    date_trunc('month', NOW())::date,
+                    (date_trunc('month', NOW()) + make_interval(months => %s + 1))::date
+                )
+            """, (months_ahead,))
+            
+            created = cursor.fetchone()[0]
+            conn.commit()
+            cursor.close()
+            conn.close()
+            
+            if created:
+                print(f"✅ Створено {created} нових партицій air_quality_history")
+            return created
+            
+        except Exception as e:
+            print(f"❌ Помилка створення партицій: {e}")
+            return 0
+    
+    def drop_expired_history_partitions(self, keep_months=None):
+        """
+        Retention: видалити цілі місячні партиції, старші за keep_months
+        """
+        if keep_months is None:
+            keep_months = Config.HISTORY_RETENTION_MONTHS
+        
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
             
+            cursor.execute(
+                "SELECT drop_old_air_quality_history_partitions(%s)",
+                (keep_months,)
+            )
+            
+            dropped = cursor.fetchone()[0]
+            conn.commit()
+            cursor.close()
+            conn.close()
+            
+            print(f"🧹 Видалено {dropped} старих партицій air_quality_history")
+            return dropped
+            
+        except Exception as e:
+            print(f"❌ Помилка видалення партицій: {e}")
+            return 0
+    
+    def get_training_data(self, district_id, days=30):
+        """
+        Отримати дані для навчання (тільки реальні, без прогнозів)
+        """
+        try:
             query = """
                 SELECT 
                     measured_at,
@@ -80,8 +226,9 @@ class DatabaseHelper:
                 ORDER BY measured_at ASC
             """
             
-            df = pd.read_sql_query(query, conn, params=(district_id, days))
-            conn.close()
+            df = self.copy_query_to_dataframe(
+                query, (district_id, days), parse_dates=['measured_at']
+            )
             
             print(f"✅ Завантажено {len(df)} записів для району {district_id}")
             return df
@@ -95,8 +242,6 @@ class DatabaseHelper:
         Отримати останні дані для прогнозу
         """
         try:
-            conn = self.get_connection()
-            
             query = """
                 SELECT 
                     measured_at,
@@ -109,8 +254,9 @@ class DatabaseHelper:
                 ORDER BY measured_at ASC
             """
             
-            df = pd.read_sql_query(query, conn, params=(district_id, hours))
-            conn.close()
+            df = self.copy_query_to_dataframe(
+                query, (district_id, hours), parse_dates=['measured_at']
+            )
             
             return df
             
@@ -118,49 +264,177 @@ class DatabaseHelper:
             print(f"❌ Помилка: {e}")
             return pd.DataFrame()
     
-    def save_forecasts(self, district_id, forecasts_df):
+    def get_recent_windows(self, district_ids, hours=48, limit_per_district=None):
+        """
+        Отримати останні дані для кількох районів одним запитом
+        Повертає dict {district_id: DataFrame} з тими ж колонками, що й get_training_data
+        """
+        district_ids = [int(d) for d in district_ids]
+        windows = {district_id: pd.DataFrame() for district_id in district_ids}
+        
+        if not district_ids:
+            return windows
+        
+        try:
+            query = """
+                SELECT
+                    district_id,
+                    measured_at,
+                    pm25, pm10, no2, so2, co, o3,
+                    temperature, humidity, pressure, wind_speed
+                FROM (
+                    SELECT
+                        district_id,
+                        measured_at,
+                        pm25, pm10, no2, so2, co, o3,
+                        temperature, humidity, pressure, wind_speed,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY district_id
+                            ORDER BY measured_at DESC
+                        ) AS rn
+                    FROM air_quality_history
+                    WHERE district_id = ANY(%s)
+                        AND is_forecast = FALSE
+                        AND measured_at >= NOW() - INTERVAL '%s hours'
+                ) recent
+                WHERE %s IS NULL OR rn <= %s
+                ORDER BY district_id, measured_at ASC
+            """
+            
+            df = self.copy_query_to_dataframe(
+                query,
+                (district_ids, hours, limit_per_district, limit_per_district),
+                parse_dates=['measured_at']
+            )
+            
+            for district_id, group in df.groupby('district_id'):
+                windows[int(district_id)] = group.drop(columns='district_id').reset_index(drop=True)
+            
+            print(f"✅ Завантажено {len(df)} записів для {len(district_ids)} районів одним запитом")
+            return windows
+            
+        except Exception as e:
+            print(f"❌ Помилка: {e}")
+            return windows
+    
+    def get_measurements_with_forecasts_since(self, watermarks):
         """
-        Зберегти прогнози в БД
-        forecasts_df має колонки: measured_at, pm25, pm10, no2, so2, co, o3, aqi, aqi_status
+        Нові реальні вимірювання після watermark кожного району разом з
+        прогнозом на ту ж годину (найсвіжіший запуск, випущений до неї)
+        watermarks: {district_id: (last_id, since)}
+            last_id - найбільший оброблений id (порядок надходження), або None
+            since   - нижня межа measured_at (лише поки last_id невідомий), або None
+        
+        Відбір за id, а не за measured_at: рядки, дозаповнені пізніше за
+        старішу годину (backfill пропусків), теж потрапляють у вибірку.
+        
+        Колонки: id, district_id, measured_at, забруднювачі, погода, <param>_forecast
         """
+        if not watermarks:
+            return pd.DataFrame()
+        
+        try:
+            forecast_cols = ', '.join(
+                f'f.{param} AS {param}_forecast' for param in Config.TARGET_FEATURES
+            )
+            
+            query = f"""
+                SELECT
+                    h.id,
+                    h.district_id,
+                    h.measured_at,
+                    h.pm25, h.pm10, h.no2, h.so2, h.co, h.o3,
+                    h.temperature, h.humidity, h.pressure, h.wind_speed,
+                    {forecast_cols}
+                FROM unnest(%s::int[], %s::bigint[], %s::timestamp[]) AS w(district_id, last_id, since)
+                JOIN air_quality_history h
+                    ON h.district_id = w.district_id
+                   AND (w.last_id IS NULL OR h.id > w.last_id)
+                   AND (w.since IS NULL OR h.measured_at > w.since)
+                   AND h.is_forecast = FALSE
+                LEFT JOIN LATERAL (
+                    SELECT fp.pm25, fp.pm10, fp.no2, fp.so2, fp.co, fp.o3
+                    FROM forecast_points fp
+                    WHERE fp.district_id = h.district_id
+                      AND fp.issued_at >= h.measured_at - INTERVAL '48 hours'
+                      AND fp.issued_at <= fp.measured_at
+                      AND fp.measured_at >= h.measured_at - INTERVAL '30 minutes'
+                      AND fp.measured_at < h.measured_at + INTERVAL '30 minutes'
+                    ORDER BY fp.issued_at DESC
+                    LIMIT 1
+                ) f ON TRUE
+                ORDER BY h.id ASC
+            """
+            
+            district_ids = [int(d) for d in watermarks]
+            last_ids = [watermarks[d][0] for d in watermarks]
+            since = [watermarks[d][1] for d in watermarks]
+            
+            return self.copy_query_to_dataframe(
+                query, (district_ids, last_ids, since), parse_dates=['measured_at']
+            )
+            
+        except Exception as e:
+            print(f"❌ Помилка: {e}")
+            return pd.DataFrame()
+    
+    def save_forecasts(self, district_id, forecasts_df, model_type='persistence_trend'):
+        """
+        Зберегти прогнози в БД (як один запуск у forecast_runs)
+        forecasts_df має колонки: measured_at, pm25, pm10, no2, so2, co, o3, aqi
+        """
+        return self.save_forecasts_for_districts({district_id: forecasts_df}, model_type=model_type)
+    
+    def save_forecasts_for_districts(self, forecasts_by_district, model_type='persistence_trend'):
+        """
+        Зберегти прогнози для кількох районів одним INSERT-ом
+        forecasts_by_district: {district_id: forecasts_df}
+        
+        Кожен район - один рядок forecast_runs з траєкторією в масивах;
+        попередні запуски не видаляються (версіонування за issued_at)
+        """
+        forecasts_by_district = {
+            district_id: forecasts_df
+            for district_id, forecasts_df in forecasts_by_district.items()
+            if forecasts_df is not None and len(forecasts_df) > 0
+        }
+        
+        if not forecasts_by_district:
+            return True
+        
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            # Видалити старі прогнози
-            cursor.execute("""
-                DELETE FROM air_quality_history
-                WHERE district_id = %s AND is_forecast = TRUE AND measured_at > NOW()
-            """, (district_id,))
+            issued_at = datetime.now()
+            rows = []
             
-            # Вставити нові прогнози
-            for _, row in forecasts_df.iterrows():
-                cursor.execute("""
-                    INSERT INTO air_quality_history (
-                        district_id, measured_at, is_forecast,
-                        pm25, pm10, no2, so2, co, o3,
-                        aqi, aqi_status, data_source
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    district_id,
-                    row['measured_at'],
-                    True,  # is_forecast
-                    float(row['pm25']),
-                    float(row['pm10']),
-                    float(row['no2']),
-                    float(row['so2']),
-                    float(row['co']),
-                    float(row['o3']),
-                    int(row['aqi']),
-                    row['aqi_status'],
-                    'ml_model'
+            for district_id, forecasts_df in forecasts_by_district.items():
+                measured_at = pd.to_datetime(forecasts_df['measured_at'])
+                base_time = measured_at.iloc[0] - timedelta(hours=1)
+                
+                rows.append((
+                    int(district_id),
+                    issued_at,
+                    base_time.to_pydatetime(),
+                    len(forecasts_df),
+                    model_type,
+                    *[forecasts_df[param].astype(float).tolist() for param in Config.TARGET_FEATURES],
+                    forecasts_df['aqi'].astype(int).tolist()
                 ))
             
+            execute_values(cursor, """
+                INSERT INTO forecast_runs (
+                    district_id, issued_at, base_time, horizon_hours, model_type,
+                    pm25, pm10, no2, so2, co, o3, aqi
+                ) VALUES %s
+            """, rows)
+            
             conn.commit()
             cursor.close()
             conn.close()
             
-            print(f"✅ Збережено {len(forecasts_df)} прогнозів для району {district_id}")
+            print(f"✅ Збережено {len(rows)} запусків прогнозів (issued_at={issued_at.isoformat()})")
             return True
             
         except Exception as e:
@@ -168,58 +442,95 @@ class DatabaseHelper:
             return False
     
     def get_data_stats(self, district_id):
-        """Статистика по даних"""
+        """
+        Статистика по даних
+        Читається з щоденних агрегатів air_quality_daily_stats, а не з усієї історії
+        """
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
             cursor.execute("""
                 SELECT 
-                    COUNT(*) as total,
-                    MIN(measured_at) as first_date,
-                    MAX(measured_at) as last_date,
-                    AVG(pm25) as avg_pm25,
-                    AVG(aqi) as avg_aqi
-                FROM air_quality_history
-                WHERE district_id = %s AND is_forecast = FALSE
+                    COALESCE(SUM(record_count), 0) as total,
+                    MIN(first_measured_at) as first_date,
+                    MAX(last_measured_at) as last_date,
+                    SUM(pm25_sum) / NULLIF(SUM(pm25_count), 0) as avg_pm25,
+                    SUM(aqi_sum)::float / NULLIF(SUM(record_count), 0) as avg_aqi,
+                    COUNT(*) FILTER (WHERE record_count > 0) as days_with_data,
+                    COALESCE(SUM(hours_covered), 0) as hours_covered
+                FROM air_quality_daily_stats
+                WHERE district_id = %s
             """, (district_id,))
             
             row = cursor.fetchone()
             cursor.close()
             conn.close()
             
+            days_with_data = row[5]
+            
             return {
                 'total_records': row[0],
                 'first_date': row[1],
                 'last_date': row[2],
                 'avg_pm25': float(row[3]) if row[3] else 0,
-                'avg_aqi': float(row[4]) if row[4] else 0
+                'avg_aqi': float(row[4]) if row[4] else 0,
+                'days_with_data': days_with_data,
+                'hours_covered': row[6],
+                'coverage': round(row[6] / (days_with_data * 24), 3) if days_with_data else 0
             }
             
         except Exception as e:
             print(f"❌ Помилка: {e}")
             return None
     
+    def get_data_watermark(self, district_id, days):
+        """
+        Версія даних району за останні days днів: (max measured_at, кількість записів)
+        Змінюється, щойно з'являються нові виміри - ключ кешу результатів тестів
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT MAX(measured_at), COUNT(*)
+                FROM air_quality_history
+                WHERE district_id = %s AND is_forecast = false
+                    AND measured_at >= NOW() - INTERVAL '%s days'
+            """, (district_id, days))
+            
+            row = cursor.fetchone()
+            cursor.close()
+            conn.close()
+            
+            return row[0], row[1]
+            
+        except Exception as e:
+            print(f"❌ Помилка: {e}")
+            return None
+    
     def get_forecasts_for_validation(self, district_id, hours_back=24):
         """
         Отримати прогнози для валідації
+        Для кожної години береться найсвіжіший запуск, випущений до цієї години
         """
         try:
-            conn = self.get_connection()
             cutoff_time = datetime.now() - timedelta(hours=hours_back)
             
             query = """
-                SELECT measured_at, pm25, pm10, no2, so2, co, o3, aqi
-                FROM air_quality_history
+                SELECT DISTINCT ON (measured_at)
+                    measured_at, pm25, pm10, no2, so2, co, o3, aqi, horizon
+                FROM forecast_points
                 WHERE district_id = %s
-                  AND is_forecast = true
+                  AND issued_at >= %s - INTERVAL '48 hours'
                   AND measured_at >= %s
                   AND measured_at <= NOW()
-                ORDER BY measured_at ASC
+                  AND issued_at <= measured_at
+                ORDER BY measured_at ASC, issued_at DESC
             """
             
-            df = pd.read_sql_query(query, conn, params=(district_id, cutoff_time))
-            conn.close()
+            df = self.read_dataframe(query, params=(district_id, cutoff_time, cutoff_time))
             
             return df
             
@@ -227,13 +538,119 @@ class DatabaseHelper:
             print(f"❌ Помилка: {e}")
             return pd.DataFrame()
     
+    def get_forecast_accuracy_for_districts(self, district_ids, hours_back=24):
+        """
+        MAE та середні прогноз/факт по кожному забруднювачу для кількох районів
+        одним запитом: для кожної години береться найсвіжіший запуск, випущений
+        до неї (як у get_forecasts_for_validation), і порівнюється із середнім
+        реальних вимірювань у вікні ±30 хв. З БД виходить по рядку на район.
+        """
+        district_ids = [int(d) for d in district_ids]
+        
+        if not district_ids:
+            return pd.DataFrame()
+        
+        try:
+            aggregates = ',\n'.join(
+                f"""
+                    AVG(ABS(a.{param} - f.{param})) AS {param}_mae,
+                    AVG(f.{param}) AS {param}_forecast_mean,
+                    AVG(a.{param}) AS {param}_actual_mean"""
+                for param in Config.TARGET_FEATURES
+            )
+            actual_means = ', '.join(
+                f'AVG(h.{param}) AS {param}' for param in Config.TARGET_FEATURES
+            )
+            
+            query = f"""
+                WITH latest AS (
+                    SELECT DISTINCT ON (district_id, measured_at)
+                        district_id, measured_at, pm25, pm10, no2, so2, co, o3
+                    FROM forecast_points
+                    WHERE district_id = ANY(%s)
+                      AND issued_at >= NOW() - make_interval(hours => %s + 48)
+                      AND measured_at >= NOW() - make_interval(hours => %s)
+                      AND measured_at <= NOW()
+                      AND issued_at <= measured_at
+                    ORDER BY district_id, measured_at, issued_at DESC
+                )
+                SELECT
+                    f.district_id,
+                    COUNT(*) AS samples,{aggregates}
+                FROM latest f
+                CROSS JOIN LATERAL (
+                    SELECT {actual_means}
+                    FROM air_quality_history h
+                    WHERE h.district_id = f.district_id
+                      AND h.is_forecast = FALSE
+                      AND h.measured_at >= f.measured_at - INTERVAL '30 minutes'
+                      AND h.measured_at < f.measured_at + INTERVAL '30 minutes'
+                ) a
+                WHERE a.pm25 IS NOT NULL
+                GROUP BY f.district_id
+                ORDER BY f.district_id
+            """
+            
+            df = self.read_dataframe(query, params=(district_ids, hours_back, hours_back))
+            
+            value_cols = [col for col in df.columns if col not in ('district_id', 'samples')]
+            return df.astype({col: 'float32' for col in value_cols})
+            
+        except Exception as e:
+            print(f"❌ Помилка: {e}")
+            return pd.DataFrame()
+    
+    def get_forecast_accuracy_by_horizon(self, district_id, hours_back=24 * 7):
+        """
+        MAE прогнозів по горизонтах (1..N годин) за останні hours_back годин
+        
+        Прогноз на годину h порівнюється із середнім реальних вимірювань
+        у вікні ±30 хв - пошук по індексу (district_id, measured_at)
+        """
+        try:
+            query = """
+                SELECT
+                    p.horizon,
+                    COUNT(*) AS samples,
+                    AVG(ABS(a.pm25 - p.pm25)) AS pm25_mae,
+                    AVG(ABS(a.pm10 - p.pm10)) AS pm10_mae,
+                    AVG(ABS(a.no2 - p.no2)) AS no2_mae,
+                    AVG(ABS(a.so2 - p.so2)) AS so2_mae,
+                    AVG(ABS(a.co - p.co)) AS co_mae,
+                    AVG(ABS(a.o3 - p.o3)) AS o3_mae
+                FROM forecast_points p
+                CROSS JOIN LATERAL (
+                    SELECT
+                        AVG(h.pm25) AS pm25, AVG(h.pm10) AS pm10, AVG(h.no2) AS no2,
+                        AVG(h.so2) AS so2, AVG(h.co) AS co, AVG(h.o3) AS o3
+                    FROM air_quality_history h
+                    WHERE h.district_id = p.district_id
+                      AND h.is_forecast = FALSE
+                      AND h.measured_at >= p.measured_at - INTERVAL '30 minutes'
+                      AND h.measured_at < p.measured_at + INTERVAL '30 minutes'
+                ) a
+                WHERE p.district_id = %s
+                  AND p.issued_at >= NOW() - INTERVAL '%s hours'
+                  AND p.measured_at <= NOW()
+                  AND a.pm25 IS NOT NULL
+                GROUP BY p.horizon
+                ORDER BY p.horizon
+            """
+            
+            df = self.read_dataframe(query, params=(district_id, hours_back))
+            
+            mae_cols = [f'{param}_mae' for param in Config.TARGET_FEATURES]
+            return df.astype({col: 'float32' for col in mae_cols})
+            
+        except Exception as e:
+            print(f"❌ Помилка: {e}")
+            return pd.DataFrame()
+    
     def get_actual_data_for_period(self, district_id, start_time, end_time):
         """
         Отримати реальні дані за період
         """
         try:
-            conn = self.get_connection()
-            
             query = """
                 SELECT measured_at, pm25, pm10, no2, so2, co, o3, aqi
                 FROM air_quality_history
@@ -244,8 +661,7 @@ class DatabaseHelper:
                 ORDER BY measured_at ASC
             """
             
-            df = pd.read_sql_query(query, conn, params=(district_id, start_time, end_time))
-            conn.close()
+            df = self.read_dataframe(query, params=(district_id, start_time, end_time))
             
             return df
             
@@ -0,0 +1,137 @@
+# ml-service/utils/disk_cache.py
+"""
+Спільні примітиви дискових кешів (ResultCache, DatasetCache, PlotStore)
+
+- atomic_write / atomic_write_dir - запис у тимчасовий файл/теку поруч і
+  rename: читач бачить або старий запис, або повний новий
+- LRUDirectory - обмеження розміру теки кешу: видаляються записи, які
+  найдовше не використовувались (час використання = mtime, оновлюється touch())
+"""
+
+import os
+import shutil
+import threading
+import uuid
+
+
+def atomic_write(path, write):
+    """
+    write(tmp_path) пише вміст у тимчасовий файл, який потім атомарно
+    замінює path (os.replace). При помилці tmp видаляється, виняток летить далі
+    """
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_dir(path, write):
+    """
+    write(tmp_dir) заповнює тимчасову теку, яка потім перейменовується в path
+
+    Якщо path уже існує (паралельний запис того самого ключа), os.rename
+    кидає OSError - тимчасова тека видаляється, виняток летить далі
+    """
+    tmp_dir = os.path.join(os.path.dirname(path), f'.tmp-{uuid.uuid4().hex}')
+    os.makedirs(tmp_dir)
+
+    try:
+        write(tmp_dir)
+        os.rename(tmp_dir, path)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def touch(path):
+    """Позначити запис як щойно використаний (для LRU)"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _is_temporary(name):
+    return name.startswith('.') or name.endswith('.tmp')
+
+
+def _entry_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(dirpath, name))
+        for dirpath, _, names in os.walk(path) for name in names
+    )
+
+
+def _remove_entry(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        os.remove(path)
+
+
+class LRUDirectory:
+    """
+    Обмежений за розміром набір записів (файлів або тек) у одній чи кількох теках
+
+    evict() видаляє записи з найстарішим mtime, поки їх сумарний розмір
+    > max_bytes або кількість > max_entries (None - без обмеження).
+    Тимчасові записи atomic_write* не враховуються і не видаляються.
+    """
+
+    def __init__(self, directories, max_bytes=None, max_entries=None):
+        if isinstance(directories, str):
+            directories = [directories]
+
+        self.directories = list(directories)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        for directory in self.directories:
+            os.makedirs(directory, exist_ok=True)
+
+    def _over_limit(self, total, count):
+        return (
+            (self.max_bytes is not None and total > self.max_bytes) or
+            (self.max_entries is not None and count > self.max_entries)
+        )
+
+    def evict(self):
+        """Видаляти записи, що найдовше не використовувались, поки кеш понад ліміт"""
+        with self._lock:
+            entries = []
+            total = 0
+
+            for directory in self.directories:
+                for name in os.listdir(directory):
+                    if _is_temporary(name):
+                        continue
+                    path = os.path.join(directory, name)
+                    try:
+                        size = _entry_size(path) if self.max_bytes is not None else 0
+                        entries.append((os.path.getmtime(path), size, path))
+                    except OSError:
+                        continue
+                    total += size
+
+            count = len(entries)
+            if not self._over_limit(total, count):
+                return
+
+            entries.sort()
+            for _, size, path in entries:
+                if not self._over_limit(total, count):
+                    break
+                try:
+                    _remove_entry(path)
+                except OSError:
+                    continue
+                total -= size
+                count -= 1
@@ -0,0 +1,54 @@
+# ml-service/utils/downsampling.py
+import numpy as np
+
+
+def lttb_indices(y, threshold, x=None):
+    """
+    Largest-Triangle-Three-Buckets: індекси threshold точок, що зберігають форму ряду
+
+    Перша й остання точки завжди входять. Решта ряду ділиться на threshold-2
+    кошики; з кожного береться точка, що утворює найбільший трикутник з
+    попередньою вибраною точкою та середнім наступного кошика - піки і провали
+    не згладжуються, як при простому проріджуванні.
+
+    Returns:
+        np.ndarray[int64]: зростаючі індекси (усі, якщо len(y) <= threshold)
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+    # NaN не повинен "вигравати" argmax і псувати середні кошиків
+    y = np.nan_to_num(y, nan=np.nanmean(y) if np.isfinite(y).any() else 0.0)
+
+    # threshold-1 межа -> threshold-2 непорожніх кошиків між першою та останньою точкою
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    selected = 0
+
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = n - 1, n
+
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        indices[bucket + 1] = selected
+
+    return indices
+
@@ -0,0 +1,413 @@
+# ml-service/utils/drift_detectors.py
+import json
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from config import Config
+
+
+class PageHinkley:
+    """
+    Тест Page-Hinkley на зростання середнього (онлайн, O(1) на значення)
+
+    Подається відносна абсолютна похибка прогнозу; якщо вона стабільно
+    зростає понад середнє на більше ніж threshold - дрейф.
+    """
+
+    def __init__(self, delta=None, threshold=None, min_samples=None):
+        self.delta = Config.DRIFT_PH_DELTA if delta is None else delta
+        self.threshold = Config.DRIFT_PH_THRESHOLD if threshold is None else threshold
+        self.min_samples = Config.DRIFT_PH_MIN_SAMPLES if min_samples is None else min_samples
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.cumsum = 0.0
+        self.min_cumsum = 0.0
+
+    @property
+    def statistic(self):
+        return self.cumsum - self.min_cumsum
+
+    def update(self, x):
+        """Додати значення; повертає True якщо виявлено дрейф"""
+        x = float(x)
+        self.n += 1
+        self.mean += (x - self.mean) / self.n
+        self.cumsum += x - self.mean - self.delta
+        self.min_cumsum = min(self.min_cumsum, self.cumsum)
+
+        return self.n >= self.min_samples and self.statistic > self.threshold
+
+    def to_dict(self):
+        return {
+            'n': self.n,
+            'mean': round(self.mean, 6),
+            'cumsum': round(self.cumsum, 6),
+            'min_cumsum': round(self.min_cumsum, 6)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        detector = cls()
+        detector.n = data['n']
+        detector.mean = data['mean']
+        detector.cumsum = data['cumsum']
+        detector.min_cumsum = data['min_cumsum']
+        return detector
+
+
+class PSISketch:
+    """
+    Скетч розподілу ознаки для PSI (Population Stability Index)
+
+    Перші reference_size значень задають межі бінів (квантилі) та еталонний
+    розподіл; далі поточний розподіл - лічильники бінів з експоненційним
+    згасанням (half_life значень), тож оновлення O(bins) = O(1), а стан -
+    кілька десятків чисел.
+    """
+
+    def __init__(self, bins=None, reference_size=None, half_life=None):
+        self.bins = bins or Config.DRIFT_PSI_BINS
+        self.reference_size = reference_size or Config.DRIFT_PSI_REFERENCE_SIZE
+        self.half_life = half_life or Config.DRIFT_PSI_HALF_LIFE
+        self.decay = 0.5 ** (1.0 / self.half_life)
+
+        self.reference_samples = []
+        self.edges = None
+        self.reference = None
+        self.current = None
+
+    @property
+    def ready(self):
+        return self.edges is not None
+
+    def _bin(self, x):
+        return int(np.searchsorted(self.edges, x, side='right'))
+
+    def _freeze_reference(self):
+        samples = np.asarray(self.reference_samples, dtype=float)
+        quantiles = np.linspace(0, 1, self.bins + 1)[1:-1]
+        self.edges = np.unique(np.quantile(samples, quantiles)).tolist()
+
+        counts = np.bincount(
+            np.searchsorted(self.edges, samples, side='right'),
+            minlength=len(self.edges) + 1
+        ).astype(float)
+        self.reference = (counts / counts.sum()).tolist()
+        self.current = [0.0] * len(self.reference)
+        self.reference_samples = []
+
+    def rebase(self, values):
+        """Заново задати еталон з останніх reference_size значень (напр. даних нової моделі)"""
+        samples = [float(x) for x in values if x is not None and np.isfinite(x)][-self.reference_size:]
+        if len(samples) < self.bins:
+            return False
+
+        self.reference_samples = samples
+        self._freeze_reference()
+        return True
+
+    def update(self, x):
+        if x is None or not np.isfinite(x):
+            return
+
+        if not self.ready:
+            self.reference_samples.append(float(x))
+            if len(self.reference_samples) >= self.reference_size:
+                self._freeze_reference()
+            return
+
+        self.current = [count * self.decay for count in self.current]
+        self.current[self._bin(x)] += 1.0
+
+    def psi(self):
+        """PSI поточного розподілу відносно еталонного (None поки мало даних)"""
+        if not self.ready:
+            return None
+
+        total = sum(self.current)
+        if total < Config.DRIFT_PSI_MIN_WEIGHT:
+            return None
+
+        eps = 1e-4
+        value = 0.0
+        for ref, cur in zip(self.reference, self.current):
+            ref = max(ref, eps)
+            cur = max(cur / total, eps)
+            value += (cur - ref) * math.log(cur / ref)
+
+        return value
+
+    def to_dict(self):
+        if not self.ready:
+            return {'reference_samples': [round(x, 4) for x in self.reference_samples]}
+
+        return {
+            'edges': [round(x, 4) for x in self.edges],
+            'reference': [round(x, 6) for x in self.reference],
+            'current': [round(x, 6) for x in self.current]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        if 'edges' in data:
+            sketch.edges = data['edges']
+            sketch.reference = data['reference']
+            sketch.current = data['current']
+        else:
+            sketch.reference_samples = data['reference_samples']
+        return sketch
+
+
+def _naive(value):
+    """Aware datetime -> naive локальний час (як TIMESTAMP у БД), щоб порівняння не падали"""
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+class DriftMonitor:
+    """
+    Онлайн-детектори дрейфу по районах
+
+    - Page-Hinkley на похибках прогнозу кожного забруднювача
+    - PSI-скетчі розподілів забруднювачів та погодних ознак
+
+    Нові вимірювання читаються інкрементально в порядку надходження (після
+    найбільшого обробленого id району), кожне оновлює детектори за O(1);
+    стан зберігається в JSON між перезапусками.
+    """
+
+    RESIDUAL_PARAMS = Config.TARGET_FEATURES
+    FEATURE_PARAMS = Config.TARGET_FEATURES + Config.WEATHER_FEATURES
+
+    def __init__(self, state_path=None):
+        self.state_path = state_path or Config.DRIFT_STATE_PATH
+        self._lock = threading.Lock()
+        self.districts = {}
+        self.load()
+
+    def _district(self, district_id):
+        key = str(district_id)
+        if key not in self.districts:
+            self.districts[key] = {
+                'watermark': None,
+                'watermark_id': None,
+                'residuals': {param: PageHinkley() for param in self.RESIDUAL_PARAMS},
+                'features': {param: PSISketch() for param in self.FEATURE_PARAMS},
+                'alerts': []
+            }
+        return self.districts[key]
+
+    # ==================== UPDATE ====================
+
+    def update(self, district_id, measurement, forecast=None):
+        """
+        Оновити детектори одним вимірюванням
+
+        measurement: dict з measured_at, забруднювачами та погодою (і id рядка БД)
+        forecast: dict забруднювачів з прогнозу на цю годину (або None)
+
+        Returns:
+            list: нові сповіщення про дрейф
+        """
+        state = self._district(district_id)
+        measured_at = _naive(measurement['measured_at'])
+        alerts = []
+
+        if forecast:
+            for param, detector in state['residuals'].items():
+                actual = measurement.get(param)
+                predicted = forecast.get(param)
+                if actual is None or predicted is None or np.isnan(actual) or np.isnan(predicted):
+                    continue
+
+                # Відносна похибка, щоб один поріг підходив і для PM2.5, і для CO
+                error = min(abs(actual - predicted) / max(abs(actual), Config.DRIFT_MIN_SCALE), 5.0)
+
+                if detector.update(error):
+                    alerts.append({
+                        'type': 'residual',
+                        'param': param,
+                        'measured_at': measured_at.isoformat(),
+                        'statistic': round(detector.statistic, 3)
+                    })
+                    detector.reset()
+
+        for param, sketch in state['features'].items():
+            sketch.update(measurement.get(param))
+
+        # watermark (остання година) - для статусу; вибірку з БД веде watermark_id
+        if state['watermark'] is None or measured_at > _naive(datetime.fromisoformat(state['watermark'])):
+            state['watermark'] = measured_at.isoformat()
+
+        row_id = measurement.get('id')
+        if row_id is not None and (state['watermark_id'] is None or row_id > state['watermark_id']):
+            state['watermark_id'] = int(row_id)
+
+        if alerts:
+            state['alerts'] = (state['alerts'] + alerts)[-Config.DRIFT_MAX_ALERTS:]
+
+        return alerts
+
+    def update_from_db(self, db, district_ids):
+        """
+        Обробити нові вимірювання з БД після watermark кожного району
+
+        Стан без watermark_id (новий район або збережений до переходу на id)
+        читається за measured_at, далі - лише за id.
+
+        Returns:
+            dict: {district_id: {'processed': int, 'alerts': list}}
+        """
+        with self._lock:
+            bootstrap = datetime.now() - timedelta(hours=Config.DRIFT_BOOTSTRAP_HOURS)
+            watermarks = {}
+            for district_id in district_ids:
+                state = self._district(district_id)
+                if state['watermark_id'] is not None:
+                    watermarks[district_id] = (state['watermark_id'], None)
+                elif state['watermark']:
+                    watermarks[district_id] = (None, _naive(datetime.fromisoformat(state['watermark'])))
+                else:
+                    watermarks[district_id] = (None, bootstrap)
+
+            df = db.get_measurements_with_forecasts_since(watermarks)
+            summary = {district_id: {'processed': 0, 'alerts': []} for district_id in district_ids}
+
+            forecast_cols = [f'{param}_forecast' for param in self.RESIDUAL_PARAMS]
+
+            for row in df.to_dict(orient='records'):
+                district_id = int(row['district_id'])
+                row['measured_at'] = row['measured_at'].to_pydatetime()
+                row['id'] = int(row['id'])
+
+                forecast = None
+                if not np.isnan(row[forecast_cols[0]]):
+                    forecast = {param: row[f'{param}_forecast'] for param in self.RESIDUAL_PARAMS}
+
+                summary[district_id]['processed'] += 1
+                summary[district_id]['alerts'].extend(self.update(district_id, row, forecast))
+
+            self.save()
+
+        for district_id, item in summary.items():
+            for alert in item['alerts']:
+                print(f"🚨 Дрейф у районі {district_id}: {alert['param']} ({alert['measured_at']})")
+
+        return summary
+
+    def reset_residuals(self, district_id, reference_df=None):
+        """
+        Скинути детектори похибок і сповіщення (після перенавчання моделі)
+
+        reference_df - дані, на яких навчена нова модель: PSI-еталон переноситься
+        на їх останні DRIFT_PSI_REFERENCE_SIZE записів, інакше стійкий зсув
+        (напр. сезонний) лишався б "дрейфом" і для нової моделі
+        """
+        with self._lock:
+            state = self._district(district_id)
+            for detector in state['residuals'].values():
+                detector.reset()
+            state['alerts'] = []
+
+            if reference_df is not None:
+                if 'measured_at' in reference_df.columns:
+                    reference_df = reference_df.sort_values('measured_at')
+                for param, sketch in state['features'].items():
+                    if param in reference_df.columns:
+                        sketch.rebase(reference_df[param].to_numpy(dtype=float))
+
+            self.save()
+
+    # ==================== STATUS ====================
+
+    def status(self, district_id):
+        """
+        Поточний стан детекторів району
+
+        drift_detected - лише сповіщення Page-Hinkley (зростання похибки моделі);
+        зсув розподілів (PSI) - попередження feature_shift, сам по собі не привід перенавчати
+        """
+        with self._lock:
+            state = self._district(district_id)
+
+            psi = {param: sketch.psi() for param, sketch in state['features'].items()}
+            shifted = [
+                param for param, value in psi.items()
+                if value is not None and value > Config.DRIFT_PSI_THRESHOLD
+            ]
+
+            return {
+                'drift_detected': bool(state['alerts']),
+                'feature_shift': bool(shifted),
+                'watermark': state['watermark'],
+                'watermark_id': state['watermark_id'],
+                'alerts': list(state['alerts']),
+                'psi': {param: round(value, 4) if value is not None else None for param, value in psi.items()},
+                'shifted_features': shifted,
+                'page_hinkley': {
+                    param: round(detector.statistic, 3)
+                    for param, detector in state['residuals'].items()
+                }
+            }
+
+    # ==================== PERSISTENCE ====================
+
+    def save(self):
+        """Атомарно зберегти стан (tmp + rename)"""
+        data = {
+            district_id: {
+                'watermark': state['watermark'],
+                'watermark_id': state['watermark_id'],
+                'residuals': {param: d.to_dict() for param, d in state['residuals'].items()},
+                'features': {param: s.to_dict() for param, s in state['features'].items()},
+                'alerts': state['alerts']
+            }
+            for district_id, state in self.districts.items()
+        }
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp_path = f'{self.state_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.state_path)
+
+    def load(self):
+        if not os.path.exists(self.state_path):
+            return
+
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Не вдалося прочитати стан детекторів дрейфу: {e}")
+            return
+
+        for district_id, state in data.items():
+            self.districts[district_id] = {
+                'watermark': state['watermark'],
+                'watermark_id': state.get('watermark_id'),
+                'residuals': {param: PageHinkley.from_dict(d) for param, d in state['residuals'].items()},
+                'features': {param: PSISketch.from_dict(s) for param, s in state['features'].items()},
+                'alerts': state['alerts']
+            }
+
+
+_drift_monitor = None
+_drift_monitor_lock = threading.Lock()
+
+
+def get_drift_monitor():
+    """Спільний DriftMonitor процесу (стан читається з диску один раз)"""
+    global _drift_monitor
+
+    with _drift_monitor_lock:
+        if _drift_monitor is None:
+            _drift_monitor = DriftMonitor()
+        return _drift_monitor
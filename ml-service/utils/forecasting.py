@@ -0,0 +1,117 @@
+# ml-service/utils/forecasting.py
+from datetime import timedelta
+import pandas as pd
+from config import Config
+from utils.aqi import calculate_overall_aqi, get_aqi_status
+from utils.serialization import columns_to_records
+
+def build_district_forecast(district_id, hours, df):
+    """
+    Побудувати прогноз для району з уже завантаженої історії
+    Повертає (result, forecasts_df); forecasts_df = None якщо прогноз не вдався
+    """
+    if len(df) < 10:
+        return {
+            'success': False,
+            'error': f'Not enough historical data: {len(df)} records'
+        }, None
+    
+    print(f"✅ Завантажено {len(df)} історичних записів")
+    
+    from models.simple_forecast_model import SimpleForecastModel
+    
+    simple_model = SimpleForecastModel(district_id)
+    recent_data = df[['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']].tail(24)
+    
+    if len(recent_data) < 5:
+        return {
+            'success': False,
+            'error': 'Not enough recent data for forecast'
+        }, None
+    
+    print(f"🤖 Генерація прогнозу на {hours} годин...")
+    forecast_df = simple_model.predict(recent_data, hours=hours)
+    
+    pollutants = ['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']
+    last_time = df['measured_at'].max()
+    
+    # Округлення одним np.round на стовпець; AQI рахується з неокруглених значень
+    records = columns_to_records({param: forecast_df[param].to_numpy() for param in pollutants})
+    raw_values = forecast_df[pollutants].to_numpy(dtype=float).tolist()
+    
+    forecasts = []
+    
+    for i, (record, raw) in enumerate(zip(records, raw_values)):
+        aqi, dominant, aqi_breakdown = calculate_overall_aqi(*raw)
+        
+        forecasts.append({
+            'measured_at': (last_time + timedelta(hours=i+1)).isoformat(),
+            **record,
+            'aqi': aqi,
+            'aqi_status': get_aqi_status(aqi),
+            'dominant_pollutant': dominant
+        })
+    
+    print(f"✅ Створено {len(forecasts)} прогнозів для району {district_id}")
+    
+    return {
+        'success': True,
+        'district_id': district_id,
+        'hours': hours,
+        'model_type': 'persistence_trend',
+        'forecasts': forecasts
+    }, pd.DataFrame(forecasts)
+
+def build_forecasts_for_districts(windows, hours):
+    """
+    Прогнози для всіх районів з уже завантажених вікон {district_id: DataFrame}
+    Повертає (results, forecasts_by_district) - список результатів по районах
+    і DataFrame прогнозів для збереження
+    """
+    results = []
+    forecasts_by_district = {}
+    
+    for district in Config.DISTRICTS:
+        try:
+            data, forecasts_df = build_district_forecast(
+                district['id'], hours, windows[district['id']]
+            )
+            
+            if data.get('success'):
+                forecasts_by_district[district['id']] = forecasts_df
+                results.append({
+                    'district_id': district['id'],
+                    'district_name': district['name'],
+                    'success': True,
+                    'forecasts_count': len(data['forecasts'])
+                })
+            else:
+                results.append({
+                    'district_id': district['id'],
+                    'district_name': district['name'],
+                    'success': False,
+                    'error': data.get('error')
+                })
+        except Exception as e:
+            results.append({
+                'district_id': district['id'],
+                'district_name': district['name'],
+                'success': False,
+                'error': str(e)
+            })
+    
+    return results, forecasts_by_district
+
+def forecast_all_districts(db, hours=24):
+    """
+    Прогноз для всіх районів: історія - одним запитом, збереження - одним INSERT
+    Повертає список результатів по районах
+    """
+    district_ids = [district['id'] for district in Config.DISTRICTS]
+    windows = db.get_recent_windows(district_ids, hours=48)
+    
+    results, forecasts_by_district = build_forecasts_for_districts(windows, hours)
+    
+    db.save_forecasts_for_districts(forecasts_by_district)
+    
+    return results
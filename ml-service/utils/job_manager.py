@@ -0,0 +1,318 @@
+# ml-service/utils/job_manager.py
+import json
+import os
+import re
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import Config
+from utils import serialization
+
+
+class JobCancelled(Exception):
+    """Задачу скасовано користувачем (піднімається з job.check_cancelled())"""
+
+
+class Job:
+    """
+    Фонова задача
+
+    Функція задачі отримує job першим аргументом і може звітувати
+    прогрес через job.update(progress=0..1, message='...', **details)
+    (details - довільні поля останнього кроку, напр. epoch/loss).
+    Довгі задачі мають періодично викликати job.check_cancelled().
+    """
+
+    def __init__(self, kind, key=None, params=None, manager=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.params = params or {}
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = None
+        self.details = {}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.version = 0  # Зростає з кожною зміною стану (для SSE)
+        self._cancel_requested = threading.Event()
+        self._manager = manager
+
+    def update(self, progress=None, message=None, **details):
+        """Оновити прогрес (0..1), повідомлення та/або деталі поточного кроку"""
+        if progress is not None:
+            self.progress = round(min(max(float(progress), 0.0), 1.0), 3)
+        if message is not None:
+            self.message = message
+        if details:
+            self.details = details
+        if self._manager is not None:
+            self._manager.persist(self)
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_requested.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_requested.is_set():
+            raise JobCancelled()
+
+    def eta_seconds(self):
+        """Оцінка часу до завершення за поточним прогресом"""
+        if self.status != 'running' or not self.started_at or not 0 < self.progress < 1:
+            return None
+        elapsed = (datetime.now() - self.started_at).total_seconds()
+        return round(elapsed * (1 - self.progress) / self.progress, 1)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'key': self.key,
+            'params': self.params,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'details': self.details,
+            'eta_seconds': self.eta_seconds(),
+            'cancel_requested': self.cancel_requested,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class JobManager:
+    """
+    Черга фонових задач (навчання, перевірки, тести моделей)
+
+    - submit() одразу повертає job; робота виконується в пулі потоків
+    - задачі з однаковим key, поки одна з них queued/running, не дублюються
+    - стан кожної задачі зберігається в JSON-файл у JOBS_PATH,
+      тож результати доступні й після перезапуску сервісу
+    - cancel() - кооперативне скасування: задача зупиняється на найближчому
+      job.check_cancelled() і отримує статус cancelled
+    - wait_for_update() - очікування змін стану (стрімінг прогресу через SSE)
+    """
+
+    ACTIVE_STATUSES = ('queued', 'running')
+    FINAL_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+    def __init__(self, jobs_path=None, max_workers=None):
+        self.jobs_path = jobs_path or Config.JOBS_PATH
+        self.max_workers = max_workers or Config.JOB_WORKERS
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix='job'
+        )
+        self._lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._jobs = {}       # job_id -> Job (активні та нещодавні)
+        self._active = {}     # key -> job_id
+
+        os.makedirs(self.jobs_path, exist_ok=True)
+        self._recover_interrupted()
+
+    def job_file(self, job_id):
+        return os.path.join(self.jobs_path, f'{job_id}.json')
+
+    def _recover_interrupted(self):
+        """Задачі, що були queued/running при зупинці сервісу, позначити як failed"""
+        for job in self._read_all():
+            if job['status'] in self.ACTIVE_STATUSES:
+                job['status'] = 'failed'
+                job['error'] = 'interrupted by service restart'
+                with open(self.job_file(job['job_id']), 'w', encoding='utf-8') as f:
+                    json.dump(job, f, ensure_ascii=False, default=str)
+
+    def _read_all(self):
+        jobs = []
+
+        for name in os.listdir(self.jobs_path):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.jobs_path, name), encoding='utf-8') as f:
+                    jobs.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+
+        return jobs
+
+    def submit(self, kind, func, *args, key=None, params=None, **kwargs):
+        """
+        Поставити задачу в чергу
+
+        Returns:
+            tuple: (job, created) - created=False якщо повернуто вже активну задачу з тим самим key
+        """
+        with self._lock:
+            if key is not None and key in self._active:
+                return self._jobs[self._active[key]], False
+
+            job = Job(kind, key=key, params=params, manager=self)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active[key] = job.id
+
+        self.persist(job)
+        self._executor.submit(self._run, job, func, args, kwargs)
+
+        print(f"📥 Задача {kind} ({job.id}) в черзі")
+        return job, True
+
+    def _run(self, job, func, args, kwargs):
+        job.status = 'running'
+        job.started_at = datetime.now()
+        self.persist(job)
+
+        try:
+            # Скасовано ще в черзі
+            job.check_cancelled()
+            result = func(job, *args, **kwargs)
+            job.result = result
+
+            # Функції сервісу повертають {'success': False, ...} замість винятку
+            if isinstance(result, dict) and result.get('success') is False:
+                job.status = 'failed'
+                job.error = result.get('error') or result.get('reason')
+            else:
+                job.status = 'succeeded'
+                job.progress = 1.0
+
+        except JobCancelled:
+            job.status = 'cancelled'
+            job.error = 'cancelled by user'
+
+        except Exception as e:
+            print(f"❌ Задача {job.kind} ({job.id}) впала: {e}")
+            traceback.print_exc()
+            job.status = 'failed'
+            job.error = str(e)
+
+        finally:
+            job.finished_at = datetime.now()
+            with self._lock:
+                if job.key is not None and self._active.get(job.key) == job.id:
+                    del self._active[job.key]
+                self._evict_finished()
+            self.persist(job)
+
+        print(f"✅ Задача {job.kind} ({job.id}): {job.status}")
+
+    def _evict_finished(self):
+        """Тримати в пам'яті не більше JOBS_IN_MEMORY завершених задач (решта - на диску)"""
+        finished = [
+            job for job in self._jobs.values()
+            if job.status not in self.ACTIVE_STATUSES
+        ]
+        excess = len(finished) - Config.JOBS_IN_MEMORY
+
+        if excess > 0:
+            finished.sort(key=lambda job: job.finished_at)
+            for job in finished[:excess]:
+                del self._jobs[job.id]
+
+    def persist(self, job):
+        """Атомарно записати стан задачі (tmp + rename) і розбудити очікувачів wait_for_update"""
+        with self._changed:
+            job.version += 1
+            self._changed.notify_all()
+
+        path = self.job_file(job.id)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+
+        try:
+            # Результати (напр. /test-model) можуть містити numpy - серіалізуються напряму
+            with open(tmp_path, 'wb') as f:
+                f.write(serialization.dumps(job.to_dict()))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Не вдалося зберегти задачу {job.id}: {e}")
+
+    def get(self, job_id):
+        """Стан задачі (dict) або None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.to_dict()
+
+        if not re.fullmatch(r'[0-9a-f]{32}', job_id):
+            return None
+
+        path = self.job_file(job_id)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'rb') as f:
+            return serialization.loads(f.read())
+
+    def cancel(self, job_id):
+        """
+        Запросити скасування задачі
+
+        Returns:
+            dict: стан задачі; None якщо задачі немає в пам'яті (вже завершена давно або невідома)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+        if job is None:
+            return None
+
+        if job.status in self.ACTIVE_STATUSES:
+            job._cancel_requested.set()
+            self.persist(job)
+            print(f"⏹️ Задача {job.kind} ({job.id}): запит на скасування")
+
+        return job.to_dict()
+
+    def wait_for_update(self, job_id, version, timeout):
+        """
+        Чекати, поки стан задачі зміниться після версії version
+
+        Returns:
+            Job (можливо без змін, якщо минув timeout) або None якщо задачі немає в пам'яті
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+        if job is None:
+            return None
+
+        with self._changed:
+            self._changed.wait_for(lambda: job.version > version, timeout=timeout)
+        return job
+
+    def list_jobs(self, kind=None, limit=50):
+        """Останні задачі без результатів (новіші першими)"""
+        jobs = []
+
+        for job in self._read_all():
+            if kind is None or job['kind'] == kind:
+                job.pop('result', None)
+                jobs.append(job)
+
+        jobs.sort(key=lambda job: job['created_at'], reverse=True)
+        return jobs[:limit]
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Спільна черга фонових задач процесу (app.py та blueprint-и)"""
+    global _job_manager
+
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
@@ -0,0 +1,284 @@
+# ml-service/utils/job_scheduler.py
+import json
+import os
+import random
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from config import Config
+
+
+class ScheduledJob:
+    """
+    Періодична задача з послідовних етапів (stages)
+
+    stages: список (name, func); func() виконується по черзі, час кожного
+    етапу записується в метрики. Помилка етапу не зупиняє наступні, якщо
+    етап не позначений як required.
+    """
+
+    def __init__(self, name, stages, interval_minutes, offset_minutes=0,
+                 jitter_seconds=0, max_concurrency=1, required_stages=()):
+        self.name = name
+        self.stages = stages
+        self.interval = timedelta(minutes=interval_minutes)
+        self.offset = timedelta(minutes=offset_minutes)
+        self.jitter_seconds = jitter_seconds
+        self.required_stages = set(required_stages)
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+
+        self.last_slot = None        # Останній запланований слот, який було запущено
+        self.last_completed = None
+        self.pending_slot = None     # Наступний слот, що чекає запуску
+        self.next_run_at = None      # pending_slot + jitter
+        self.runs = 0
+        self.failures = 0
+        self.missed = 0
+        self.skipped_overlap = 0
+        self.running = 0
+        self.stage_metrics = {
+            stage_name: {'runs': 0, 'failures': 0, 'last_seconds': None,
+                         'avg_seconds': None, 'max_seconds': None, 'last_error': None}
+            for stage_name, _ in stages
+        }
+
+    def slot_for(self, moment):
+        """Останній слот розкладу не пізніше moment (слоти вирівняні від опівночі + offset)"""
+        day_start = moment.replace(hour=0, minute=0, second=0, microsecond=0) + self.offset
+        if moment < day_start:
+            day_start -= timedelta(days=1)
+        steps = int((moment - day_start) / self.interval)
+        return day_start + steps * self.interval
+
+    def schedule_next(self, after_slot):
+        slot = after_slot + self.interval
+        self.next_run_at = slot + timedelta(seconds=random.uniform(0, self.jitter_seconds))
+        return slot
+
+    def record_stage(self, stage_name, seconds, error=None):
+        metrics = self.stage_metrics[stage_name]
+        metrics['runs'] += 1
+        metrics['last_seconds'] = round(seconds, 3)
+        metrics['max_seconds'] = round(max(metrics['max_seconds'] or 0, seconds), 3)
+        # Експоненційне згладжування, щоб не зберігати всю історію запусків
+        metrics['avg_seconds'] = round(
+            seconds if metrics['avg_seconds'] is None else 0.8 * metrics['avg_seconds'] + 0.2 * seconds,
+            3
+        )
+        if error is not None:
+            metrics['failures'] += 1
+            metrics['last_error'] = error
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'interval_minutes': self.interval.total_seconds() / 60,
+            'max_concurrency': self.max_concurrency,
+            'running': self.running,
+            'last_slot': self.last_slot.isoformat() if self.last_slot else None,
+            'last_completed': self.last_completed.isoformat() if self.last_completed else None,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'runs': self.runs,
+            'failures': self.failures,
+            'missed': self.missed,
+            'skipped_overlap': self.skipped_overlap,
+            'stages': self.stage_metrics
+        }
+
+
+class JobScheduler:
+    """
+    Планувальник усередині процесу ML сервісу
+
+    - слоти розкладу вирівняні (напр. щогодини о :05) + випадковий jitter
+    - пропущені слоти (сервіс був зупинений) не виконуються кожен окремо:
+      якщо останній слот не запускався - один catch-up запуск, решта рахуються в missed
+    - max_concurrency на задачу: якщо попередній запуск ще триває, новий пропускається
+    - час кожного етапу в метриках; стан (останній слот) зберігається в JSON
+    """
+
+    def __init__(self, state_path=None, max_workers=None, tick_seconds=None):
+        self.state_path = state_path or Config.SCHEDULER_STATE_PATH
+        self.tick_seconds = tick_seconds or Config.SCHEDULER_TICK_SECONDS
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.SCHEDULER_WORKERS,
+            thread_name_prefix='scheduler'
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_job(self, job):
+        self._jobs[job.name] = job
+        return job
+
+    # ==================== LIFECYCLE ====================
+
+    def start(self):
+        """Запустити фоновий потік планувальника"""
+        if self._thread is not None:
+            return
+
+        self._load_state()
+        now = datetime.now()
+
+        for job in self._jobs.values():
+            current_slot = job.slot_for(now)
+
+            if job.last_slot is None or job.last_slot < current_slot:
+                # Catch-up: поточний слот ще не запускався - запустити одразу
+                if job.last_slot is not None:
+                    job.missed += max(int((current_slot - job.last_slot) / job.interval) - 1, 0)
+                job.next_run_at = now
+                job.pending_slot = current_slot
+            else:
+                job.pending_slot = job.schedule_next(current_slot)
+
+        self._thread = threading.Thread(target=self._loop, name='job-scheduler', daemon=True)
+        self._thread.start()
+
+        print(f"⏰ Планувальник запущено: {', '.join(self._jobs)}")
+
+    def stop(self, wait=True):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=wait)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            now = datetime.now()
+
+            for job in self._jobs.values():
+                if now >= job.next_run_at:
+                    slot = job.pending_slot
+                    current_slot = job.slot_for(now)
+
+                    # Потік міг "проспати" кілька слотів (довгий tick, сон ОС) - злиття в один запуск
+                    if current_slot > slot:
+                        job.missed += int((current_slot - slot) / job.interval)
+                        slot = current_slot
+
+                    self.trigger(job.name, slot=slot)
+                    job.pending_slot = job.schedule_next(slot)
+
+            self._stop.wait(self.tick_seconds)
+
+    # ==================== EXECUTION ====================
+
+    def trigger(self, name, slot=None):
+        """
+        Запустити задачу зараз (з розкладу або вручну)
+
+        Returns:
+            bool: False якщо досягнуто ліміт одночасних запусків
+        """
+        job = self._jobs[name]
+
+        if not job.semaphore.acquire(blocking=False):
+            job.skipped_overlap += 1
+            print(f"⏭️ {job.name}: попередній запуск ще триває - пропуск")
+            return False
+
+        with self._lock:
+            job.running += 1
+            job.last_slot = slot or datetime.now()
+
+        self._executor.submit(self._run, job)
+        return True
+
+    def _run(self, job):
+        started = datetime.now()
+        failed = False
+
+        print(f"\n{'='*70}")
+        print(f"⏰ {job.name}: {started.strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"{'='*70}")
+
+        try:
+            for stage_name, func in job.stages:
+                stage_started = time.perf_counter()
+                error = None
+
+                try:
+                    func()
+                except Exception as e:
+                    error = str(e)
+                    failed = True
+                    print(f"❌ {job.name}/{stage_name}: {e}")
+                    traceback.print_exc()
+
+                seconds = time.perf_counter() - stage_started
+                job.record_stage(stage_name, seconds, error=error)
+                print(f"⏱️ {job.name}/{stage_name}: {seconds:.2f} с")
+
+                if error is not None and stage_name in job.required_stages:
+                    print(f"⛔ {job.name}: обов'язковий етап {stage_name} не вдався - решту пропущено")
+                    break
+
+        finally:
+            with self._lock:
+                job.running -= 1
+                job.runs += 1
+                job.failures += int(failed)
+                job.last_completed = datetime.now()
+                self._save_state()
+            job.semaphore.release()
+
+        print(f"✅ {job.name}: {(datetime.now() - started).total_seconds():.1f} с\n")
+
+    # ==================== STATE ====================
+
+    def status(self):
+        with self._lock:
+            return {
+                'running': self._thread is not None,
+                'jobs': [job.to_dict() for job in self._jobs.values()]
+            }
+
+    def _save_state(self):
+        data = {
+            name: {
+                'last_slot': job.last_slot.isoformat() if job.last_slot else None,
+                'last_completed': job.last_completed.isoformat() if job.last_completed else None,
+                'stages': job.stage_metrics
+            }
+            for name, job in self._jobs.items()
+        }
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            tmp_path = f'{self.state_path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            print(f"⚠️ Не вдалося зберегти стан планувальника: {e}")
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return
+
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Не вдалося прочитати стан планувальника: {e}")
+            return
+
+        for name, state in data.items():
+            job = self._jobs.get(name)
+            if job is None:
+                continue
+            if state.get('last_slot'):
+                job.last_slot = datetime.fromisoformat(state['last_slot'])
+            if state.get('last_completed'):
+                job.last_completed = datetime.fromisoformat(state['last_completed'])
+            for stage_name, metrics in state.get('stages', {}).items():
+                if stage_name in job.stage_metrics:
+                    job.stage_metrics[stage_name].update(metrics)
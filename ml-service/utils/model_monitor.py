@@ -1,13 +1,20 @@
 # ml-service/utils/model_monitor.py
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from utils.db_helper import DatabaseHelper
 from models.air_quality_model import AirQualityModel
+from models.model_registry import get_model_registry
 from data.preprocessor import DataPreprocessor
+from utils.drift_detectors import get_drift_monitor
 from sklearn.model_selection import train_test_split
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import joblib
-import os
+
+# Райони, які зараз перенавчаються (спільне для всіх екземплярів ModelMonitor),
+# щоб один район не навчався двічі паралельно
+_retrain_lock = threading.Lock()
+_retraining_districts = set()
 
 class ModelMonitor:
     """
@@ -18,8 +25,11 @@ class ModelMonitor:
         self.db = DatabaseHelper()
         # Пороги для перенавчання
         self.RETRAIN_THRESHOLD_MAE = 3.0  # Якщо MAE > 3.0 μg/m³
+        self.CRITICAL_MAE = 6.0           # Критична аномалія - перенавчання першочергово
         self.RETRAIN_THRESHOLD_HOURS = 24  # Перенавчання кожні 24 години
         self.MIN_DATA_FOR_RETRAIN = 50     # Мінімум записів для перенавчання
+        self.TRAINING_DAYS = 30            # Скільки днів історії для навчання
+        self.MAX_RETRAIN_WORKERS = 2       # Паралельні перенавчання (XGBoost сам багатопотоковий)
     
     def check_forecast_accuracy(self, district_id):
         """
@@ -28,106 +38,123 @@ class ModelMonitor:
         Returns:
             dict: {'mae': float, 'should_retrain': bool, 'metrics': dict}
         """
-        print(f"\n📊 Перевірка точності прогнозів для району {district_id}...")
+        return self.check_forecast_accuracy_for_districts([district_id])[district_id]
+    
+    def check_forecast_accuracy_for_districts(self, district_ids, hours_back=24):
+        """
+        Перевірити точність прогнозів для кількох районів одним SQL-запитом
+        (з'єднання прогнозів з реальними даними та агрегація - в БД)
+        
+        Returns:
+            dict: {district_id: результат як у check_forecast_accuracy}
+        """
+        print(f"\n📊 Перевірка точності прогнозів для районів {list(district_ids)}...")
         
         try:
-            # 1. Отримати прогнози за останні 24 години
-            forecasts = self.db.get_forecasts_for_validation(district_id, hours_back=24)
-            
-            if len(forecasts) == 0:
-                print("   ⚠️ Немає прогнозів для перевірки")
-                return {'mae': 0, 'should_retrain': False, 'reason': 'no_forecasts'}
-            
-            # 2. Отримати реальні дані за той же період
-            actual = self.db.get_actual_data_for_period(
-                district_id,
-                forecasts['measured_at'].min(),
-                forecasts['measured_at'].max()
-            )
+            df = self.db.get_forecast_accuracy_for_districts(district_ids, hours_back=hours_back)
+        except Exception as e:
+            print(f"   ❌ Помилка перевірки: {e}")
+            return {
+                district_id: {'mae': 0, 'should_retrain': False, 'reason': f'error: {str(e)}'}
+                for district_id in district_ids
+            }
+        
+        rows = {int(row['district_id']): row for row in df.to_dict(orient='records')}
+        params = ['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']
+        results = {}
+        
+        for district_id in district_ids:
+            row = rows.get(int(district_id))
             
-            if len(actual) == 0:
-                print("   ⚠️ Немає реальних даних для порівняння")
-                return {'mae': 0, 'should_retrain': False, 'reason': 'no_actual_data'}
+            if row is None or row['samples'] < 5:
+                print(f"   ⚠️ Район {district_id}: недостатньо даних для порівняння")
+                results[district_id] = {
+                    'mae': 0,
+                    'should_retrain': False,
+                    'samples_compared': int(row['samples']) if row else 0,
+                    'reason': 'insufficient_overlap'
+                }
+                continue
             
-            # 3. Об'єднати прогнози та реальні дані
-            merged = pd.merge(
-                forecasts,
-                actual,
-                on='measured_at',
-                suffixes=('_forecast', '_actual')
-            )
+            metrics = {
+                param: {
+                    'mae': round(float(row[f'{param}_mae']), 3),
+                    'forecast_mean': round(float(row[f'{param}_forecast_mean']), 2),
+                    'actual_mean': round(float(row[f'{param}_actual_mean']), 2)
+                }
+                for param in params
+            }
+            avg_mae = float(np.mean([row[f'{param}_mae'] for param in params]))
             
-            if len(merged) < 5:
-                print("   ⚠️ Недостатньо даних для порівняння")
-                return {'mae': 0, 'should_retrain': False, 'reason': 'insufficient_overlap'}
-            
-            # 4. Розрахувати MAE для кожного параметра
-            params = ['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']
-            metrics = {}
-            total_mae = 0
-            
-            for param in params:
-                if f'{param}_forecast' in merged.columns and f'{param}_actual' in merged.columns:
-                    mae = np.mean(np.abs(
-                        merged[f'{param}_actual'] - merged[f'{param}_forecast']
-                    ))
-                    metrics[param] = {
-                        'mae': round(float(mae), 3),
-                        'forecast_mean': round(float(merged[f'{param}_forecast'].mean()), 2),
-                        'actual_mean': round(float(merged[f'{param}_actual'].mean()), 2)
-                    }
-                    total_mae += mae
-            
-            avg_mae = total_mae / len(params)
-            
-            print(f"   📊 Середня MAE: {avg_mae:.3f}")
-            print(f"   📊 Порівняно {len(merged)} точок")
-            
-            # 5. Визначити чи потрібно перенавчання
             should_retrain = avg_mae > self.RETRAIN_THRESHOLD_MAE
             is_critical = avg_mae > self.CRITICAL_MAE
             
             if is_critical:
-                print(f"   🚨 КРИТИЧНА АНОМАЛІЯ! MAE ({avg_mae:.3f}) > {self.CRITICAL_MAE}")
-                print(f"   🔴 НЕГАЙНЕ ПЕРЕНАВЧАННЯ!")
+                print(f"   🚨 Район {district_id}: КРИТИЧНА АНОМАЛІЯ! MAE ({avg_mae:.3f}) > {self.CRITICAL_MAE}")
             elif should_retrain:
-                print(f"   ⚠️ MAE ({avg_mae:.3f}) > порогу ({self.RETRAIN_THRESHOLD_MAE})")
-                print(f"   🔄 Рекомендується перенавчання!")
+                print(f"   ⚠️ Район {district_id}: MAE ({avg_mae:.3f}) > порогу ({self.RETRAIN_THRESHOLD_MAE})")
             else:
-                print(f"   ✅ Модель працює добре (MAE: {avg_mae:.3f})")
+                print(f"   ✅ Район {district_id}: модель працює добре (MAE: {avg_mae:.3f})")
             
-            return {
+            results[district_id] = {
                 'mae': round(avg_mae, 3),
                 'should_retrain': should_retrain,
                 'is_critical': is_critical,
                 'metrics': metrics,
-                'samples_compared': len(merged),
+                'samples_compared': int(row['samples']),
                 'reason': 'critical_anomaly' if is_critical else ('high_error' if should_retrain else 'good_performance')
             }
-            
-        except Exception as e:
-            print(f"   ❌ Помилка перевірки: {e}")
-            return {'mae': 0, 'should_retrain': False, 'reason': f'error: {str(e)}'}
+        
+        return results
+    
+    def check_accuracy_by_horizon(self, district_id, hours_back=24 * 7):
+        """
+        Точність прогнозів окремо для кожного горизонту (1..N годин наперед)
+        
+        Returns:
+            dict: {'horizons': [{'horizon': int, 'samples': int, 'mae': float, 'metrics': dict}]}
+        """
+        print(f"\n📊 Точність по горизонтах для району {district_id} ({hours_back} год)...")
+        
+        df = self.db.get_forecast_accuracy_by_horizon(district_id, hours_back=hours_back)
+        
+        if len(df) == 0:
+            print("   ⚠️ Немає прогнозів для перевірки")
+            return {'horizons': [], 'reason': 'no_forecasts'}
+        
+        params = ['pm25', 'pm10', 'no2', 'so2', 'co', 'o3']
+        horizons = []
+        
+        for row in df.itertuples(index=False):
+            metrics = {param: round(float(getattr(row, f'{param}_mae')), 3) for param in params}
+            horizons.append({
+                'horizon': int(row.horizon),
+                'samples': int(row.samples),
+                'mae': round(float(np.mean(list(metrics.values()))), 3),
+                'metrics': metrics
+            })
+        
+        print(f"   📊 Горизонтів: {len(horizons)}, "
+              f"MAE(1h)={horizons[0]['mae']:.3f}, MAE({horizons[-1]['horizon']}h)={horizons[-1]['mae']:.3f}")
+        
+        return {'horizons': horizons, 'hours_back': hours_back}
     
     def check_last_retrain_time(self, district_id):
         """
-        Перевірити коли востаннє була навчена модель
+        Перевірити коли востаннє була активована модель (публікація або rollback)
         
         Returns:
             dict: {'hours_since_retrain': int, 'should_retrain': bool}
         """
-        model_path = f'trained_models/model_district_{district_id}_xgboost.pkl'
+        last_modified = get_model_registry().activated_at(district_id)
         
-        if not os.path.exists(model_path):
+        if last_modified is None:
             return {'hours_since_retrain': 999, 'should_retrain': True, 'reason': 'no_model'}
-        
-        # Час останньої модифікації файлу
-        last_modified = datetime.fromtimestamp(os.path.getmtime(model_path))
         hours_since = (datetime.now() - last_modified).total_seconds() / 3600
         
         should_retrain = hours_since > self.RETRAIN_THRESHOLD_HOURS
         
-        print(f"   🕐 Модель навчена {hours_since:.1f} годин тому")
+        print(f"   🕐 Модель активна {hours_since:.1f} годин")
         
         if should_retrain:
             print(f"   ⚠️ Пройшло > {self.RETRAIN_THRESHOLD_HOURS} годин")
@@ -139,18 +166,34 @@ class ModelMonitor:
             'reason': 'time_threshold' if should_retrain else 'recent'
         }
     
-    def retrain_model(self, district_id):
+    def retrain_model(self, district_id, df=None):
         """
         Перенавчити модель для району
+        df - вже завантажені дані (якщо None, завантажуються з БД)
         
         Returns:
             dict: результат перенавчання
         """
+        with _retrain_lock:
+            if district_id in _retraining_districts:
+                print(f"\n⏭️ Район {district_id} вже перенавчається - пропуск")
+                return {'success': False, 'reason': 'already_in_progress'}
+            _retraining_districts.add(district_id)
+        
+        try:
+            return self._retrain_model(district_id, df=df)
+        finally:
+            with _retrain_lock:
+                _retraining_districts.discard(district_id)
+    
+    def _retrain_model(self, district_id, df=None):
+        """Перенавчання без перевірки дублікатів (див. retrain_model)"""
         print(f"\n🔄 Початок перенавчання моделі для району {district_id}...")
         
         try:
             # 1. Завантажити свіжі дані
-            df = self.db.get_training_data(district_id, days=30)
+            if df is None:
+                df = self.db.get_training_data(district_id, days=self.TRAINING_DAYS)
             
             if len(df) < self.MIN_DATA_FOR_RETRAIN:
                 return {
@@ -176,16 +219,28 @@ class ModelMonitor:
             )
             
             # 4. Навчити модель
+            # Без публікації: CURRENT переключається лише після успішної оцінки
             model = AirQualityModel(district_id, model_type='xgboost')
-            train_score, val_score = model.train(X_train, y_train, X_val, y_val)
+            train_score, val_score = model.train(X_train, y_train, X_val, y_val, save=False)
             
             # 5. Оцінити модель
             metrics = model.evaluate(X_val, y_val)
             
+            # 6. Опублікувати нову версію
+            model.save_model(metrics={
+                'train_r2': float(train_score),
+                'val_r2': float(val_score) if val_score is not None else None,
+                'model_type': model.model_type,
+                'validation': metrics
+            })
+            
             print(f"   ✅ Модель перенавчена!")
             print(f"   📊 Train R²: {train_score:.4f}")
             print(f"   📊 Val R²: {val_score:.4f}")
             
+            # Лише після успішного перенавчання: нова модель - новий відлік похибок і PSI-еталон
+            get_drift_monitor().reset_residuals(district_id, reference_df=df)
+            
             return {
                 'success': True,
                 'train_score': round(train_score, 4),
@@ -202,17 +257,14 @@ class ModelMonitor:
                 'reason': str(e)
             }
     
-    def auto_retrain_if_needed(self, district_id):
+    def run_checks(self, district_id, accuracy_check=None):
         """
-        Автоматично перенавчити модель якщо потрібно
+        Виконати перевірки без перенавчання
+        accuracy_check - вже пораховані метрики точності (monitor_all рахує їх для всіх районів разом)
         
         Returns:
-            dict: результат перевірки та перенавчання
+            tuple: (результат перевірок, чи потрібне перенавчання)
         """
-        print(f"\n{'='*70}")
-        print(f"🤖 AUTO-RETRAIN: Район {district_id}")
-        print(f"{'='*70}")
-        
         result = {
             'district_id': district_id,
             'timestamp': datetime.now().isoformat(),
@@ -221,22 +273,45 @@ class ModelMonitor:
         }
         
         # Перевірка 1: Точність прогнозів
-        accuracy_check = self.check_forecast_accuracy(district_id)
+        if accuracy_check is None:
+            accuracy_check = self.check_forecast_accuracy(district_id)
         result['checks']['accuracy'] = accuracy_check
         
         # Перевірка 2: Час останнього навчання
         time_check = self.check_last_retrain_time(district_id)
         result['checks']['time'] = time_check
         
+        # Перевірка 3: Онлайн-детектори дрейфу (без перечитування історії)
+        drift_check = get_drift_monitor().status(district_id)
+        result['checks']['drift'] = drift_check
+        if drift_check.get('feature_shift'):
+            print(f"   ⚠️ Зсув розподілу ознак: {', '.join(drift_check['shifted_features'])}")
+        
         # Рішення про перенавчання
         should_retrain = (
             accuracy_check.get('should_retrain', False) or
-            time_check.get('should_retrain', False)
+            time_check.get('should_retrain', False) or
+            drift_check.get('drift_detected', False)
         )
         
+        return result, should_retrain
+    
+    def auto_retrain_if_needed(self, district_id, df=None):
+        """
+        Автоматично перенавчити модель якщо потрібно
+        
+        Returns:
+            dict: результат перевірки та перенавчання
+        """
+        print(f"\n{'='*70}")
+        print(f"🤖 AUTO-RETRAIN: Район {district_id}")
+        print(f"{'='*70}")
+        
+        result, should_retrain = self.run_checks(district_id)
+        
         if should_retrain:
             print(f"\n🔄 Запуск перенавчання...")
-            retrain_result = self.retrain_model(district_id)
+            retrain_result = self.retrain_model(district_id, df=df)
             result['retrain_result'] = retrain_result
             result['retrained'] = retrain_result.get('success', False)
         else:
@@ -245,4 +320,77 @@ class ModelMonitor:
         
         print(f"{'='*70}\n")
         
-        return result
\ No newline at end of file
+        return result
+    
+    def retrain_priority(self, result):
+        """
+        Ключ сортування черги перенавчання (менше = раніше):
+        критичні аномалії та дрейф похибок, потім більша MAE, потім давніше навчена модель
+        """
+        accuracy = result['checks'].get('accuracy', {})
+        time_check = result['checks'].get('time', {})
+        drift = result['checks'].get('drift', {})
+        
+        return (
+            0 if accuracy.get('is_critical') or drift.get('alerts') else 1,
+            -accuracy.get('mae', 0),
+            -time_check.get('hours_since_retrain', 0)
+        )
+    
+    def monitor_all(self, district_ids):
+        """
+        Перевірити всі райони і перенавчити ті, що потребують
+        
+        1. Детектори дрейфу отримують нові вимірювання; точність усіх районів -
+           одним SQL-запитом, далі перевірки часу навчання
+        2. Райони для перенавчання впорядковуються за retrain_priority
+        3. Дані всіх районів черги - одним запитом (get_recent_windows), далі
+           перенавчання на обмеженому пулі MAX_RETRAIN_WORKERS у порядку пріоритету
+        
+        Returns:
+            list: результати по районах (у порядку district_ids)
+        """
+        print(f"\n{'='*70}")
+        print(f"🤖 AUTO-RETRAIN: {len(district_ids)} районів")
+        print(f"{'='*70}")
+        
+        get_drift_monitor().update_from_db(self.db, district_ids)
+        accuracy = self.check_forecast_accuracy_for_districts(district_ids)
+        checked = {
+            district_id: self.run_checks(district_id, accuracy_check=accuracy[district_id])
+            for district_id in district_ids
+        }
+        
+        queue = sorted(
+            (district_id for district_id, (_, should_retrain) in checked.items() if should_retrain),
+            key=lambda district_id: self.retrain_priority(checked[district_id][0])
+        )
+        
+        windows = {}
+        if queue:
+            print(f"\n🔄 Черга перенавчання: {queue}")
+            windows = self.db.get_recent_windows(queue, hours=self.TRAINING_DAYS * 24)
+        
+        with ThreadPoolExecutor(max_workers=self.MAX_RETRAIN_WORKERS) as pool:
+            futures = {
+                # Порожнє вікно (помилка запиту) - worker завантажить дані району сам
+                district_id: pool.submit(
+                    self.retrain_model, district_id,
+                    df=windows[district_id] if len(windows.get(district_id, ())) else None
+                )
+                for district_id in queue
+            }
+        
+        results = []
+        for district_id in district_ids:
+            result, _ = checked[district_id]
+            if district_id in futures:
+                retrain_result = futures[district_id].result()
+                result['retrain_priority'] = queue.index(district_id) + 1
+                result['retrain_result'] = retrain_result
+                result['retrained'] = retrain_result.get('success', False)
+            results.append(result)
+        
+        print(f"{'='*70}\n")
+        
+        return results
@@ -0,0 +1,73 @@
+# ml-service/utils/pipeline.py
+"""
+Щогодинний конвеєр ML сервісу:
+ingest → features → forecast → monitor
+
+Виконується планувальником усередині процесу (utils.job_scheduler)
+замість окремого scheduler.py, що смикав /api/monitor/all по HTTP.
+"""
+from config import Config
+from utils.job_scheduler import JobScheduler, ScheduledJob
+
+
+def build_scheduler(db):
+    """Планувальник з конвеєром та щоденним обслуговуванням партицій"""
+    district_ids = [district['id'] for district in Config.DISTRICTS]
+
+    def ingest():
+        """Заповнити пропуски живих вимірювань за останні години з OpenWeather history (ідемпотентно)"""
+        from collect_historical_data import collect_recent_data
+        db.ensure_history_partitions()
+        collect_recent_data(hours_back=Config.PIPELINE_INGEST_HOURS)
+
+    def update_features():
+        """Оновити детектори дрейфу та Parquet-дзеркало новими записами"""
+        from utils.drift_detectors import get_drift_monitor
+        get_drift_monitor().update_from_db(db, district_ids)
+
+        if Config.TRAINING_DATA_SOURCE == 'parquet':
+            from data.history_mirror import HistoryMirror
+            HistoryMirror(db=db).sync(district_ids)
+
+    def forecast():
+        from utils.forecasting import forecast_all_districts
+        forecast_all_districts(db, hours=Config.PIPELINE_FORECAST_HOURS)
+
+    def monitor():
+        from utils.model_monitor import ModelMonitor
+        results = ModelMonitor().monitor_all(district_ids)
+
+        for result in results:
+            if result.get('retrained'):
+                print(f"🔄 Район {result['district_id']}: Модель перенавчена")
+
+    def maintain_partitions():
+        db.ensure_history_partitions()
+        db.drop_expired_history_partitions()
+
+    scheduler = JobScheduler()
+
+    scheduler.add_job(ScheduledJob(
+        'hourly_pipeline',
+        stages=[
+            ('ingest', ingest),
+            ('features', update_features),
+            ('forecast', forecast),
+            ('monitor', monitor)
+        ],
+        interval_minutes=60,
+        offset_minutes=Config.PIPELINE_OFFSET_MINUTES,
+        jitter_seconds=Config.PIPELINE_JITTER_SECONDS,
+        max_concurrency=1
+    ))
+
+    scheduler.add_job(ScheduledJob(
+        'daily_maintenance',
+        stages=[('partitions', maintain_partitions)],
+        interval_minutes=24 * 60,
+        offset_minutes=3 * 60 + 30,
+        jitter_seconds=Config.PIPELINE_JITTER_SECONDS,
+        max_concurrency=1
+    ))
+
+    return scheduler
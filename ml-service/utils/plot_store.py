@@ -0,0 +1,219 @@
+# ml-service/utils/plot_store.py
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import numpy as np
+from config import Config
+from utils.disk_cache import LRUDirectory, atomic_write_dir
+
+PLOT_NAMES = ('actual_vs_predicted', 'scatter_plots', 'loss_curve', 'residuals')
+
+
+def _new_figure(figsize):
+    # Figure без pyplot: без глобального стану, тож рендер безпечний у фоновому потоці
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
+
+def _pollutant_grid(title):
+    fig = _new_figure((15, 10))
+    fig.suptitle(title, fontsize=16, fontweight='bold')
+    axes = fig.subplots(2, 3)
+    return fig, axes
+
+
+def render_actual_vs_predicted(charts):
+    fig, axes = _pollutant_grid('Actual vs Predicted Values')
+
+    for idx, (param, series) in enumerate(charts['series'].items()):
+        ax = axes[idx // 3, idx % 3]
+        ax.plot(series['index'], series['actual'], label='Actual', linewidth=2, alpha=0.7)
+        ax.plot(series['index'], series['predicted'], label='Predicted', linewidth=2, alpha=0.7)
+        ax.set_title(f'{param.upper()}', fontweight='bold')
+        ax.set_xlabel('Sample')
+        ax.set_ylabel('Value')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    return fig
+
+
+def render_scatter_plots(charts):
+    fig, axes = _pollutant_grid('Correlation: Actual vs Predicted')
+
+    for idx, (param, series) in enumerate(charts['series'].items()):
+        ax = axes[idx // 3, idx % 3]
+        y_true = np.asarray(series['actual'])
+        y_pred = np.asarray(series['predicted'])
+
+        ax.scatter(y_true, y_pred, alpha=0.5, s=30)
+
+        # Лінія ідеальної кореляції
+        min_val = min(y_true.min(), y_pred.min())
+        max_val = max(y_true.max(), y_pred.max())
+        ax.plot([min_val, max_val], [min_val, max_val], 'r--', linewidth=2, label='Perfect correlation')
+
+        ax.set_title(f'{param.upper()}', fontweight='bold')
+        ax.set_xlabel('Actual')
+        ax.set_ylabel('Predicted')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+
+    return fig
+
+
+def render_loss_curve(charts):
+    loss = charts['loss']
+    fig = _new_figure((10, 6))
+    ax = fig.subplots()
+
+    ax.plot(loss['epoch'], loss['loss'], label='Training Loss', linewidth=2)
+    if 'val_loss' in loss:
+        ax.plot(loss['epoch'], loss['val_loss'], label='Validation Loss', linewidth=2)
+
+    ax.set_title('Training History', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Epoch')
+    ax.set_ylabel('Loss')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    return fig
+
+
+def render_residuals(charts):
+    fig, axes = _pollutant_grid('Prediction Residuals')
+
+    for idx, (param, series) in enumerate(charts['series'].items()):
+        ax = axes[idx // 3, idx % 3]
+        # Гістограма порахована з усіх залишків, тут лише малюється
+        histogram = series['residual_histogram']
+        edges = np.asarray(histogram['edges'])
+
+        ax.stairs(histogram['counts'], edges, fill=True, edgecolor='black', alpha=0.7)
+        ax.axvline(0, color='red', linestyle='--', linewidth=2)
+        ax.set_title(f'{param.upper()}', fontweight='bold')
+        ax.set_xlabel('Residual (Actual - Predicted)')
+        ax.set_ylabel('Frequency')
+        ax.grid(True, alpha=0.3)
+
+    return fig
+
+
+RENDERERS = {
+    'actual_vs_predicted': render_actual_vs_predicted,
+    'scatter_plots': render_scatter_plots,
+    'loss_curve': render_loss_curve,
+    'residuals': render_residuals
+}
+
+
+class PlotStore:
+    """
+    PNG-графіки навчання /api/research, відрендерені поза запитом
+
+    - submit() ставить рендер у пул потоків і одразу повертає назви графіків;
+      задача навчання не чекає matplotlib
+    - рендер іде з уже проріджених (LTTB) рядів, а не з усього тестового набору
+    - файли: PLOTS_PATH/<job_id>/<name>.png (кеш за job_id); зберігаються
+      останні RESEARCH_PLOTS_TO_KEEP задач
+    """
+
+    def __init__(self, root=None, max_workers=None, keep=None):
+        self.root = root or Config.PLOTS_PATH
+        self.keep = keep or Config.RESEARCH_PLOTS_TO_KEEP
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.PLOT_WORKERS,
+            thread_name_prefix='plots'
+        )
+        self._lock = threading.Lock()
+        self._pending = {}  # job_id -> Future
+        self._jobs = LRUDirectory(self.root, max_entries=self.keep)
+
+    def job_dir(self, job_id):
+        if not re.fullmatch(r'[0-9a-f]{32}', job_id):
+            raise ValueError(f"Invalid job_id: {job_id}")
+        return os.path.join(self.root, job_id)
+
+    @staticmethod
+    def plot_names(charts):
+        return [name for name in PLOT_NAMES if name != 'loss_curve' or 'loss' in charts]
+
+    def submit(self, job_id, charts):
+        """
+        Поставити рендер графіків задачі в чергу
+
+        Returns:
+            list: назви графіків, які будуть доступні через get_png()
+        """
+        names = self.plot_names(charts)
+
+        with self._lock:
+            self._pending[job_id] = self._executor.submit(self._render_all, job_id, charts, names)
+
+        return names
+
+    def _render_all(self, job_id, charts, names):
+        def write(tmp_dir):
+            for name in names:
+                fig = RENDERERS[name](charts)
+                fig.tight_layout()
+                fig.savefig(os.path.join(tmp_dir, f'{name}.png'), format='png', dpi=100, bbox_inches='tight')
+
+        try:
+            # Тека задачі з'являється лише повністю відрендереною
+            atomic_write_dir(self.job_dir(job_id), write)
+        except Exception as e:
+            print(f"⚠️ Помилка генерації графіків ({job_id}): {e}")
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(job_id, None)
+
+        self.prune()
+
+    def get_png(self, job_id, name, timeout=None):
+        """
+        Шлях до PNG; якщо рендер ще триває - дочекатися його (не довше timeout)
+
+        Returns:
+            str або None, якщо графіка немає (невідома задача або рендер не вдався)
+        Raises:
+            concurrent.futures.TimeoutError: рендер не встиг за timeout
+        """
+        if name not in PLOT_NAMES:
+            return None
+
+        job_dir = self.job_dir(job_id)
+
+        with self._lock:
+            future = self._pending.get(job_id)
+
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except FutureTimeoutError:
+                raise
+            except Exception:
+                return None
+
+        path = os.path.join(job_dir, f'{name}.png')
+        return path if os.path.exists(path) else None
+
+    def prune(self):
+        """Видалити графіки найстаріших задач понад keep"""
+        self._jobs.evict()
+
+
+_plot_store = None
+_plot_store_lock = threading.Lock()
+
+
+def get_plot_store():
+    """Спільне сховище графіків процесу"""
+    global _plot_store
+
+    with _plot_store_lock:
+        if _plot_store is None:
+            _plot_store = PlotStore()
+        return _plot_store
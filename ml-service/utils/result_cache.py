@@ -0,0 +1,85 @@
+# ml-service/utils/result_cache.py
+import hashlib
+import os
+import threading
+import time
+from config import Config
+from utils import serialization
+from utils.disk_cache import LRUDirectory, atomic_write, touch
+
+
+class ResultCache:
+    """
+    Дисковий кеш результатів важких обчислень (напр. /test-model)
+
+    - ключ - довільний JSON-серіалізований dict (район, параметри, версія даних...)
+    - кожен запис - окремий JSON-файл <sha1 ключа>.json, запис атомарний (tmp + rename)
+    - при перевищенні max_bytes видаляються записи, які найдовше не читались
+      (час останнього читання = mtime файлу, оновлюється при кожному get)
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._entries = LRUDirectory(self.path, max_bytes=max_bytes)
+
+    @staticmethod
+    def digest(key):
+        return hashlib.sha1(serialization.dumps(key)).hexdigest()
+
+    def entry_file(self, key):
+        return os.path.join(self.path, f'{self.digest(key)}.json')
+
+    def get(self, key):
+        """Збережений результат або None"""
+        path = self.entry_file(key)
+
+        try:
+            with open(path, 'rb') as f:
+                entry = serialization.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+        touch(path)
+
+        return entry['result']
+
+    def set(self, key, result):
+        payload = serialization.dumps({
+            'key': key,
+            'created_at': time.time(),
+            'result': result
+        })
+
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+
+        try:
+            atomic_write(self.entry_file(key), write)
+        except Exception as e:
+            print(f"⚠️ Не вдалося зберегти результат у кеш: {e}")
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Видаляти найдавніше прочитані записи, поки розмір кешу > max_bytes"""
+        self._entries.evict()
+
+
+_test_model_cache = None
+_test_model_cache_lock = threading.Lock()
+
+
+def get_test_model_cache():
+    """Кеш результатів /test-model (спільний для процесу)"""
+    global _test_model_cache
+
+    with _test_model_cache_lock:
+        if _test_model_cache is None:
+            _test_model_cache = ResultCache(
+                Config.TEST_MODEL_CACHE_PATH,
+                Config.TEST_MODEL_CACHE_MAX_MB * 1024 * 1024
+            )
+        return _test_model_cache
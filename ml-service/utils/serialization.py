@@ -0,0 +1,120 @@
+# ml-service/utils/serialization.py
+"""
+Швидка JSON-серіалізація відповідей ML сервісу
+
+- orjson кодує numpy масиви та скаляри (float32, int64, ...) напряму,
+  без проміжних float() на кожне значення; NaN/inf -> null
+- columns_to_records() будує список записів зі стовпців: округлення
+  векторизоване (np.round на весь стовпець), у Python-об'єкти кожен
+  стовпець перетворюється одним .tolist()
+- відповіді Flask (OrjsonProvider) зберігають формат дат DefaultJSONProvider -
+  RFC 822 (http_date), як і до переходу на orjson; dumps() для внутрішніх
+  файлів (задачі, кеш) пише ISO 8601
+"""
+from datetime import date
+from decimal import Decimal
+import numpy as np
+import orjson
+import pandas as pd
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+# Дати у відповідях - через _http_default, а не вбудований ISO-формат orjson
+RESPONSE_OPTIONS = ORJSON_OPTIONS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def _default(obj):
+    """Типи, яких orjson не знає сам"""
+    if isinstance(obj, np.ndarray):
+        # Не C-contiguous масиви та dtype=object orjson віддає сюди
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.to_numpy().tolist()
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict(orient='records')
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, (pd.Timestamp, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _http_default(obj):
+    """Як _default, але дати - RFC 822 (формат flask.json за замовчуванням)"""
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, date):
+        return http_date(obj)
+    return _default(obj)
+
+
+def dumps(obj):
+    """obj -> JSON (bytes)"""
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+
+def dumps_response(obj):
+    """obj -> JSON (bytes) для HTTP-відповіді"""
+    return orjson.dumps(obj, default=_http_default, option=RESPONSE_OPTIONS)
+
+
+def loads(data):
+    return orjson.loads(data)
+
+
+def round_array(values, decimals=2):
+    """Векторизоване округлення -> список Python float (NaN -> None)"""
+    values = np.round(np.asarray(values, dtype=np.float64), decimals)
+    result = values.tolist()
+
+    nan_mask = np.isnan(values)
+    if nan_mask.any():
+        for idx in np.flatnonzero(nan_mask):
+            result[idx] = None
+
+    return result
+
+
+def columns_to_records(columns, decimals=2):
+    """
+    {'name': стовпець, ...} -> [{'name': значення, ...}, ...]
+
+    Числові стовпці (float) округлюються до decimals одним np.round;
+    решта (рядки, int, bool) переноситься як є. Усі стовпці однакової довжини.
+    """
+    names = list(columns)
+    values = []
+
+    for name in names:
+        column = columns[name]
+        array = column if isinstance(column, np.ndarray) else np.asarray(column)
+
+        if decimals is not None and np.issubdtype(array.dtype, np.floating):
+            values.append(round_array(array, decimals))
+        else:
+            values.append(array.tolist())
+
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON провайдер Flask на orjson (jsonify, request.get_json)"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps_response(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_response(obj), mimetype=self.mimetype)